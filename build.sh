@@ -3,5 +3,6 @@ set -o errexit
 
 pip install -r requirements.txt
 
+python manage.py build_assets --fetch
 python manage.py collectstatic --no-input
 python manage.py migrate
@@ -1,7 +1,14 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
 from django.contrib.auth.admin import UserAdmin
+from django.db import transaction
+from django.db.models import F
+from django.template.response import TemplateResponse
+from django.utils import timezone
 
-from kitchen.models import Cook, Dish, DishType, Ingredient
+from kitchen import bulk, dispatch
+from kitchen.forms import AutocompleteSelectMultiple, DishBulkEditForm
+from kitchen.models import Cook, Deletion, Dish, DishIngredient, DishType, Ingredient, Job, Order, OrderItem
 
 
 @admin.register(Cook)
@@ -22,12 +29,138 @@ class DishTypeAdmin(admin.ModelAdmin):
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     search_fields = ("name",)
-    list_display = ("name",)
+    list_display = ("name", "unit", "unit_cost")
+    list_editable = ("unit", "unit_cost")
+
+
+class DishIngredientInline(admin.TabularInline):
+    model = DishIngredient
+    fields = ("ingredient", "quantity", "unit")
+    autocomplete_fields = ("ingredient",)
+    verbose_name = "recipe line"
+    extra = 3
 
 
 @admin.register(Dish)
 class DishAdmin(admin.ModelAdmin):
-    list_display = ("name", "dish_type", "price", "created_at")
+    list_display = ("name", "dish_type", "price", "food_cost", "margin", "created_at")
     list_filter = ("dish_type",)
     search_fields = ("name", "description")
-    filter_horizontal = ("cooks", "ingredients")
+    readonly_fields = ("food_cost",)
+    inlines = (DishIngredientInline,)
+    actions = ("bulk_edit",)
+    autocomplete_urls = {
+        "cooks": "kitchen:cook-autocomplete",
+    }
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name in self.autocomplete_urls:
+            kwargs["widget"] = AutocompleteSelectMultiple(self.autocomplete_urls[db_field.name])
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+    @admin.display(description="Margin", ordering=F("price") - F("food_cost"))
+    def margin(self, dish):
+        if dish.margin_percent is None:
+            return dish.margin
+        return f"{dish.margin} ({dish.margin_percent}%)"
+
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+        changed = formset.new_objects or formset.changed_objects or formset.deleted_objects
+        if formset.model is DishIngredient and changed:
+            # inline rows are saved one by one, without m2m_changed
+            ingredient_ids = {line_form.initial.get("ingredient") for line_form in formset.initial_forms}
+            ingredient_ids |= {line.ingredient_id for line in formset.new_objects}
+            ingredient_ids |= {line.ingredient_id for line, _fields in formset.changed_objects}
+            ingredient_ids.discard(None)
+            bulk.recipes_changed([form.instance.pk], ingredient_ids)
+
+    @admin.action(description="Bulk edit selected dishes")
+    def bulk_edit(self, request, queryset):
+        # the intermediate page posts back to this action with "apply" set;
+        # prefixed, as the admin's own "action" field is in the same POST
+        form = DishBulkEditForm(request.POST if "apply" in request.POST else None, prefix="bulk")
+        if form.is_valid():
+            dish_ids = bulk.dish_ids_of(queryset)
+            label = bulk.ACTIONS[form.cleaned_data["action"]]
+            if job := bulk.defer(dish_ids, form.cleaned_data):
+                self.message_user(request, f"{label}: queued as job #{job.pk}.", messages.INFO)
+                return None
+            changed = bulk.apply(dish_ids, form.cleaned_data)
+            self.message_user(request, f"{label}: {changed} change(s).", messages.SUCCESS)
+            return None
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Bulk edit dishes",
+            "opts": self.model._meta,
+            "form": form,
+            "media": self.media + form.media,
+            "dish_count": queryset.count(),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            "selected": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            "select_across": request.POST.get("select_across", "0"),
+        }
+        return TemplateResponse(request, "admin/kitchen/dish/bulk_edit.html", context)
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    fields = ("dish", "quantity", "cook", "status", "assigned_at", "completed_at")
+    readonly_fields = ("cook", "status", "assigned_at", "completed_at")
+    raw_id_fields = ("dish",)
+    extra = 3
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "priority", "created_at")
+    search_fields = ("reference",)
+    inlines = (OrderItemInline,)
+    actions = ("complete",)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        order = form.instance
+        # the in-memory dispatcher must not see rows that get rolled back
+        transaction.on_commit(lambda: dispatch.dispatch_order(order))
+
+    @admin.action(description="Mark the items of the selected orders done")
+    def complete(self, request, queryset):
+        item_ids = OrderItem.objects.filter(order__in=queryset).values_list("pk", flat=True)
+        done = dispatch.get_dispatcher().complete(list(item_ids))
+        self.message_user(request, f"{done} item(s) done.", messages.SUCCESS)
+
+
+@admin.register(Deletion)
+class DeletionAdmin(admin.ModelAdmin):
+    list_display = ("object_repr", "target", "status", "removed", "total", "created_at", "finished_at")
+    list_filter = ("status", "target")
+    readonly_fields = [field.name for field in Deletion._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "status", "priority", "attempts", "run_after", "worker", "created_at", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = [field.name for field in Job._meta.fields]
+    actions = ("run_again", "cancel")
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Run the selected failed or cancelled jobs again")
+    def run_again(self, request, queryset):
+        queued = queryset.filter(status__in=[Job.Status.FAILED, Job.Status.CANCELLED]).update(
+            status=Job.Status.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None, updated_at=timezone.now()
+        )
+        self.message_user(request, f"{queued} job(s) queued again.", messages.SUCCESS)
+
+    @admin.action(description="Cancel the selected queued jobs")
+    def cancel(self, request, queryset):
+        cancelled = queryset.filter(status=Job.Status.QUEUED).update(
+            status=Job.Status.CANCELLED, finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        self.message_user(request, f"{cancelled} job(s) cancelled.", messages.SUCCESS)
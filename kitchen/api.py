@@ -0,0 +1,165 @@
+"""
+Read-only JSON API (v1) for POS terminals and kitchen displays.
+
+- ``?fields=name,price`` limits the serialized fields
+- lists are keyset-paginated by pk: ``?after=<pk>&limit=<n>``
+- every response carries an ``ETag``; pollers sending ``If-None-Match``
+  get a bodiless 304 when nothing changed. Checking costs one
+  ``MAX(updated_at)``/``COUNT(*)`` aggregate per model involved, and no
+  serialization. There is no ``Last-Modified``: deleting rows does not move
+  any timestamp, only the counts in the ``ETag``.
+"""
+
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Count, Max, Prefetch
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views import generic
+
+from kitchen import impact
+from kitchen.models import Dish, DishType, Ingredient
+
+
+class ApiView(LoginRequiredMixin, generic.View):
+    # answer 403 instead of redirecting API clients to the login page
+    raise_exception = True
+
+    model = None
+    # field name -> callable(obj) producing its JSON value
+    serializers: dict = {}
+    # models whose changes affect this resource's representation
+    version_models: tuple = ()
+    default_limit = 100
+    max_limit = 500
+
+    def get_fields(self) -> list[str]:
+        requested = self.request.GET.get("fields")
+        if not requested:
+            return list(self.serializers)
+        fields = [name.strip() for name in requested.split(",") if name.strip() in self.serializers]
+        return fields or list(self.serializers)
+
+    def get_queryset(self, fields: list[str]):
+        return self.model._default_manager.order_by("pk")
+
+    def serialize(self, obj, fields: list[str]) -> dict:
+        return {name: self.serializers[name](obj) for name in fields}
+
+    def get_version(self) -> str:
+        """Return a version tag of the resource."""
+        parts = []
+        for model in self.version_models:
+            # deletions do not move MAX(updated_at); the count catches them
+            version = model._default_manager.aggregate(last=Max("updated_at"), count=Count("pk"))
+            parts += [str(version["last"]), str(version["count"])]
+        return "|".join(parts)
+
+    def get(self, request, *args, **kwargs):
+        # different fields/pages are different representations
+        etag = '"%s"' % hashlib.md5(f"{self.get_version()}|{request.get_full_path()}".encode()).hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(self.get_data(**kwargs))
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def get_limit(self) -> int:
+        try:
+            limit = int(self.request.GET.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_data(self, pk=None) -> dict:
+        fields = self.get_fields()
+        queryset = self.get_queryset(fields)
+        if pk is not None:
+            obj = queryset.filter(pk=pk).first()
+            if obj is None:
+                raise Http404
+            return self.serialize(obj, fields)
+
+        after = self.request.GET.get("after")
+        if after and after.isdigit():
+            queryset = queryset.filter(pk__gt=int(after))
+        limit = self.get_limit()
+        objects = list(queryset[: limit + 1])
+        results = [self.serialize(obj, fields) for obj in objects[:limit]]
+        next_after = objects[limit - 1].pk if len(objects) > limit else None
+        return {"results": results, "next_after": next_after}
+
+
+class DishApiView(ApiView):
+    model = Dish
+    version_models = (Dish, DishType, get_user_model(), Ingredient)
+    serializers = {
+        "id": lambda dish: dish.pk,
+        "name": lambda dish: dish.name,
+        "description": lambda dish: dish.description,
+        "price": lambda dish: str(dish.price),
+        "dish_type": lambda dish: {"id": dish.dish_type_id, "name": dish.dish_type.name},
+        "cooks": lambda dish: [{"id": cook.pk, "username": cook.username} for cook in dish.cooks.all()],
+        "ingredients": lambda dish: [
+            {"id": ingredient.pk, "name": ingredient.name} for ingredient in dish.ingredients.all()
+        ],
+        "created_at": lambda dish: dish.created_at.isoformat(),
+        "updated_at": lambda dish: dish.updated_at.isoformat(),
+    }
+
+    def get_queryset(self, fields):
+        queryset = super().get_queryset(fields)
+        if "dish_type" in fields:
+            queryset = queryset.select_related("dish_type")
+        if "cooks" in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch("cooks", queryset=get_user_model().objects.only("id", "username"))
+            )
+        if "ingredients" in fields:
+            queryset = queryset.prefetch_related("ingredients")
+        return queryset
+
+
+class CookApiView(ApiView):
+    model = get_user_model()
+    version_models = (get_user_model(),)
+    serializers = {
+        "id": lambda cook: cook.pk,
+        "username": lambda cook: cook.username,
+        "first_name": lambda cook: cook.first_name,
+        "last_name": lambda cook: cook.last_name,
+        "years_of_experience": lambda cook: cook.years_of_experience,
+    }
+
+
+class IngredientApiView(ApiView):
+    model = Ingredient
+    version_models = (Ingredient,)
+    serializers = {
+        "id": lambda ingredient: ingredient.pk,
+        "name": lambda ingredient: ingredient.name,
+    }
+
+
+class IngredientImpactApiView(LoginRequiredMixin, generic.View):
+    """
+    Dishes affected by a set of ingredients (stock-out, allergen):
+    ``?ingredient=<id>&ingredient=<id>&match=any|all``, see ``kitchen.impact``.
+    """
+
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            ingredient_ids = [int(value) for value in request.GET.getlist("ingredient")]
+        except ValueError:
+            return HttpResponseBadRequest("ingredient must be an id")
+        match = request.GET.get("match", "any")
+        if not ingredient_ids or match not in impact.MATCH_MODES:
+            return HttpResponseBadRequest("pass one or more ?ingredient=<id> and match=any|all")
+        response = JsonResponse(impact.impact(ingredient_ids, match))
+        response["Cache-Control"] = "private, no-cache"
+        return response
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from kitchen import api
+
+app_name = "api-v1"
+
+urlpatterns = [
+    path("dishes/", api.DishApiView.as_view(), name="dish-list"),
+    path("dishes/<int:pk>/", api.DishApiView.as_view(), name="dish-detail"),
+    path("cooks/", api.CookApiView.as_view(), name="cook-list"),
+    path("cooks/<int:pk>/", api.CookApiView.as_view(), name="cook-detail"),
+    path("ingredients/", api.IngredientApiView.as_view(), name="ingredient-list"),
+    path("ingredients/<int:pk>/", api.IngredientApiView.as_view(), name="ingredient-detail"),
+    path("ingredients/impact/", api.IngredientImpactApiView.as_view(), name="ingredient-impact"),
+]
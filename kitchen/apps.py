@@ -6,17 +6,21 @@ class KitchenConfig(AppConfig):
     name = "kitchen"
 
     def ready(self):
-        from django.contrib.auth import get_user_model
-        from django.db.utils import OperationalError
+        # no database access here: ready() runs in every worker and command
+        from django.db.models.signals import post_migrate
 
-        User = get_user_model()
+        from kitchen import auth, caching, costing, counters, db, impact, live, signals, tasks
+        from kitchen.bootstrap import bootstrap_admin
+        from kitchen.search import install_search_indexes
 
-        try:
-            if not User.objects.filter(username="admin").exists():
-                User.objects.create_superuser(
-                    username="admin",
-                    password="admin12345",
-                )
-                print("✅ Test superuser created: admin / admin12345")
-        except OperationalError:
-            pass
+        post_migrate.connect(install_search_indexes, sender=self)
+        post_migrate.connect(bootstrap_admin, sender=self)
+        auth.connect_signals()
+        caching.connect_signals()
+        costing.connect_signals()
+        counters.connect_signals()
+        db.connect_signals()
+        impact.connect_signals()
+        live.connect_signals()
+        signals.connect_signals()
+        tasks.register()
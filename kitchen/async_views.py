@@ -0,0 +1,139 @@
+"""
+Async versions of the read-heavy pages, used when serving through ASGI
+(``KITCHEN_ASYNC_VIEWS``, on by default in ``kitchen_service/asgi.py``).
+
+They reuse the querysets, contexts and templates of the sync views and run
+the queries through the async ORM (``acount``, ``aget``, ``async for``),
+gathering independent ones with ``asyncio.gather``. On Django 4.2 the async
+ORM still executes each query in the request's sync thread, so gathered
+queries of one request do not overlap their database time; what ASGI buys is
+that no worker blocks while a request waits on the database.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage, Page
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import generic
+
+from kitchen import counters, live
+from kitchen.caching import AsyncCachedResponseMixin
+from kitchen.views import DishDetailView, DishListView, IndexView
+
+
+class AsyncLoginRequiredMixin:
+    """Resolve ``request.user`` off the event loop before ``LoginRequiredMixin`` reads it."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # the lazy user loads the session and the user synchronously
+        await sync_to_async(lambda: request.user.is_authenticated)()
+        response = super().dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
+class AsyncListMixin:
+    """``async def get`` for a ``ListView``: COUNT and page rows are fetched concurrently."""
+
+    _async_page = None
+
+    def paginate_queryset(self, queryset, page_size):
+        if self._async_page is not None:
+            return self._async_page
+        return super().paginate_queryset(queryset, page_size)
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = queryset = self.get_queryset()
+        page_size = self.get_paginate_by(queryset)
+        if page_size:
+            self._async_page = await self.apaginate_queryset(queryset, page_size)
+        return self.render_to_response(self.get_context_data())
+
+    async def apaginate_queryset(self, queryset, page_size):
+        sync_page = sync_to_async(super().paginate_queryset)
+        if self.get_pagination_mode() == "keyset":
+            # seeking needs the cursor decoded and checked first; keep it on one thread
+            return await sync_page(queryset, page_size)
+
+        page_number = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+        try:
+            number = int(page_number)
+        except ValueError:
+            # "last" and bad input need the count first; the sync path handles them
+            return await sync_page(queryset, page_size)
+
+        paginator = self.get_paginator(queryset, page_size, allow_empty_first_page=self.get_allow_empty())
+        offset = max(number - 1, 0) * page_size
+        paginator.count, rows = await asyncio.gather(
+            queryset.acount(), self._fetch(queryset[offset:offset + page_size])
+        )
+        try:
+            number = paginator.validate_number(number)
+        except InvalidPage as exc:
+            raise Http404(f"Invalid page ({page_number}): {exc}") from exc
+        page = Page(rows, number, paginator)
+        return paginator, page, rows, page.has_other_pages()
+
+    @staticmethod
+    async def _fetch(queryset) -> list:
+        # async iteration runs select_related/prefetch_related too
+        return [obj async for obj in queryset]
+
+
+class AsyncDetailMixin:
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        try:
+            self.object = await queryset.aget(pk=self.kwargs[self.pk_url_kwarg])
+        except queryset.model.DoesNotExist as exc:
+            raise Http404(f"No {queryset.model._meta.verbose_name} found") from exc
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+
+class AsyncIndexView(AsyncLoginRequiredMixin, IndexView):
+    async def get(self, request, *args, **kwargs):
+        totals, latest_dishes = await asyncio.gather(
+            counters.aget_totals(), sync_to_async(counters.get_latest_dishes)()
+        )
+        context = self.get_context_data(**kwargs)
+        context.update(totals, latest_dishes=latest_dishes)
+        return self.render_to_response(context)
+
+    def get_context_data(self, **kwargs):
+        # skip IndexView's synchronous counter lookups
+        return super(IndexView, self).get_context_data(**kwargs)
+
+
+class AsyncDishListView(AsyncLoginRequiredMixin, AsyncCachedResponseMixin, AsyncListMixin, DishListView):
+    pass
+
+
+class AsyncDishDetailView(AsyncLoginRequiredMixin, AsyncCachedResponseMixin, AsyncDetailMixin, DishDetailView):
+    pass
+
+
+class LiveEventsView(AsyncLoginRequiredMixin, LoginRequiredMixin, generic.View):
+    """Server-Sent Events stream of ``kitchen.live`` changes; ASGI only."""
+
+    # EventSource cannot follow a redirect to the login page
+    raise_exception = True
+    # open-ended: nothing to benchmark
+    streaming = True
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            # a WSGI worker would be held for the whole stream
+            return HttpResponse(
+                "Live events are served through ASGI (kitchen_service.asgi).", status=503, content_type="text/plain"
+            )
+        # browsers send Last-Event-ID when reconnecting; the page passes its first one
+        last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id", "")
+        response = StreamingHttpResponse(live.stream(last_event_id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # keep proxies (nginx) from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
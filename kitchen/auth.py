@@ -0,0 +1,85 @@
+"""
+``request.user`` from the cache.
+
+``AuthenticationMiddleware`` resolves the user once per request (lazily,
+on first access to ``request.user``) through the session's backend, which
+with ``ModelBackend`` is one ``Cook`` query on every page.
+``CachedModelBackend`` keeps the ``Cook`` in the cache for
+``KITCHEN_USER_CACHE_TIMEOUT`` seconds instead. Saving or deleting the
+cook drops the entry; the session auth hash is then checked against a
+fresh object, so a password change ends the cook's other sessions.
+
+That only holds when every worker shares the cache: with a per-process
+one, the other workers keep their copy until it expires, so the setting
+defaults to 0 (no user cache) unless ``KITCHEN_SHARED_CACHE``. Writes that
+bypass ``post_save`` (``QuerySet.update``, raw SQL) must call ``forget``.
+"""
+
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from kitchen.caching import KEY_PREFIX
+
+
+def user_cache_timeout() -> int:
+    return getattr(settings, "KITCHEN_USER_CACHE_TIMEOUT", 0)
+
+
+def user_key(user_id) -> str:
+    return f"{KEY_PREFIX}:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        if not user_cache_timeout():
+            return super().get_user(user_id)
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            # inactive or deleted users are not cached; they get None each time
+            if user is not None:
+                cache.set(key, user, user_cache_timeout())
+        return user
+
+
+def forget(*user_ids) -> None:
+    """Drop the cached cooks ``user_ids``; for writes that bypass signals."""
+    cache.delete_many([user_key(user_id) for user_id in user_ids])
+
+
+def end_sessions(user_id) -> int:
+    """
+    Delete the stored sessions of ``user_id``; returns how many. Only the
+    database-backed engines can be searched; with the others the sessions
+    end once the cook can no longer be loaded (inactive or deleted).
+    """
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    if not hasattr(store, "get_model_class"):
+        return 0
+    sessions = store.get_model_class().objects.filter(expire_date__gt=timezone.now())
+    keys = [
+        session.session_key
+        for session in sessions.iterator()
+        if str(session.get_decoded().get(SESSION_KEY)) == str(user_id)
+    ]
+    for key in keys:
+        # through the store, so "cached_db" drops its cached copy too
+        store(key).delete()
+    return len(keys)
+
+
+def forget_user(sender, instance, **kwargs):
+    forget(instance.pk)
+
+
+def connect_signals() -> None:
+    user_model = get_user_model()
+    post_save.connect(forget_user, sender=user_model, dispatch_uid="kitchen-forget-user-save")
+    post_delete.connect(forget_user, sender=user_model, dispatch_uid="kitchen-forget-user-delete")
@@ -0,0 +1,300 @@
+"""
+Synthetic catalog generator and route benchmark runner.
+
+``generate`` fills the database with a deterministic catalog: the same
+sizes and seed always produce the same rows, so runs on different
+releases are comparable. ``run`` requests every GET route of
+``kitchen.urls`` and ``kitchen.api_urls`` with the Django test client and
+records latency, query count, response size and peak Python memory.
+
+Both back the ``generate_data`` and ``run_benchmarks`` commands. The
+benchmark commands clear the cache between measurements, so they run
+inside ``scratch_cache``.
+"""
+
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+
+from kitchen import costing
+from kitchen.models import Dish, DishType, Ingredient
+from kitchen.perf import percentile
+from kitchen.signals import reconcile_dish_counts
+
+ROUTE_MODULES = {"kitchen": "kitchen.urls", "api-v1": "kitchen.api_urls"}
+
+# extra query parameters for routes that need them to do real work
+ROUTE_PARAMS = {
+    "kitchen:cook-autocomplete": {"q": "bench"},
+    "kitchen:ingredient-autocomplete": {"q": "bench"},
+    "api-v1:ingredient-impact": {"ingredient": [1, 2, 3]},
+}
+
+WORDS = (
+    "chicken beef pork salmon tuna tofu potato tomato onion garlic basil "
+    "cheese cream butter lemon honey chili pepper rice noodle mushroom"
+).split()
+
+# recipe quantities, in each ingredient's own unit (kg, l or pieces)
+QUANTITIES = (Decimal("0.05"), Decimal("0.1"), Decimal("0.2"), Decimal("0.25"), Decimal("0.5"), Decimal(1))
+
+
+@contextmanager
+def scratch_cache():
+    """
+    Point the default cache at a private one of the same backend for the
+    block, so that clearing it leaves the sessions, cache generations and
+    dashboard totals of the running site alone. A database cache gets a
+    table of its own, dropped afterwards.
+    """
+    config = dict(settings.CACHES["default"])
+    database = config["BACKEND"].endswith("DatabaseCache")
+    with tempfile.TemporaryDirectory() as directory:
+        if config["BACKEND"].endswith("FileBasedCache"):
+            config["LOCATION"] = directory
+        elif database:
+            config["LOCATION"] = f"{config['LOCATION']}_scratch"
+        else:
+            config["LOCATION"] = f"scratch-{uuid.uuid4().hex}"
+        with override_settings(CACHES={**settings.CACHES, "default": config}):
+            if database:
+                call_command("createcachetable", verbosity=0)
+            try:
+                yield
+            finally:
+                if database:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"DROP TABLE {connection.ops.quote_name(config['LOCATION'])}")
+                else:
+                    cache.clear()
+
+
+@dataclass(frozen=True)
+class CatalogSize:
+    cooks: int = 50
+    dish_types: int = 10
+    ingredients: int = 200
+    dishes: int = 1000
+    # M2M fan-out: related rows per dish
+    cooks_per_dish: int = 2
+    ingredients_per_dish: int = 6
+
+
+def _insert_links(through, column: str, links: list[tuple], batch_size: int, extra: tuple[str, ...] = ()) -> None:
+    """Insert (dish_id, other id, *values of ``extra`` fields) rows into a through table."""
+    for start in range(0, len(links), batch_size):
+        through.objects.bulk_create(
+            [
+                through(dish_id=dish_id, **{column: other}, **dict(zip(extra, values)))
+                for dish_id, other, *values in links[start:start + batch_size]
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def generate(size: CatalogSize, seed: int = 42, prefix: str = "bench", batch_size: int = 2000) -> dict:
+    """Create a catalog of ``size``; returns the number of rows per kind."""
+    rng = random.Random(seed)
+    cook_model = get_user_model()
+    # one unusable password hash shared by every generated cook
+    password = make_password(None)
+
+    cook_ids = [
+        cook.pk
+        for cook in cook_model.objects.bulk_create(
+            (
+                cook_model(
+                    username=f"{prefix}-cook-{i:05d}",
+                    password=password,
+                    years_of_experience=rng.randint(0, 30),
+                )
+                for i in range(size.cooks)
+            ),
+            batch_size=batch_size,
+        )
+    ]
+    dish_type_ids = [
+        dish_type.pk
+        for dish_type in DishType.objects.bulk_create(
+            (DishType(name=f"{prefix} type {i:04d}") for i in range(size.dish_types)), batch_size=batch_size
+        )
+    ]
+    ingredient_ids = [
+        ingredient.pk
+        for ingredient in Ingredient.objects.bulk_create(
+            (
+                Ingredient(
+                    name=f"{prefix} ingredient {i:05d}",
+                    unit=rng.choice(Ingredient.Unit.values),
+                    unit_cost=rng.randint(10, 1000) / 100,
+                )
+                for i in range(size.ingredients)
+            ),
+            batch_size=batch_size,
+        )
+    ]
+    dish_ids = [
+        dish.pk
+        for dish in Dish.objects.bulk_create(
+            (
+                Dish(
+                    name=f"{prefix} dish {i:07d}",
+                    description=" ".join(rng.choices(WORDS, k=10)),
+                    price=rng.randint(100, 5000) / 100,
+                    dish_type_id=rng.choice(dish_type_ids),
+                )
+                for i in range(size.dishes)
+            ),
+            batch_size=batch_size,
+        )
+    ]
+
+    cook_links = []
+    ingredient_links = []
+    for dish_id in dish_ids:
+        for cook_id in rng.sample(cook_ids, min(size.cooks_per_dish, len(cook_ids))):
+            cook_links.append((dish_id, cook_id))
+        for ingredient_id in rng.sample(ingredient_ids, min(size.ingredients_per_dish, len(ingredient_ids))):
+            ingredient_links.append((dish_id, ingredient_id, rng.choice(QUANTITIES)))
+    _insert_links(Dish.cooks.through, "cook_id", cook_links, batch_size)
+    _insert_links(Dish.ingredients.through, "ingredient_id", ingredient_links, batch_size, extra=("quantity",))
+    # bulk inserts send no signals
+    reconcile_dish_counts()
+    costing.reprice()
+
+    return {
+        "cooks": len(cook_ids),
+        "dish_types": len(dish_type_ids),
+        "ingredients": len(ingredient_ids),
+        "dishes": len(dish_ids),
+        "dish_cooks": len(cook_links),
+        "dish_ingredients": len(ingredient_links),
+    }
+
+
+@dataclass
+class RouteResult:
+    route: str
+    url: str
+    status: int
+    p50_ms: float
+    p95_ms: float
+    min_ms: float
+    queries: int
+    bytes: int
+    peak_kib: float
+
+
+def get_routes() -> list[tuple[str, URLPattern]]:
+    routes = []
+    for namespace, module_name in ROUTE_MODULES.items():
+        for pattern in import_module(module_name).urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            # POST-only endpoints (bulk edits), event streams and pages opted out
+            # with ``benchmark = False`` (job progress) have nothing to benchmark
+            view_class = getattr(pattern.callback, "view_class", None)
+            if view_class is not None and (
+                "get" not in view_class.http_method_names
+                or getattr(view_class, "streaming", False)
+                or not getattr(view_class, "benchmark", True)
+            ):
+                continue
+            routes.append((f"{namespace}:{pattern.name}", pattern))
+    return routes
+
+
+def route_url(name: str, pattern: URLPattern) -> str | None:
+    if "pk" not in pattern.pattern.converters:
+        return reverse(name)
+    view_class = pattern.callback.view_class
+    pk = view_class.model._default_manager.order_by("pk").values_list("pk", flat=True).first()
+    return reverse(name, kwargs={"pk": pk}) if pk is not None else None
+
+
+def run(user, repeat: int = 10, cold: bool = False, routes: list[str] | None = None) -> list[RouteResult]:
+    """
+    Request every route ``repeat`` times as ``user``.
+
+    With ``cold`` the cache is cleared before each request, which measures
+    the uncached path of cached pages. Memory is measured on one extra
+    request, so tracing does not skew the timings.
+    """
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(user)
+    results = []
+    for name, pattern in get_routes():
+        if routes and name not in routes:
+            continue
+        url = route_url(name, pattern)
+        if url is None:
+            continue
+        params = ROUTE_PARAMS.get(name, {})
+
+        client.get(url, params)  # warm up url resolution, templates, connections
+        timings = []
+        for _ in range(repeat):
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        if cold:
+            cache.clear()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings.sort()
+        results.append(
+            RouteResult(
+                route=name,
+                url=url,
+                status=response.status_code,
+                p50_ms=round(percentile(timings, 50), 3),
+                p95_ms=round(percentile(timings, 95), 3),
+                min_ms=round(timings[0], 3),
+                queries=len(queries),
+                bytes=len(response.content),
+                peak_kib=round(peak / 1024, 1),
+            )
+        )
+    return results
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Regressions of ``current`` against ``baseline`` (both as saved to JSON)."""
+    previous = {result["route"]: result for result in baseline["results"]}
+    problems = []
+    for result in current["results"]:
+        old = previous.get(result["route"])
+        if old is None:
+            continue
+        if result["queries"] > old["queries"]:
+            problems.append(f"{result['route']}: {old['queries']} -> {result['queries']} queries")
+        if result["p50_ms"] > old["p50_ms"] * tolerance:
+            problems.append(f"{result['route']}: p50 {old['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+    return problems
+
+
+def as_dict(results: list[RouteResult]) -> list[dict]:
+    return [asdict(result) for result in results]
@@ -0,0 +1,29 @@
+"""
+Idempotent creation of the demo superuser.
+
+Runs after ``migrate`` (``post_migrate``) and through the
+``bootstrap_admin`` command, never at import time: ``AppConfig.ready()`` runs
+in every worker and every management command, and a query plus a password
+hash there slows down every cold start.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+def ensure_superuser(username: str, password: str) -> bool:
+    """Create the superuser unless ``username`` exists; returns whether it was created."""
+    User = get_user_model()
+    if User._default_manager.filter(username=username).exists():
+        return False
+    User._default_manager.create_superuser(username=username, password=password)
+    return True
+
+
+def bootstrap_admin(app_config=None, verbosity=1, using="default", **kwargs):
+    """``post_migrate`` receiver creating the configured demo superuser."""
+    if not getattr(settings, "KITCHEN_BOOTSTRAP_ADMIN", False) or using != "default":
+        return
+    username = settings.KITCHEN_ADMIN_USERNAME
+    if ensure_superuser(username, settings.KITCHEN_ADMIN_PASSWORD) and verbosity:
+        print(f"Superuser created: {username}")
@@ -0,0 +1,209 @@
+"""
+Set-based bulk edits of dishes (list page and admin "Bulk edit" action).
+
+Each operation resolves the target dish ids once, then runs one ``UPDATE``
+(or through-table ``INSERT``/``DELETE``) per ``BATCH_SIZE`` dishes inside a
+single transaction. No per-object ``save()`` runs, so no signals fire; the
+operations do the signal receivers' work themselves: touch
+``Dish.updated_at``, recount ``dish_count`` (and ``food_cost`` when
+ingredients change) for the affected rows and, on commit, invalidate the
+view cache generations and the dashboard's latest dishes, and tell live
+displays to reload. With ``KITCHEN_JOBS``, large edits are queued for the
+workers instead (``defer``).
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least, Round
+from django.utils import timezone
+
+from kitchen import caching, costing, counters, jobs, live
+from kitchen.menu_io import batched
+from kitchen.models import Dish, DishType, Ingredient
+from kitchen.signals import count_dishes
+
+BATCH_SIZE = 500
+MAX_PRICE = Decimal("99999.99")
+
+ACTIONS = {
+    "price_percent": "Change prices by %",
+    "price_amount": "Change prices by amount",
+    "price_set": "Set price",
+    "dish_type": "Set dish type",
+    "add_cooks": "Add cooks",
+    "remove_cooks": "Remove cooks",
+    "add_ingredients": "Add ingredients",
+    "remove_ingredients": "Remove ingredients",
+}
+
+# relation -> (through model, column of the other side, counted model)
+RELATIONS = {
+    "cooks": (Dish.cooks.through, "cook_id", get_user_model()),
+    "ingredients": (Dish.ingredients.through, "ingredient_id", Ingredient),
+}
+
+
+def insert_links(through, column: str, links: list[tuple[int, int]]) -> int:
+    """
+    Multi-row insert of (dish_id, ``column``) pairs into an M2M through table.
+
+    Plain tuples through ``executemany`` skip building one model instance
+    per row, which dominates ``bulk_create`` time for through tables.
+    Other columns (a recipe line's quantity and unit) get their defaults.
+    Existing links are skipped; returns the number of rows inserted.
+    """
+    if not links:
+        return 0
+    quote = connection.ops.quote_name
+    others = [
+        field
+        for field in through._meta.concrete_fields
+        if not field.primary_key and field.attname not in ("dish_id", column)
+    ]
+    defaults = tuple(field.get_db_prep_save(field.get_default(), connection) for field in others)
+    columns = ", ".join(quote(name) for name in ("dish_id", column, *(field.column for field in others)))
+    placeholders = ", ".join(["%s"] * (2 + len(others)))
+    sql = (
+        f"INSERT INTO {quote(through._meta.db_table)} ({columns}) "
+        f"VALUES ({placeholders}) ON CONFLICT DO NOTHING"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(*link, *defaults) for link in links])
+        return max(cursor.rowcount, 0)
+
+
+def dish_ids_of(queryset) -> list[int]:
+    return list(queryset.order_by().values_list("pk", flat=True))
+
+
+def _after_change(*models) -> None:
+    labels = [model._meta.label for model in (Dish, *models)]
+    transaction.on_commit(lambda: caching.invalidate(*labels))
+    transaction.on_commit(lambda: cache.delete(counters.LATEST_DISHES_KEY))
+    live.publish_reload("bulk edit")
+
+
+def recount(model, pks) -> None:
+    """Recount ``dish_count`` of the ``model`` rows in ``pks``."""
+    for batch in batched(sorted(set(pks)), BATCH_SIZE):
+        model._default_manager.filter(pk__in=batch).update(dish_count=count_dishes(model))
+
+
+def _update_dishes(dish_ids: list[int], **values) -> int:
+    # callers run _after_change once they are done, so an edit publishes once
+    updated = 0
+    now = timezone.now()
+    for batch in batched(dish_ids, BATCH_SIZE):
+        updated += Dish.objects.filter(pk__in=batch).update(updated_at=now, **values)
+    return updated
+
+
+@transaction.atomic
+def update_dishes(dish_ids: list[int], **values) -> int:
+    updated = _update_dishes(dish_ids, **values)
+    _after_change()
+    return updated
+
+
+def change_prices(dish_ids: list[int], mode: str, amount: Decimal) -> int:
+    """``mode`` is "percent" (+10 = 10% dearer), "amount" (added) or "set"."""
+    if mode == "percent":
+        price = Round(F("price") * Value(Decimal(100) + amount) / Value(Decimal(100)), 2)
+    elif mode == "amount":
+        price = F("price") + Value(amount)
+    elif mode == "set":
+        price = Value(amount)
+    else:
+        raise ValueError(f"Unknown price mode {mode!r}")
+    return update_dishes(dish_ids, price=Least(Greatest(price, Value(Decimal(0))), Value(MAX_PRICE)))
+
+
+@transaction.atomic
+def set_dish_type(dish_ids: list[int], dish_type: DishType) -> int:
+    previous = set()
+    for batch in batched(dish_ids, BATCH_SIZE):
+        previous.update(Dish.objects.filter(pk__in=batch).values_list("dish_type_id", flat=True).distinct())
+    updated = _update_dishes(dish_ids, dish_type=dish_type)
+    recount(DishType, previous | {dish_type.pk})
+    _after_change(DishType)
+    return updated
+
+
+@transaction.atomic
+def add_related(dish_ids: list[int], relation: str, related_ids: list[int]) -> int:
+    through, column, model = RELATIONS[relation]
+    added = 0
+    for batch in batched(dish_ids, BATCH_SIZE):
+        added += insert_links(through, column, [(dish_id, pk) for dish_id in batch for pk in related_ids])
+    _update_dishes(dish_ids)
+    recount(model, related_ids)
+    if model is Ingredient:
+        costing.reprice(dish_ids)
+    _after_change(model)
+    return added
+
+
+@transaction.atomic
+def remove_related(dish_ids: list[int], relation: str, related_ids: list[int]) -> int:
+    through, column, model = RELATIONS[relation]
+    removed = 0
+    for batch in batched(dish_ids, BATCH_SIZE):
+        removed += through.objects.filter(dish_id__in=batch, **{f"{column}__in": related_ids}).delete()[0]
+    _update_dishes(dish_ids)
+    recount(model, related_ids)
+    if model is Ingredient:
+        costing.reprice(dish_ids)
+    _after_change(model)
+    return removed
+
+
+@transaction.atomic
+def recipes_changed(dish_ids: list[int], ingredient_ids) -> None:
+    """Bookkeeping after recipe lines were saved or deleted one by one (the admin's recipe inline)."""
+    _update_dishes(dish_ids)
+    recount(Ingredient, ingredient_ids)
+    costing.reprice(dish_ids)
+    _after_change(Ingredient)
+
+
+def params(data: dict) -> dict:
+    """The cleaned ``DishBulkEditForm`` ``data`` as JSON-safe ``run`` arguments, for deferring as a job."""
+    action = data["action"]
+    if action.startswith("price_"):
+        return {"action": action, "amount": str(data["amount"])}
+    if action == "dish_type":
+        return {"action": action, "dish_type_id": data["dish_type"].pk}
+    relation = action.split("_", 1)[1]
+    return {"action": action, "related_ids": [obj.pk for obj in data[relation]]}
+
+
+def run(dish_ids: list[int], action: str, amount=None, dish_type_id=None, related_ids=()) -> int:
+    """Run one bulk ``action`` on ``dish_ids``; returns the rows changed."""
+    if action.startswith("price_"):
+        return change_prices(dish_ids, action.removeprefix("price_"), Decimal(amount))
+    if action == "dish_type":
+        return set_dish_type(dish_ids, DishType.objects.get(pk=dish_type_id))
+    operation, relation = action.split("_", 1)
+    if operation == "add":
+        return add_related(dish_ids, relation, list(related_ids))
+    return remove_related(dish_ids, relation, list(related_ids))
+
+
+def apply(dish_ids: list[int], data: dict) -> int:
+    """Run the cleaned ``DishBulkEditForm`` ``data`` on ``dish_ids``; returns the rows changed."""
+    return run(dish_ids, **params(data))
+
+
+def defer(dish_ids: list[int], data: dict):
+    """
+    Queue ``data`` on ``dish_ids`` as a job when jobs are enabled and there
+    are more than ``KITCHEN_JOBS_DEFER_OVER`` dishes; returns the job, or
+    ``None`` when the edit should run now.
+    """
+    if not jobs.enabled() or len(dish_ids) <= jobs.defer_over():
+        return None
+    return jobs.enqueue("kitchen.bulk_edit", priority=jobs.INTERACTIVE, dish_ids=dish_ids, **params(data))
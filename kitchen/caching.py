@@ -0,0 +1,194 @@
+"""
+Response and template-fragment caching with signal-driven invalidation.
+
+Every cached entry declares the models it depends on. Each model has a
+generation token in the cache; saving/deleting a row (or changing a dish's
+cooks/ingredients) replaces the generation of that model, which changes the
+key of every entry depending on it, so stale entries are never read again
+and simply expire. Generations only reach other workers through a shared
+cache (``KITCHEN_CACHE_BACKEND`` "file" or "db").
+
+- ``CachedResponseMixin`` caches a view's rendered response. The key covers
+  the full path (query params, page), the user and their CSRF cookie,
+  because pages contain the username and a CSRF token.
+- ``{% cachefragment %}`` (``kitchen_cache`` tag library) caches a part of a
+  template shared by all users.
+
+Hits and misses are counted per kind ("view", "fragment"); see the
+``cache_stats`` management command.
+"""
+
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+
+from kitchen.models import Dish, DishType, Ingredient
+
+KEY_PREFIX = "kitchen:cache"
+STATS_KINDS = ("view", "fragment")
+
+
+def cache_timeout() -> int:
+    return getattr(settings, "KITCHEN_VIEW_CACHE_TIMEOUT", 300)
+
+
+def _generation_key(label: str) -> str:
+    return f"{KEY_PREFIX}:gen:{label.lower()}"
+
+
+def _new_generation() -> str:
+    # a fresh token rather than a counter: two concurrent bumps (cache.incr is
+    # a read-modify-write on the file and database caches) still change it,
+    # and one recreated after eviction never matches an older entry's key
+    return uuid.uuid4().hex[:12]
+
+
+def get_generations(labels) -> str:
+    keys = [_generation_key(label) for label in labels]
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_generation(), None)
+        values.update(cache.get_many(missing))
+    return ".".join(str(values.get(key, "")) for key in keys)
+
+
+def bump_generation(label: str) -> None:
+    cache.set(_generation_key(label), _new_generation(), None)
+
+
+def invalidate(*labels: str) -> None:
+    """Drop every entry depending on ``labels``; for writes that bypass signals."""
+    for label in labels:
+        bump_generation(label)
+
+
+def make_key(kind: str, name: str, labels, *parts) -> str:
+    raw = "|".join([name, get_generations(labels), *map(str, parts)])
+    return f"{KEY_PREFIX}:{kind}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def record(kind: str, hit: bool) -> None:
+    key = f"{KEY_PREFIX}:stats:{kind}:{'hit' if hit else 'miss'}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_stats() -> dict[str, dict[str, int]]:
+    keys = {
+        (kind, outcome): f"{KEY_PREFIX}:stats:{kind}:{outcome}"
+        for kind in STATS_KINDS
+        for outcome in ("hit", "miss")
+    }
+    values = cache.get_many(keys.values())
+    return {
+        kind: {outcome: values.get(keys[(kind, outcome)], 0) for outcome in ("hit", "miss")}
+        for kind in STATS_KINDS
+    }
+
+
+def reset_stats() -> None:
+    cache.delete_many(
+        [f"{KEY_PREFIX}:stats:{kind}:{outcome}" for kind in STATS_KINDS for outcome in ("hit", "miss")]
+    )
+
+
+class CachedResponseMixin:
+    """Cache successful GET responses of a view until a dependency changes."""
+
+    # model labels, e.g. ("kitchen.Dish", "kitchen.DishType")
+    cache_dependencies: tuple[str, ...] = ()
+
+    def get_cache_key(self) -> str:
+        request = self.request
+        return make_key(
+            "view",
+            request.resolver_match.view_name if request.resolver_match else type(self).__name__,
+            self.cache_dependencies,
+            request.get_full_path(),
+            request.user.pk,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        )
+
+    def get(self, request, *args, **kwargs):
+        # pending flash messages are rendered once, never cache them
+        if not cache_timeout() or len(get_messages(request)):
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_cache_key()
+        cached = cache.get(key)
+        record("view", hit=cached is not None)
+        if cached is not None:
+            return _cached_response(cached)
+        return _store_when_rendered(super().get(request, *args, **kwargs), key)
+
+
+class AsyncCachedResponseMixin(CachedResponseMixin):
+    """``CachedResponseMixin`` for views with an ``async def get``."""
+
+    async def get(self, request, *args, **kwargs):
+        if not cache_timeout() or await sync_to_async(lambda: len(get_messages(request)))():
+            return await super().get(request, *args, **kwargs)
+
+        # the generations are read through the sync cache API, which may hit
+        # the database or the disk
+        key = await sync_to_async(self.get_cache_key)()
+        cached = await cache.aget(key)
+        await sync_to_async(record)("view", hit=cached is not None)
+        if cached is not None:
+            return _cached_response(cached)
+        return _store_when_rendered(await super().get(request, *args, **kwargs), key)
+
+
+def _cached_response(cached) -> HttpResponse:
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def _store_when_rendered(response, key: str):
+    def store(rendered):
+        if rendered.status_code == 200:
+            cache.set(key, (rendered.content, rendered["Content-Type"]), cache_timeout())
+
+    if hasattr(response, "add_post_render_callback"):
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+    return response
+
+
+def _bump_on_commit(label: str) -> None:
+    # bumping after commit means a new generation never sees old data
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def _bump_sender(sender, update_fields=None, **kwargs):
+    # logging in only touches last_login, which no page depends on
+    if update_fields == {"last_login"}:
+        return
+    _bump_on_commit(sender._meta.label)
+
+
+def _bump_dishes(sender, action, **kwargs):
+    if action.startswith("post"):
+        _bump_on_commit(Dish._meta.label)
+
+
+def connect_signals() -> None:
+    for model in (Dish, DishType, Ingredient, get_user_model()):
+        uid = model._meta.label_lower
+        post_save.connect(_bump_sender, sender=model, dispatch_uid=f"caching-save-{uid}")
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=f"caching-delete-{uid}")
+    for through in (Dish.cooks.through, Dish.ingredients.through):
+        m2m_changed.connect(_bump_dishes, sender=through, dispatch_uid=f"caching-{through._meta.label_lower}")
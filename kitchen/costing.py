@@ -0,0 +1,135 @@
+"""
+Food cost and margin of dishes.
+
+A dish's ``food_cost`` is the sum over its recipe lines (``DishIngredient``)
+of quantity x unit conversion x the ingredient's ``unit_cost``. Costing the
+menu is one product of the sparse ingredient x dish quantity matrix (the
+through table) with the vector of ingredient costs, and the database
+computes it: a single ``UPDATE`` with a correlated, grouped ``SUM`` per
+batch of dishes, so no dish or recipe line is loaded into Python.
+
+``reprice()`` recosts every dish. The receivers below keep costs current:
+changing an ingredient's cost or unit recosts only the dishes using it, and
+changing a recipe recosts that dish. Writes that bypass signals (bulk edits,
+imports, generated catalogs) call ``reprice`` themselves. Costs are written
+inside the caller's transaction, and the dish cache generation is bumped on
+commit.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+
+from kitchen import caching
+from kitchen.menu_io import batched
+from kitchen.models import Dish, DishIngredient, Ingredient
+
+BATCH_SIZE = 20000
+
+_COST = DecimalField(max_digits=9, decimal_places=2)
+
+
+def line_cost():
+    """Cost of one ``DishIngredient`` row, in the ingredient's currency."""
+    factor = Case(
+        *[
+            When(unit=unit, then=Value(multiplier))
+            for unit, (_to, multiplier) in DishIngredient.CONVERSIONS.items()
+            if multiplier != 1
+        ],
+        default=Value(Decimal(1)),
+    )
+    return F("quantity") * factor * F("ingredient__unit_cost")
+
+
+def food_cost():
+    """Correlated ``SUM`` of the recipe line costs of each outer dish."""
+    totals = (
+        DishIngredient.objects.filter(dish=OuterRef("pk"))
+        .order_by()
+        .values("dish")
+        .annotate(total=Sum(line_cost(), output_field=_COST))
+        .values("total")
+    )
+    return Coalesce(Round(Subquery(totals), 2), Value(Decimal(0)), output_field=_COST)
+
+
+def _after_reprice() -> None:
+    transaction.on_commit(lambda: caching.invalidate(Dish._meta.label))
+
+
+@transaction.atomic
+def reprice(dish_ids=None) -> int:
+    """
+    Recost ``dish_ids``, ``BATCH_SIZE`` dishes per ``UPDATE``, or every dish
+    in one ``UPDATE`` when ``None``; returns the number of dishes written.
+    """
+    if dish_ids is None:
+        updated = Dish.objects.update(food_cost=food_cost())
+    else:
+        updated = 0
+        for batch in batched(sorted(set(dish_ids)), BATCH_SIZE):
+            updated += Dish.objects.filter(pk__in=batch).update(food_cost=food_cost())
+    if updated:
+        _after_reprice()
+    return updated
+
+
+@transaction.atomic
+def reprice_ingredients(ingredient_ids) -> int:
+    """Recost only the dishes using any of ``ingredient_ids``, in one ``UPDATE``."""
+    using = DishIngredient.objects.filter(ingredient_id__in=list(ingredient_ids)).values("dish_id")
+    updated = Dish.objects.filter(pk__in=using).update(food_cost=food_cost())
+    if updated:
+        _after_reprice()
+    return updated
+
+
+def _remember_cost(sender, instance, raw=False, **kwargs):
+    instance._previous_cost = None
+    if not raw and not instance._state.adding:
+        instance._previous_cost = (
+            Ingredient.objects.filter(pk=instance.pk).values_list("unit", "unit_cost").first()
+        )
+
+
+def _reprice_changed_ingredient(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_cost", None)
+    # a new ingredient is in no recipe yet
+    if raw or created or previous is None:
+        return
+    unit, unit_cost = previous
+    if unit != instance.unit or unit_cost != Decimal(instance.unit_cost):
+        reprice_ingredients([instance.pk])
+
+
+def _remember_dishes(sender, instance, **kwargs):
+    # the recipe lines are cascade-deleted without signals
+    instance._repriced_dish_ids = list(instance.dishes.values_list("pk", flat=True))
+
+
+def _reprice_after_delete(sender, instance, **kwargs):
+    reprice(getattr(instance, "_repriced_dish_ids", []))
+
+
+def _reprice_recipe(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        _remember_dishes(sender, instance)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            reprice([instance.pk])
+        elif action == "post_clear":
+            reprice(getattr(instance, "_repriced_dish_ids", []))
+        elif pk_set:
+            reprice(sorted(pk_set))
+
+
+def connect_signals() -> None:
+    pre_save.connect(_remember_cost, sender=Ingredient, dispatch_uid="costing-pre-save")
+    post_save.connect(_reprice_changed_ingredient, sender=Ingredient, dispatch_uid="costing-save")
+    pre_delete.connect(_remember_dishes, sender=Ingredient, dispatch_uid="costing-pre-delete")
+    post_delete.connect(_reprice_after_delete, sender=Ingredient, dispatch_uid="costing-delete")
+    m2m_changed.connect(_reprice_recipe, sender=DishIngredient, dispatch_uid="costing-recipe")
@@ -0,0 +1,126 @@
+"""
+Cached dashboard aggregates.
+
+Per-model totals live in the cache and are adjusted incrementally by
+``post_save``/``post_delete`` (after the transaction commits). The "latest
+dishes" block is cached as a list and dropped whenever a dish, its type or
+its cooks change. Anything that bypasses signals (``bulk_create``,
+``QuerySet.update``/``delete``, raw SQL) can make the totals drift until
+``KITCHEN_COUNTER_TIMEOUT``; run ``python manage.py rebuild_counters`` to
+recompute them at once. Every worker must share the cache
+(``KITCHEN_CACHE_BACKEND``), or each sees only its own writes.
+"""
+
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from kitchen.models import Dish, DishType, Ingredient
+
+KEY_PREFIX = "kitchen:counters"
+LATEST_DISHES_KEY = f"{KEY_PREFIX}:latest-dishes"
+LATEST_DISHES_SIZE = 5
+
+# Context variable name -> counted model
+COUNTED_MODELS = {
+    "num_cooks": get_user_model(),
+    "num_dish_types": DishType,
+    "num_dishes": Dish,
+    "num_ingredients": Ingredient,
+}
+
+
+def _timeout() -> int | None:
+    # a finite timeout bounds drift: ``cache.incr`` is a read-modify-write on
+    # the file and database caches, so concurrent adjustments can be lost
+    return getattr(settings, "KITCHEN_COUNTER_TIMEOUT", 60)
+
+
+def counter_key(model) -> str:
+    return f"{KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def get_totals() -> dict[str, int]:
+    """Return the dashboard totals, counting (and caching) only the missing ones."""
+    keys = {name: counter_key(model) for name, model in COUNTED_MODELS.items()}
+    cached = cache.get_many(keys.values())
+    totals = {}
+    for name, model in COUNTED_MODELS.items():
+        total = cached.get(keys[name])
+        if total is None:
+            total = model.objects.count()
+            cache.set(keys[name], total, _timeout())
+        totals[name] = total
+    return totals
+
+
+async def aget_totals() -> dict[str, int]:
+    """``get_totals`` for async views; missing totals are counted with ``acount``."""
+    keys = {name: counter_key(model) for name, model in COUNTED_MODELS.items()}
+    cached = await cache.aget_many(keys.values())
+    missing = [name for name in COUNTED_MODELS if cached.get(keys[name]) is None]
+    counted = dict(zip(missing, await asyncio.gather(*(COUNTED_MODELS[name].objects.acount() for name in missing))))
+    if counted:
+        await cache.aset_many({keys[name]: total for name, total in counted.items()}, _timeout())
+    return {name: counted[name] if name in counted else cached[keys[name]] for name in COUNTED_MODELS}
+
+
+def get_latest_dishes() -> list[Dish]:
+    dishes = cache.get(LATEST_DISHES_KEY)
+    if dishes is None:
+        dishes = list(
+            Dish.objects.select_related("dish_type")
+            .prefetch_related("cooks")
+            .order_by("-created_at")[:LATEST_DISHES_SIZE]
+        )
+        cache.set(LATEST_DISHES_KEY, dishes, _timeout())
+    return dishes
+
+
+def rebuild() -> dict[str, int]:
+    """Recompute every cached aggregate from the database."""
+    cache.delete(LATEST_DISHES_KEY)
+    totals = {name: model.objects.count() for name, model in COUNTED_MODELS.items()}
+    cache.set_many(
+        {counter_key(COUNTED_MODELS[name]): total for name, total in totals.items()},
+        _timeout(),
+    )
+    return totals
+
+
+def _adjust(model, delta: int) -> None:
+    try:
+        cache.incr(counter_key(model), delta)
+    except ValueError:
+        # Not cached yet (or evicted): the next read counts from the database.
+        pass
+
+
+def _invalidate_latest_dishes(action: str = "post_save", **kwargs) -> None:
+    if action.startswith("post"):
+        transaction.on_commit(lambda: cache.delete(LATEST_DISHES_KEY))
+
+
+def _on_save(sender, created, update_fields=None, **kwargs):
+    if created:
+        transaction.on_commit(lambda: _adjust(sender, 1))
+    # logging in only touches last_login, which the dashboard does not show
+    if sender in (Dish, DishType, get_user_model()) and update_fields != {"last_login"}:
+        _invalidate_latest_dishes()
+
+
+def _on_delete(sender, **kwargs):
+    transaction.on_commit(lambda: _adjust(sender, -1))
+    if sender in (Dish, DishType, get_user_model()):
+        _invalidate_latest_dishes()
+
+
+def connect_signals() -> None:
+    for model in COUNTED_MODELS.values():
+        post_save.connect(_on_save, sender=model, dispatch_uid=f"counters-save-{model._meta.label_lower}")
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f"counters-delete-{model._meta.label_lower}")
+    m2m_changed.connect(_invalidate_latest_dishes, sender=Dish.cooks.through, dispatch_uid="counters-dish-cooks")
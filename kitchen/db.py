@@ -0,0 +1,54 @@
+"""
+Database connection profile.
+
+``KITCHEN_DB_PROFILE`` selects how connections are tuned:
+
+- "tuned" (default): SQLite connections switch to WAL journaling (readers no
+  longer block the writer and vice versa), ``synchronous=NORMAL`` (fsync at
+  checkpoints instead of every commit, still safe in WAL mode), a busy
+  timeout so writers wait for the lock instead of failing with "database is
+  locked", and memory-mapped reads. Postgres connections are health-checked
+  before reuse (see settings).
+- "stock": SQLite defaults (rollback journal, ``synchronous=FULL``).
+
+The SQLite pragmas are applied from the ``connection_created`` signal, so
+they hold for every connection, whichever process or thread opens it. The
+"tuned" profile also starts transactions with ``BEGIN IMMEDIATE`` (see
+``kitchen.db_backends.sqlite3``).
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+PROFILES = ("tuned", "stock")
+
+# per-alias profile overrides, e.g. for db_stress comparing profiles
+profile_overrides: dict[str, str] = {}
+
+
+def get_profile(alias: str = "default") -> str:
+    return profile_overrides.get(alias) or getattr(settings, "KITCHEN_DB_PROFILE", "tuned")
+
+
+def sqlite_pragmas(profile: str) -> dict[str, object]:
+    if profile == "stock":
+        # journal_mode is stored in the database file, so switch it back explicitly
+        return {"journal_mode": "DELETE", "synchronous": "FULL"}
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": getattr(settings, "KITCHEN_SQLITE_BUSY_TIMEOUT", 5000),
+        "mmap_size": getattr(settings, "KITCHEN_SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    }
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or connection.is_in_memory_db():
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in sqlite_pragmas(get_profile(connection.alias)).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+def connect_signals() -> None:
+    connection_created.connect(configure_sqlite, dispatch_uid="kitchen-configure-sqlite")
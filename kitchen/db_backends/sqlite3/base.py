@@ -0,0 +1,21 @@
+from django.db.backends.sqlite3 import base
+
+from kitchen.db import get_profile
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend taking the write lock when a transaction starts.
+
+    A deferred ``BEGIN`` that reads and then writes (every form save) has to
+    upgrade its lock mid-transaction; when another connection wrote in the
+    meantime SQLite fails it at once with "database is locked", whatever the
+    busy timeout. ``BEGIN IMMEDIATE`` waits for the lock up front instead
+    (Django 5.1 offers this as the ``transaction_mode`` option).
+    """
+
+    def _start_transaction_under_autocommit(self):
+        if get_profile(self.alias) == "tuned":
+            self.cursor().execute("BEGIN IMMEDIATE")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,228 @@
+"""
+Chunked deletion of dish types and cooks.
+
+Deleting a ``DishType`` cascades to its dishes and their cook links, recipe
+lines and order items. Deleting a cook removes its dish links and
+unassigns its order items. Django's collector loads every one of those rows,
+sends the per-dish signals and deletes it all in one transaction, which on
+a large catalog outlasts the request and holds the write lock throughout.
+
+``schedule`` instead marks the record ``pending_deletion`` (a cook is also
+deactivated and signed out, so it can neither sign in nor be dispatched
+to) and records a ``Deletion``. After commit, ``run`` removes the dependents
+``KITCHEN_DELETION_BATCH_SIZE`` rows at a time, one short transaction per
+batch. It does the signal receivers' work itself (``dish_count``, touched
+dishes, cache generations) and counts progress on the ``Deletion``. Once
+nothing depends on the record, it goes with a plain ``delete()``.
+
+With ``KITCHEN_JOBS``, ``run`` is queued as a job for ``manage.py
+run_workers``. Otherwise it happens on a background thread when
+``KITCHEN_DELETION_BACKGROUND`` is set, or else in the committing request.
+``python manage.py run_deletions`` picks up deletions a restart interrupted. Each batch
+works out what is left, so a deletion resumes where it stopped.
+"""
+
+import logging
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from kitchen import auth, caching, counters, jobs, live
+from kitchen.bulk import recount
+from kitchen.models import Deletion, Dish, DishIngredient, DishType, Ingredient, OrderItem
+
+logger = logging.getLogger("kitchen.deletion")
+
+
+def batch_size() -> int:
+    return getattr(settings, "KITCHEN_DELETION_BATCH_SIZE", 1000)
+
+
+def _labels() -> list[str]:
+    return [model._meta.label for model in (Dish, DishType, Ingredient, get_user_model())]
+
+
+def _raw_delete(model, pks: list[int]) -> None:
+    # QuerySet.delete() would collect the rows and send per-object signals
+    quote = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({placeholders})",
+            pks,
+        )
+
+
+# dish types
+
+
+def _dish_type_impact(dish_type) -> dict[str, int]:
+    return {
+        "dishes": Dish.objects.filter(dish_type=dish_type).count(),
+        "cook assignments": Dish.cooks.through.objects.filter(dish__dish_type=dish_type).count(),
+        "recipe lines": DishIngredient.objects.filter(dish__dish_type=dish_type).count(),
+        "order items": OrderItem.objects.filter(dish__dish_type=dish_type).count(),
+    }
+
+
+def _dish_type_batch(dish_type, size: int) -> int:
+    """Delete up to ``size`` dishes of ``dish_type`` with what references them."""
+    dish_ids = list(
+        Dish.objects.filter(dish_type=dish_type).order_by("pk").values_list("pk", flat=True)[:size]
+    )
+    if not dish_ids:
+        return 0
+    cook_ids = set(Dish.cooks.through.objects.filter(dish_id__in=dish_ids).values_list("cook_id", flat=True))
+    ingredient_ids = set(DishIngredient.objects.filter(dish_id__in=dish_ids).values_list("ingredient_id", flat=True))
+    # none of these has delete signals, so each is a single DELETE
+    for model in (OrderItem, Dish.cooks.through, DishIngredient):
+        model.objects.filter(dish_id__in=dish_ids).delete()
+    _raw_delete(Dish, dish_ids)
+    recount(get_user_model(), cook_ids)
+    recount(Ingredient, ingredient_ids)
+    recount(DishType, [dish_type.pk])
+    return len(dish_ids)
+
+
+# cooks
+
+
+def _cook_impact(cook) -> dict[str, int]:
+    return {
+        "dish assignments": Dish.cooks.through.objects.filter(cook=cook).count(),
+        "order items to unassign": OrderItem.objects.filter(cook=cook).count(),
+    }
+
+
+def _cook_batch(cook, size: int) -> int:
+    """Remove up to ``size`` dish links of ``cook``, then unassign up to ``size`` order items."""
+    links = list(Dish.cooks.through.objects.filter(cook=cook).order_by("pk").values_list("pk", "dish_id")[:size])
+    if links:
+        Dish.cooks.through.objects.filter(pk__in=[pk for pk, _dish in links]).delete()
+        Dish.objects.filter(pk__in=[dish_id for _pk, dish_id in links]).update(updated_at=timezone.now())
+        recount(get_user_model(), [cook.pk])
+        return len(links)
+    item_ids = list(OrderItem.objects.filter(cook=cook).order_by("pk").values_list("pk", flat=True)[:size])
+    OrderItem.objects.filter(pk__in=item_ids).update(cook=None)
+    return len(item_ids)
+
+
+# model label -> (impact, the impact kinds its batches count, batch)
+PLANS = {
+    "kitchen.DishType": (_dish_type_impact, ("dishes",), _dish_type_batch),
+    "kitchen.Cook": (_cook_impact, ("dish assignments", "order items to unassign"), _cook_batch),
+}
+
+
+def impact(obj) -> dict[str, int]:
+    """What deleting ``obj`` removes, by kind, for the confirmation page."""
+    return PLANS[obj._meta.label][0](obj)
+
+
+def progress_total(obj) -> int:
+    """The number of rows the batches will report for ``obj``."""
+    get_impact, counted, _batch = PLANS[obj._meta.label]
+    found = get_impact(obj)
+    return sum(found[kind] for kind in counted)
+
+
+def _start(deletion_id: int) -> None:
+    if not getattr(settings, "KITCHEN_DELETION_BACKGROUND", True):
+        run(deletion_id)
+        return
+
+    def target():
+        try:
+            run(deletion_id)
+        finally:
+            # the thread's own connection
+            connection.close()
+
+    threading.Thread(target=target, name=f"deletion-{deletion_id}", daemon=True).start()
+
+
+@transaction.atomic
+def schedule(obj, requested_by=None) -> Deletion:
+    """Mark ``obj`` pending and start deleting it once the transaction commits."""
+    model = type(obj)
+    changes = {"pending_deletion": True}
+    if model is get_user_model():
+        changes["is_active"] = False
+    model._default_manager.filter(pk=obj.pk).update(**changes)
+    if model is get_user_model():
+        # update() sends no post_save: drop the cached cook and sign it out
+        transaction.on_commit(lambda: auth.forget(obj.pk))
+        transaction.on_commit(lambda: auth.end_sessions(obj.pk))
+    deletion = Deletion.objects.create(
+        target=obj._meta.label,
+        object_id=obj.pk,
+        object_repr=str(obj)[:255],
+        total=progress_total(obj),
+        requested_by=requested_by if requested_by and requested_by.pk != obj.pk else None,
+    )
+    transaction.on_commit(lambda: caching.invalidate(*_labels()))
+    if jobs.enabled():
+        # queued with the Deletion, so a worker only sees committed ones
+        jobs.enqueue("kitchen.delete", priority=jobs.INTERACTIVE, deletion_id=deletion.pk)
+    else:
+        transaction.on_commit(lambda: _start(deletion.pk))
+    return deletion
+
+
+def _claim(deletion_id: int, resume: bool) -> bool:
+    statuses = [Deletion.Status.PENDING, Deletion.Status.RUNNING] if resume else [Deletion.Status.PENDING]
+    return bool(
+        Deletion.objects.filter(pk=deletion_id, status__in=statuses).update(status=Deletion.Status.RUNNING)
+    )
+
+
+def run(deletion_id: int, resume: bool = False) -> Deletion:
+    """
+    Delete the target of a pending ``Deletion`` batch by batch. With
+    ``resume``, also take over one left running (by a process that stopped).
+    """
+    if not _claim(deletion_id, resume):
+        return Deletion.objects.get(pk=deletion_id)
+    deletion = Deletion.objects.get(pk=deletion_id)
+    model = apps.get_model(deletion.target)
+    batch = PLANS[deletion.target][2]
+    try:
+        obj = model._default_manager.filter(pk=deletion.object_id).first()
+        if obj is not None:
+            while True:
+                with transaction.atomic():
+                    removed = batch(obj, batch_size())
+                    if not removed:
+                        break
+                    Deletion.objects.filter(pk=deletion.pk).update(
+                        removed=F("removed") + removed, updated_at=timezone.now()
+                    )
+                    transaction.on_commit(lambda: caching.invalidate(*_labels()))
+            with transaction.atomic():
+                obj.delete()
+        Deletion.objects.filter(pk=deletion.pk).update(
+            status=Deletion.Status.DONE, finished_at=timezone.now(), updated_at=timezone.now()
+        )
+    except Exception as exc:
+        logger.exception("Deleting %s %s failed", deletion.target, deletion.object_id)
+        Deletion.objects.filter(pk=deletion.pk).update(
+            status=Deletion.Status.FAILED, error=str(exc), finished_at=timezone.now(), updated_at=timezone.now()
+        )
+    finally:
+        # the batches went around the signals
+        caching.invalidate(*_labels())
+        counters.rebuild()
+        live.publish_reload("deletion")
+    deletion.refresh_from_db()
+    return deletion
+
+
+def resume_unfinished() -> list[Deletion]:
+    """Run every pending or interrupted deletion, oldest first, in this thread."""
+    unfinished = Deletion.objects.filter(status__in=[Deletion.Status.PENDING, Deletion.Status.RUNNING])
+    return [run(pk, resume=True) for pk in unfinished.order_by("created_at").values_list("pk", flat=True)]
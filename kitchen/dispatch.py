@@ -0,0 +1,273 @@
+"""
+Routing of order items to cooks.
+
+The dispatcher assigns each queued ``OrderItem`` to the least-loaded cook
+able to make its dish (``Dish.cooks``). It runs in-process and works from
+memory:
+
+- a ticket heap of queued items, highest order priority first, then oldest;
+- a heap of ``(load, cook)`` entries, where load is the quantity of items a
+  cook has assigned and not done. Each load change pushes a new entry and
+  older entries of that cook are skipped when they surface. An item takes
+  the first current entry of an eligible cook and puts back the ones it
+  passed over;
+- an index from dish to eligible cooks, built from the ``Dish.cooks``
+  through table.
+
+Assignments are buffered and written ``FLUSH_SIZE`` rows at a time with
+one ``executemany``. The index and loads are reloaded from the database
+when the cache generations of dishes or cooks change (see
+``kitchen.caching``).
+
+Each process has its own dispatcher. The writes only assign items that are
+still queued, so dispatchers in different processes (the admin hook runs
+in every web worker) never overwrite each other's assignments; an item one
+of them lost comes off its load again. Loads still only balance within one
+process, so for even balancing dispatch from a single one.
+"""
+
+import heapq
+import threading
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from kitchen import caching
+from kitchen.models import Dish, OrderItem
+
+FLUSH_SIZE = 500
+
+
+def _labels() -> tuple[str, ...]:
+    return tuple(model._meta.label for model in (Dish, get_user_model()))
+
+
+@dataclass(order=True)
+class Ticket:
+    sort_key: tuple
+    item_id: int
+    dish_id: int
+    quantity: int
+
+
+class Dispatcher:
+    def __init__(self, generation: str = ""):
+        self.generation = generation
+        self.eligible: dict[int, frozenset[int]] = {}
+        self.load: dict[int, int] = {}
+        self._cooks: list[tuple[int, int]] = []
+        self._tickets: list[Ticket] = []
+        self._queued_ids: set[int] = set()
+        # (item id, cook id, assigned at, quantity) not written yet
+        self._pending: list[tuple] = []
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_database(cls, generation: str = "") -> "Dispatcher":
+        dispatcher = cls(generation)
+        eligible: dict[int, set[int]] = {}
+        links = Dish.cooks.through.objects.values_list("dish_id", "cook_id")
+        for dish_id, cook_id in links.iterator(chunk_size=10000):
+            eligible.setdefault(dish_id, set()).add(cook_id)
+        dispatcher.eligible = {dish_id: frozenset(cook_ids) for dish_id, cook_ids in eligible.items()}
+
+        active = get_user_model().objects.filter(is_active=True).values_list("pk", flat=True)
+        dispatcher.load = dict.fromkeys(active, 0)
+        open_load = (
+            OrderItem.objects.filter(status=OrderItem.Status.ASSIGNED, cook__isnull=False)
+            .order_by()
+            .values_list("cook_id")
+            .annotate(total=Sum("quantity"))
+        )
+        for cook_id, total in open_load:
+            if cook_id in dispatcher.load:
+                dispatcher.load[cook_id] = total
+        dispatcher._cooks = [(load, cook_id) for cook_id, load in dispatcher.load.items()]
+        heapq.heapify(dispatcher._cooks)
+
+        queued = OrderItem.objects.filter(status=OrderItem.Status.QUEUED).values_list(
+            "pk", "dish_id", "quantity", "order__priority", "order__created_at"
+        )
+        for pk, dish_id, quantity, priority, created_at in queued.iterator(chunk_size=10000):
+            dispatcher._push_ticket(pk, dish_id, quantity, priority, created_at)
+        return dispatcher
+
+    # tickets
+
+    def _push_ticket(self, item_id, dish_id, quantity, priority, created_at) -> None:
+        if item_id in self._queued_ids:
+            return
+        self._queued_ids.add(item_id)
+        heapq.heappush(self._tickets, Ticket((-priority, created_at, item_id), item_id, dish_id, quantity))
+
+    def submit(self, items) -> None:
+        """Queue saved ``OrderItem``s (with their ``order``) for dispatch; already queued ones are skipped."""
+        with self.lock:
+            for item in items:
+                self._push_ticket(item.pk, item.dish_id, item.quantity, item.order.priority, item.order.created_at)
+
+    @property
+    def queued(self) -> int:
+        return len(self._tickets)
+
+    # cook loads
+
+    def _set_load(self, cook_id: int, load: int) -> None:
+        self.load[cook_id] = load
+        heapq.heappush(self._cooks, (load, cook_id))
+        # drop the outdated entries once they dominate the heap
+        if len(self._cooks) > 4 * len(self.load) + 64:
+            self._cooks = [(load, cook_id) for cook_id, load in self.load.items()]
+            heapq.heapify(self._cooks)
+
+    def pick_cook(self, dish_id: int) -> int | None:
+        """The least-loaded active cook able to make ``dish_id`` (lowest id on ties)."""
+        eligible = self.eligible.get(dish_id)
+        if not eligible:
+            return None
+        passed_over = []
+        chosen = None
+        while self._cooks:
+            load, cook_id = heapq.heappop(self._cooks)
+            if self.load.get(cook_id) != load:
+                continue  # outdated entry
+            passed_over.append((load, cook_id))
+            if cook_id in eligible:
+                chosen = cook_id
+                break
+        for entry in passed_over:
+            heapq.heappush(self._cooks, entry)
+        return chosen
+
+    def dispatch(self, limit: int | None = None) -> list[tuple[int, int]]:
+        """
+        Assign queued items in priority order; returns ``(item_id, cook_id)``
+        pairs. Items whose dish has no active cook stay queued.
+        """
+        assigned = []
+        waiting = []
+        now = timezone.now()
+        with self.lock:
+            while self._tickets and (limit is None or len(assigned) < limit):
+                ticket = heapq.heappop(self._tickets)
+                cook_id = self.pick_cook(ticket.dish_id)
+                if cook_id is None:
+                    waiting.append(ticket)
+                    continue
+                self._queued_ids.discard(ticket.item_id)
+                self._set_load(cook_id, self.load[cook_id] + ticket.quantity)
+                self._pending.append((ticket.item_id, cook_id, now, ticket.quantity))
+                assigned.append((ticket.item_id, cook_id))
+                if len(self._pending) >= FLUSH_SIZE:
+                    self.flush()
+            for ticket in waiting:
+                heapq.heappush(self._tickets, ticket)
+        return assigned
+
+    def flush(self) -> int:
+        """
+        Write the buffered assignments in one ``executemany``; returns the
+        number of rows written. (``bulk_update`` spends far longer building
+        its ``CASE`` expressions than the database spends running them.)
+        Only items still queued are written.
+        """
+        with self.lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        quote = connection.ops.quote_name
+        assigned_at = OrderItem._meta.get_field("assigned_at")
+        sql = (
+            f"UPDATE {quote(OrderItem._meta.db_table)} SET {quote('cook_id')} = %s, {quote('status')} = %s, "
+            f"{quote('assigned_at')} = %s WHERE {quote('id')} = %s AND {quote('status')} = %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                sql,
+                [
+                    (
+                        cook_id,
+                        OrderItem.Status.ASSIGNED.value,
+                        assigned_at.get_db_prep_value(when, connection),
+                        pk,
+                        OrderItem.Status.QUEUED.value,
+                    )
+                    for pk, cook_id, when, _quantity in pending
+                ],
+            )
+            written = cursor.rowcount
+        if written != len(pending):
+            written = self._release_lost(pending)
+        return written
+
+    def _release_lost(self, pending) -> int:
+        """Take the items another process assigned first off the loads; returns the number written."""
+        rows = OrderItem.objects.filter(pk__in=[entry[0] for entry in pending]).values_list(
+            "pk", "cook_id", "assigned_at"
+        )
+        current = {pk: (cook_id, when) for pk, cook_id, when in rows}
+        written = 0
+        with self.lock:
+            for pk, cook_id, when, quantity in pending:
+                if current.get(pk) == (cook_id, when):
+                    written += 1
+                elif cook_id in self.load:
+                    self._set_load(cook_id, max(self.load[cook_id] - quantity, 0))
+        return written
+
+    def complete(self, item_ids) -> int:
+        """Mark assigned items done and take them off their cooks' loads."""
+        self.flush()
+        items = list(
+            OrderItem.objects.filter(pk__in=item_ids, status=OrderItem.Status.ASSIGNED).values_list(
+                "pk", "cook_id", "quantity"
+            )
+        )
+        OrderItem.objects.filter(pk__in=[pk for pk, _cook, _quantity in items]).update(
+            status=OrderItem.Status.DONE, completed_at=timezone.now()
+        )
+        with self.lock:
+            for _pk, cook_id, quantity in items:
+                if cook_id in self.load:
+                    self._set_load(cook_id, max(self.load[cook_id] - quantity, 0))
+        return len(items)
+
+
+_dispatcher: Dispatcher | None = None
+_lock = threading.Lock()
+
+
+def get_dispatcher() -> Dispatcher:
+    global _dispatcher
+    generation = caching.get_generations(_labels())
+    dispatcher = _dispatcher
+    if dispatcher is not None and dispatcher.generation == generation:
+        return dispatcher
+    with _lock:
+        if _dispatcher is None or _dispatcher.generation != generation:
+            if _dispatcher is not None:
+                # keep what was assigned before the reload
+                _dispatcher.flush()
+            _dispatcher = Dispatcher.from_database(generation)
+        return _dispatcher
+
+
+def reset() -> None:
+    global _dispatcher
+    with _lock:
+        if _dispatcher is not None:
+            _dispatcher.flush()
+        _dispatcher = None
+
+
+def dispatch_order(order) -> list[tuple[int, int]]:
+    """Queue the queued items of a saved ``order``, dispatch everything queued and write the assignments."""
+    dispatcher = get_dispatcher()
+    # saving an order again must not resubmit assigned or done items
+    dispatcher.submit(order.items.filter(status=OrderItem.Status.QUEUED).select_related("order"))
+    assigned = dispatcher.dispatch()
+    dispatcher.flush()
+    return assigned
@@ -0,0 +1,167 @@
+"""
+Faceted filtering for the dish list.
+
+Filters (``DishFacetForm``): dish types (any of), a price range, and cooks
+and ingredients, each of which can be required (all of) or excluded (none
+of). ``Facets`` counts the dishes per facet value for the sidebar, for all
+facets in one ``UNION ALL`` of grouped queries. The dish type and price
+facets are counted without their own filter, so the other choices stay
+visible while one is selected, and excluded cooks/ingredients are counted
+as if they were not excluded. The query runs when the template first reads
+a facet, which also keeps it out of async views' event loop.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import cached_property
+
+from django.db.models import Case, CharField, Count, Exists, F, IntegerField, OuterRef, Value, When
+
+from kitchen.models import Dish
+
+# (label, min_price, max_price); both bounds inclusive, prices have two decimals
+PRICE_BUCKETS = [
+    ("Under $10", None, Decimal("9.99")),
+    ("$10 – $19.99", Decimal("10"), Decimal("19.99")),
+    ("$20 – $49.99", Decimal("20"), Decimal("49.99")),
+    ("$50 and up", Decimal("50"), None),
+]
+
+# facet (also the "with" parameter; "without" is not_<facet>) -> (M2M field, label field)
+RELATION_FACETS = {
+    "cook": ("cooks", "username"),
+    "ingredient": ("ingredients", "name"),
+}
+
+FACET_SIZE = 12
+
+
+def filter_dishes(queryset, data: dict, skip: tuple[str, ...] = ()):
+    """Apply the cleaned ``DishFacetForm`` data, except the fields in ``skip``."""
+    if data.get("dish_type") and "dish_type" not in skip:
+        queryset = queryset.filter(dish_type_id__in=data["dish_type"])
+    if "price" not in skip:
+        if data.get("min_price") is not None:
+            queryset = queryset.filter(price__gte=data["min_price"])
+        if data.get("max_price") is not None:
+            queryset = queryset.filter(price__lte=data["max_price"])
+    for facet, (relation, _label) in RELATION_FACETS.items():
+        through = Dish._meta.get_field(relation).remote_field.through
+        column = f"{facet}_id"
+        # EXISTS per required value instead of joins, which would repeat dishes
+        if facet not in skip:
+            for value in data.get(facet) or ():
+                queryset = queryset.filter(
+                    Exists(through.objects.filter(dish_id=OuterRef("pk"), **{column: value}))
+                )
+        excluded = data.get(f"not_{facet}")
+        if excluded and f"not_{facet}" not in skip:
+            queryset = queryset.exclude(
+                Exists(through.objects.filter(dish_id=OuterRef("pk"), **{f"{column}__in": excluded}))
+            )
+    return queryset
+
+
+@dataclass
+class FacetValue:
+    value: int
+    label: str
+    count: int
+    selected: bool = False
+    excluded: bool = False
+    query: str = ""
+
+
+class Facets:
+    """Per-value dish counts of ``queryset`` (the list before facet filters)."""
+
+    def __init__(self, queryset, data: dict, params):
+        self.queryset = queryset.order_by()
+        self.data = data
+        # current query string (QueryDict), for the price range links
+        self.params = params
+
+    def _grouped(self, skip: tuple[str, ...], facet: str, value, label):
+        # grouped straight off the list's queryset: search backends add raw SQL
+        # naming the dish table, which would break inside a pk__in subquery
+        return (
+            filter_dishes(self.queryset, self.data, skip)
+            .values(facet=Value(facet), value=value, label=label)
+            .annotate(n=Count("*"))
+            .values_list("facet", "value", "label", "n")
+        )
+
+    @cached_property
+    def counts(self) -> dict[str, list[tuple[int, str, int]]]:
+        bucket = Case(
+            *[
+                When(**{"price__lte": high} if high is not None else {"price__gte": low}, then=Value(index))
+                for index, (_label, low, high) in enumerate(PRICE_BUCKETS)
+            ],
+            output_field=IntegerField(),
+        )
+        parts = [
+            self._grouped(("dish_type",), "dish_type", F("dish_type_id"), F("dish_type__name")),
+            self._grouped(("price",), "price", bucket, Value("", output_field=CharField())),
+        ]
+        for facet, (relation, label) in RELATION_FACETS.items():
+            # counted without the exclusions, so excluded values show what they would bring back
+            parts.append(self._grouped((f"not_{facet}",), facet, F(relation), F(f"{relation}__{label}")))
+
+        counts: dict[str, list] = {facet: [] for facet in ("dish_type", "price", *RELATION_FACETS)}
+        for facet, value, label, n in parts[0].union(*parts[1:], all=True):
+            # the relations are outer joins: dishes without cooks/ingredients group under NULL
+            if value is not None:
+                counts[facet].append((value, label, n))
+        return counts
+
+    def _values(self, facet: str, required: str, excluded: str | None = None) -> list[FacetValue]:
+        chosen = set(self.data.get(required) or ())
+        left_out = set(self.data.get(excluded) or ()) if excluded else set()
+        values = [
+            FacetValue(value, label, n, selected=value in chosen, excluded=value in left_out)
+            for value, label, n in self.counts[facet]
+        ]
+        values.sort(key=lambda item: (-item.count, item.label))
+        # chosen values stay visible even when they fall outside the top
+        return values[:FACET_SIZE] + [item for item in values[FACET_SIZE:] if item.selected or item.excluded]
+
+    @property
+    def dish_types(self) -> list[FacetValue]:
+        return self._values("dish_type", "dish_type")
+
+    @property
+    def cooks(self) -> list[FacetValue]:
+        return self._values("cook", "cook", "not_cook")
+
+    @property
+    def ingredients(self) -> list[FacetValue]:
+        return self._values("ingredient", "ingredient", "not_ingredient")
+
+    @property
+    def relations(self) -> list[tuple[str, str, list[FacetValue]]]:
+        """(title, parameter, values) of the facets offering "with" and "without"."""
+        return [("Cooks", "cook", self.cooks), ("Ingredients", "ingredient", self.ingredients)]
+
+    @property
+    def prices(self) -> list[FacetValue]:
+        counts = {value: n for value, _label, n in self.counts["price"]}
+        values = []
+        for index, (label, low, high) in enumerate(PRICE_BUCKETS):
+            params = self.params.copy()
+            for name in ("page", "cursor", "min_price", "max_price"):
+                params.pop(name, None)
+            if low is not None:
+                params["min_price"] = str(low)
+            if high is not None:
+                params["max_price"] = str(high)
+            values.append(
+                FacetValue(
+                    index,
+                    label,
+                    counts.get(index, 0),
+                    selected=self.data.get("min_price") == low and self.data.get("max_price") == high,
+                    query=params.urlencode(),
+                )
+            )
+        return values
@@ -1,7 +1,10 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 
+from kitchen import bulk
 from kitchen.models import Dish, DishType, Ingredient
 
 
@@ -20,6 +23,48 @@ def _bootstrapify_form_fields(form: forms.BaseForm) -> None:
             widget.attrs["class"] = (classes + " form-control").strip()
 
 
+class AutocompleteSelectMultiple(forms.SelectMultiple):
+    """
+    Multi-select that renders only the selected options.
+
+    The remaining choices are fetched on demand from the JSON endpoint named
+    by ``url_name`` (see ``AutocompleteView``), so the page size does not
+    grow with the number of cooks/ingredients in the database.
+    """
+
+    template_name = "django/forms/widgets/select.html"
+
+    class Media:
+        css = {"all": ("css/autocomplete.css",)}
+        js = ("js/autocomplete.js",)
+
+    def __init__(self, url_name: str, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def get_context(self, name, value, attrs):
+        attrs = {**(attrs or {}), "data-autocomplete-url": reverse(self.url_name)}
+        return super().get_context(name, value, attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        # re-rendering an invalid form passes the raw POST values back
+        pk_field = self.choices.queryset.model._meta.pk
+        selected = []
+        for raw in value:
+            try:
+                pk = pk_field.to_python(raw)
+            except (ValidationError, ValueError):
+                continue
+            if pk is not None:
+                selected.append(pk)
+        queryset = self.choices.queryset.filter(pk__in=selected) if selected else self.choices.queryset.none()
+        options = [
+            self.create_option(name, str(obj.pk), str(obj), True, index, attrs=attrs)
+            for index, obj in enumerate(queryset)
+        ]
+        return [(None, options, 0)] if options else []
+
+
 class CookCreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = get_user_model()
@@ -60,7 +105,7 @@ class DishTypeForm(forms.ModelForm):
 class IngredientForm(forms.ModelForm):
     class Meta:
         model = Ingredient
-        fields = ("name",)
+        fields = ("name", "unit", "unit_cost")
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -73,12 +118,14 @@ class DishForm(forms.ModelForm):
         fields = ("name", "dish_type", "description", "price", "cooks", "ingredients")
         widgets = {
             "description": forms.Textarea(attrs={"rows": 3}),
-            "cooks": forms.CheckboxSelectMultiple,
-            "ingredients": forms.CheckboxSelectMultiple,
+            "cooks": AutocompleteSelectMultiple("kitchen:cook-autocomplete"),
+            "ingredients": AutocompleteSelectMultiple("kitchen:ingredient-autocomplete"),
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # no new dishes for a type that is being deleted
+        self.fields["dish_type"].queryset = DishType.objects.filter(pending_deletion=False)
         _bootstrapify_form_fields(self)
 
 
@@ -89,3 +136,93 @@ class SearchForm(forms.Form):
         super().__init__(*args, **kwargs)
         _bootstrapify_form_fields(self)
         self.fields["q"].widget.attrs.update({"placeholder": "Search..."})
+
+
+class IdListField(forms.Field):
+    """Repeated query parameter of integer ids (``?cook=1&cook=4``)."""
+
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value) -> list[int]:
+        if not value:
+            return []
+        try:
+            return sorted({int(item) for item in value})
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Enter a list of ids.", code="invalid_list")
+
+
+class DishFacetForm(forms.Form):
+    """Dish list filters; see ``kitchen.facets``."""
+
+    dish_type = IdListField(required=False)
+    min_price = forms.DecimalField(min_value=0, decimal_places=2, required=False, label="Min. price")
+    max_price = forms.DecimalField(min_value=0, decimal_places=2, required=False, label="Max. price")
+    cook = IdListField(required=False)
+    not_cook = IdListField(required=False)
+    ingredient = IdListField(required=False)
+    not_ingredient = IdListField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _bootstrapify_form_fields(self)
+
+
+class DishCountFilterForm(forms.Form):
+    SORT_CHOICES = [("", "Default order"), ("-dish_count", "Most dishes"), ("dish_count", "Fewest dishes")]
+
+    sort = forms.ChoiceField(choices=SORT_CHOICES, required=False, label="Sort")
+    min_dishes = forms.IntegerField(min_value=0, required=False, label="Min. dishes")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _bootstrapify_form_fields(self)
+
+
+class DishBulkEditForm(forms.Form):
+    """One bulk operation (``kitchen.bulk``) with the parameter it needs."""
+
+    action = forms.ChoiceField(choices=list(bulk.ACTIONS.items()), label="Action")
+    amount = forms.DecimalField(
+        max_digits=7, decimal_places=2, required=False, label="Amount", help_text="Percent, $ change or new price."
+    )
+    dish_type = forms.ModelChoiceField(
+        queryset=DishType.objects.filter(pending_deletion=False), required=False, label="Dish type"
+    )
+    cooks = forms.ModelMultipleChoiceField(
+        queryset=get_user_model().objects.all(),
+        required=False,
+        widget=AutocompleteSelectMultiple("kitchen:cook-autocomplete"),
+    )
+    ingredients = forms.ModelMultipleChoiceField(
+        queryset=Ingredient.objects.all(),
+        required=False,
+        widget=AutocompleteSelectMultiple("kitchen:ingredient-autocomplete"),
+    )
+
+    # action -> the field it needs
+    required_fields = {
+        "price_percent": "amount",
+        "price_amount": "amount",
+        "price_set": "amount",
+        "dish_type": "dish_type",
+        "add_cooks": "cooks",
+        "remove_cooks": "cooks",
+        "add_ingredients": "ingredients",
+        "remove_ingredients": "ingredients",
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _bootstrapify_form_fields(self)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        field = self.required_fields.get(cleaned_data.get("action"))
+        value = cleaned_data.get(field)
+        # an amount of 0 is valid, an empty cook/ingredient selection is not
+        if field and not self.has_error(field) and (value is None or (field != "amount" and not value)):
+            self.add_error(field, "Required for this action.")
+        if cleaned_data.get("action") == "price_set" and (cleaned_data.get("amount") or 0) < 0:
+            self.add_error("amount", "A price cannot be negative.")
+        return cleaned_data
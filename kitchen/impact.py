@@ -0,0 +1,198 @@
+"""
+Ingredient impact: every dish using any (or all) of a set of ingredients,
+grouped by dish type and by cook - for stock-outs and allergen recalls.
+
+Lookups are served from an in-memory inverted index (ingredient id -> dish
+ids) built from the ``Dish.ingredients`` through table, plus the dish ->
+type/cooks maps needed for grouping. The index is rebuilt lazily on the
+next lookup after:
+
+- ``m2m_changed`` on a dish's ingredients or cooks in this process (once
+  the transaction commits), and
+- a change of the index version. With a cache every worker shares
+  (``KITCHEN_SHARED_CACHE``), that is the cache generations of the models
+  involved (see ``kitchen.caching``), which covers other processes and bulk
+  writes that call ``caching.invalidate``. With a per-process cache the
+  generations never see other workers' writes, so the version is read from
+  the database instead: row counts and latest ``updated_at`` of the models,
+  and row counts and highest ids of the through tables (ids are never
+  reused), in one query per lookup.
+
+Each worker process holds its own copy of the index.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed
+
+from kitchen import caching
+from kitchen.models import Dish, DishType, Ingredient
+
+MATCH_MODES = ("any", "all")
+
+
+def _labels() -> tuple[str, ...]:
+    return tuple(model._meta.label for model in (Dish, DishType, Ingredient, get_user_model()))
+
+
+@dataclass
+class ImpactIndex:
+    generation: str
+    dishes_by_ingredient: dict[int, frozenset[int]]
+    dish_names: dict[int, str]
+    dish_types: dict[int, int]
+    dish_cooks: dict[int, tuple[int, ...]]
+    type_names: dict[int, str]
+    cook_names: dict[int, str]
+    ingredient_names: dict[int, str]
+    build_ms: float = field(default=0.0)
+
+    def find(self, ingredient_ids, match: str = "any") -> set[int]:
+        postings = [self.dishes_by_ingredient.get(pk, frozenset()) for pk in set(ingredient_ids)]
+        if not postings:
+            return set()
+        if match == "all":
+            # intersect from the rarest ingredient up
+            postings.sort(key=len)
+            return set(postings[0]).intersection(*postings[1:])
+        return set().union(*postings)
+
+
+def build_index(generation: str = "") -> ImpactIndex:
+    started = time.perf_counter()
+    # one transaction, so databases that give it a single snapshot (SQLite,
+    # repeatable read) see one state of the catalog across the queries
+    with transaction.atomic():
+        postings: dict[int, set[int]] = {}
+        links = Dish.ingredients.through.objects.values_list("ingredient_id", "dish_id")
+        for ingredient_id, dish_id in links.iterator(chunk_size=10000):
+            postings.setdefault(ingredient_id, set()).add(dish_id)
+
+        dish_names, dish_types = {}, {}
+        dishes = Dish.objects.order_by().values_list("pk", "name", "dish_type_id")
+        for pk, name, dish_type_id in dishes.iterator(chunk_size=10000):
+            dish_names[pk] = name
+            dish_types[pk] = dish_type_id
+
+        dish_cooks: dict[int, list[int]] = {}
+        cook_links = Dish.cooks.through.objects.values_list("dish_id", "cook_id")
+        for dish_id, cook_id in cook_links.iterator(chunk_size=10000):
+            dish_cooks.setdefault(dish_id, []).append(cook_id)
+
+        type_names = dict(DishType.objects.order_by().values_list("pk", "name"))
+        cook_names = dict(get_user_model().objects.order_by().values_list("pk", "username"))
+        ingredient_names = dict(Ingredient.objects.order_by().values_list("pk", "name"))
+
+    # under read committed a dish deleted between the queries can still have
+    # links; keep only dishes that were loaded
+    dishes_by_ingredient = {}
+    for pk, dish_ids in postings.items():
+        if dish_ids := frozenset(dish_ids & dish_names.keys()):
+            dishes_by_ingredient[pk] = dish_ids
+    return ImpactIndex(
+        generation=generation,
+        dishes_by_ingredient=dishes_by_ingredient,
+        dish_names=dish_names,
+        dish_types=dish_types,
+        dish_cooks={pk: tuple(cook_ids) for pk, cook_ids in dish_cooks.items() if pk in dish_names},
+        type_names=type_names,
+        cook_names=cook_names,
+        ingredient_names=ingredient_names,
+        build_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+_index: ImpactIndex | None = None
+_lock = threading.Lock()
+
+
+def _database_version() -> str:
+    quote = connection.ops.quote_name
+    columns = []
+    for model in (Dish, DishType, Ingredient, get_user_model()):
+        table = quote(model._meta.db_table)
+        columns += [f"(SELECT COUNT(*) FROM {table})", f"(SELECT MAX({quote('updated_at')}) FROM {table})"]
+    for through in (Dish.ingredients.through, Dish.cooks.through):
+        table = quote(through._meta.db_table)
+        columns += [f"(SELECT COUNT(*) FROM {table})", f"(SELECT MAX({quote(through._meta.pk.column)}) FROM {table})"]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT " + ", ".join(columns))
+        return "db:" + "|".join(map(str, cursor.fetchone()))
+
+
+def _version() -> str:
+    if getattr(settings, "KITCHEN_SHARED_CACHE", False):
+        return caching.get_generations(_labels())
+    return _database_version()
+
+
+def get_index() -> ImpactIndex:
+    global _index
+    generation = _version()
+    index = _index
+    if index is not None and index.generation == generation:
+        return index
+    with _lock:
+        # another thread may have rebuilt it while we waited
+        if _index is None or _index.generation != generation:
+            _index = build_index(generation)
+        return _index
+
+
+def invalidate() -> None:
+    global _index
+    _index = None
+
+
+def _group(index: ImpactIndex, dish_ids, key_of, names: dict[int, str]) -> list[dict]:
+    groups: dict[int | None, list[int]] = {}
+    for dish_id in dish_ids:
+        for key in key_of(dish_id):
+            groups.setdefault(key, []).append(dish_id)
+    return [
+        {
+            "id": key,
+            "name": names.get(key) if key is not None else None,
+            "dishes": sorted(
+                ({"id": pk, "name": index.dish_names[pk]} for pk in members), key=lambda dish: dish["name"]
+            ),
+        }
+        for key, members in sorted(groups.items(), key=lambda item: (item[0] is None, names.get(item[0], "")))
+    ]
+
+
+def impact(ingredient_ids, match: str = "any") -> dict:
+    """Dishes using any/all of ``ingredient_ids``, grouped by dish type and by cook."""
+    if match not in MATCH_MODES:
+        raise ValueError(f"match must be one of {', '.join(MATCH_MODES)}")
+    index = get_index()
+    requested = sorted(set(ingredient_ids))
+    known = [pk for pk in requested if pk in index.ingredient_names]
+    dish_ids = index.find(requested, match)
+    return {
+        "match": match,
+        "ingredients": [{"id": pk, "name": index.ingredient_names[pk]} for pk in known],
+        "unknown_ingredients": [pk for pk in requested if pk not in index.ingredient_names],
+        "dish_count": len(dish_ids),
+        "by_dish_type": _group(index, dish_ids, lambda pk: (index.dish_types[pk],), index.type_names),
+        # dishes without cooks are listed under a null cook
+        "by_cook": _group(index, dish_ids, lambda pk: index.dish_cooks.get(pk) or (None,), index.cook_names),
+    }
+
+
+def _invalidate_on_change(sender, action, **kwargs):
+    # after commit, so a rolled back change is never indexed
+    if action.startswith("post"):
+        transaction.on_commit(invalidate)
+
+
+def connect_signals() -> None:
+    for through in (Dish.ingredients.through, Dish.cooks.through):
+        m2m_changed.connect(
+            _invalidate_on_change, sender=through, dispatch_uid=f"impact-{through._meta.label_lower}"
+        )
@@ -0,0 +1,288 @@
+"""
+A job queue in the application database.
+
+Tasks are plain functions registered under a name (see ``kitchen.tasks``).
+``enqueue`` stores a ``Job`` row in the caller's transaction, so a job is
+queued exactly when the work that asked for it commits, and no broker is
+needed.
+
+``manage.py run_workers`` runs a pool of threads or processes. Each worker
+claims the next due job (highest ``priority``, then oldest ``run_after``)
+with a conditional ``UPDATE ... WHERE status = 'queued'``, which works on
+any backend; only one worker's update matches. The worker then calls the
+task with the stored keyword arguments and records the result. A task
+that raises is retried after ``RETRY_DELAY * 2 ** (attempt - 1)`` seconds,
+up to ``max_attempts`` attempts. After that the job is marked failed with
+the error. While a job runs, a heartbeat thread of its worker refreshes
+its ``updated_at``; a running job without a heartbeat for
+``KITCHEN_JOB_TIMEOUT`` seconds (its worker died) is queued again, or
+failed once out of attempts; workers look for such jobs every
+heartbeat interval. The outcome of a job is only recorded while its
+worker still owns it.
+
+``KITCHEN_JOBS`` turns deferring on for the heavy operations that support
+it: large bulk edits and chunked deletions. With it off they run in the
+request (or, for deletions, on a thread of the web process) as before, so
+only turn it on where ``run_workers`` runs. Job status, attempts and errors
+are in the admin.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, connections
+from django.db.models import F
+from django.utils import timezone
+
+from kitchen.models import Job
+
+logger = logging.getLogger("kitchen.jobs")
+
+MAX_ATTEMPTS = 3
+# priority of work a user is waiting for, ahead of maintenance jobs (0)
+INTERACTIVE = 10
+RETRY_DELAY = 10
+# due jobs a worker tries to claim per query, in case others win some
+CLAIM_CANDIDATES = 5
+
+TASKS: dict = {}
+
+
+def register(name: str, func) -> None:
+    """Make ``func`` runnable as the task ``name``."""
+    TASKS[name] = func
+
+
+def enabled() -> bool:
+    return getattr(settings, "KITCHEN_JOBS", False)
+
+
+def defer_over() -> int:
+    """Bulk edits of more dishes than this are deferred when jobs are enabled."""
+    return getattr(settings, "KITCHEN_JOBS_DEFER_OVER", 500)
+
+
+def timeout() -> int:
+    return getattr(settings, "KITCHEN_JOB_TIMEOUT", 600)
+
+
+def enqueue(name: str, *, priority: int = 0, max_attempts: int = MAX_ATTEMPTS, delay: float = 0, **kwargs) -> Job:
+    """Queue the task ``name`` with JSON-serializable ``kwargs``, in the current transaction."""
+    if name not in TASKS:
+        raise ValueError(f"Unknown task {name!r}")
+    return Job.objects.create(
+        name=name,
+        kwargs=kwargs,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim(worker: str) -> Job | None:
+    """Take the next due job for ``worker``, or ``None`` when nothing is due."""
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.Status.QUEUED, run_after__lte=now)
+        .order_by("-priority", "run_after", "pk")
+        .values_list("pk", flat=True)[:CLAIM_CANDIDATES]
+    )
+    for pk in list(candidates):
+        claimed = Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING, worker=worker, started_at=now, attempts=F("attempts") + 1, updated_at=now
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def heartbeat_interval() -> float:
+    return timeout() / 4
+
+
+def _finish(job: Job, **changes) -> bool:
+    """Record the outcome of ``job`` unless another worker took it over."""
+    changes["updated_at"] = timezone.now()
+    owned = Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, worker=job.worker).update(**changes)
+    if not owned:
+        logger.warning("Job %s was taken over by another worker; not recording its outcome", job)
+    for name, value in changes.items():
+        setattr(job, name, value)
+    return bool(owned)
+
+
+def execute(job: Job) -> Job:
+    """Run a claimed ``job`` and record how it went."""
+    try:
+        result = TASKS[job.name](**job.kwargs)
+    except Exception as exc:
+        logger.warning("Job %s failed (attempt %s of %s)", job, job.attempts, job.max_attempts, exc_info=True)
+        error = "".join(traceback.format_exception_only(exc)).strip()
+        if job.attempts < job.max_attempts:
+            delay = timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+            _finish(job, status=Job.Status.QUEUED, error=error, run_after=timezone.now() + delay)
+        else:
+            _finish(job, status=Job.Status.FAILED, error=error, finished_at=timezone.now())
+        return job
+    _finish(job, status=Job.Status.DONE, result=result, finished_at=timezone.now())
+    return job
+
+
+class Heartbeat(threading.Thread):
+    """Refreshes ``updated_at`` of a running job every ``heartbeat_interval()`` seconds."""
+
+    def __init__(self, job: Job):
+        super().__init__(name=f"heartbeat-{job.pk}", daemon=True)
+        self.job = job
+        self.done = threading.Event()
+
+    def beat(self) -> bool:
+        """Refresh the heartbeat; ``False`` once the job is no longer this worker's."""
+        return bool(
+            Job.objects.filter(pk=self.job.pk, status=Job.Status.RUNNING, worker=self.job.worker).update(
+                updated_at=timezone.now()
+            )
+        )
+
+    def run(self):
+        try:
+            while not self.done.wait(heartbeat_interval()):
+                try:
+                    self.beat()
+                except DatabaseError:
+                    # e.g. SQLite locked by the task's own write; try again next beat
+                    logger.debug("Heartbeat of job %s failed", self.job, exc_info=True)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+        self.join()
+
+
+def requeue_stale() -> int:
+    """
+    Queue again the jobs whose worker stopped beating while running them.
+
+    A job that has used up its attempts is marked failed instead, so one
+    that keeps killing its worker is not picked up forever. Returns the
+    number of jobs recovered either way.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.Status.RUNNING, updated_at__lt=now - timedelta(seconds=timeout()))
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.Status.FAILED,
+        worker="",
+        error="Worker stopped while running the job",
+        finished_at=now,
+        updated_at=now,
+    )
+    if failed:
+        logger.warning("Marked %s abandoned job(s) out of attempts as failed", failed)
+    return failed + stale.update(status=Job.Status.QUEUED, worker="", updated_at=now)
+
+
+class Worker:
+    def __init__(self, name: str, poll: float = 1.0, stop: threading.Event | None = None):
+        self.name = name
+        self.poll = poll
+        self.stop = stop or threading.Event()
+        self.processed = 0
+        self.next_requeue = 0.0
+
+    def requeue_stale(self) -> None:
+        # jobs can be abandoned while the pool runs (a process killed by the
+        # OOM killer), so look for them once per heartbeat interval
+        if time.monotonic() >= self.next_requeue:
+            requeue_stale()
+            self.next_requeue = time.monotonic() + heartbeat_interval()
+
+    def run(self, burst: bool = False) -> int:
+        """Run jobs until stopped (or, with ``burst``, until none is due); returns the number run."""
+        while not self.stop.is_set():
+            close_old_connections()
+            self.requeue_stale()
+            job = claim(self.name)
+            if job is None:
+                if burst:
+                    break
+                self.stop.wait(self.poll)
+                continue
+            with Heartbeat(job):
+                execute(job)
+            self.processed += 1
+        return self.processed
+
+
+def _worker_name(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def run_threads(workers: int, poll: float = 1.0, burst: bool = False, stop: threading.Event | None = None) -> int:
+    """Run ``workers`` worker threads; one worker runs in the calling thread."""
+    stop = stop or threading.Event()
+    if workers == 1:
+        return Worker(_worker_name(0), poll, stop).run(burst)
+    pool = [Worker(_worker_name(index), poll, stop) for index in range(workers)]
+
+    def target(worker):
+        try:
+            worker.run(burst)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=target, args=(worker,), name=worker.name) for worker in pool]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        # let the running jobs finish
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return sum(worker.processed for worker in pool)
+
+
+def _process_main(threads: int, poll: float, burst: bool) -> None:
+    import django
+
+    django.setup()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    # the parent handles Ctrl+C and stops the children with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_threads(threads, poll, burst, stop)
+
+
+def run_processes(processes: int, threads: int = 1, poll: float = 1.0, burst: bool = False) -> None:
+    """Run ``processes`` worker processes of ``threads`` workers each."""
+    # children must not share the parent's database connections
+    connections.close_all()
+    children = [
+        multiprocessing.Process(target=_process_main, args=(threads, poll, burst), name=f"worker-{index}")
+        for index in range(processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
@@ -0,0 +1,220 @@
+"""
+Live change events for kitchen displays (Server-Sent Events).
+
+Saving or deleting a dish, cook, ingredient or dish type, and changing a
+dish's cooks or ingredients, publishes an event to the in-process ``hub``
+once the transaction commits. Bulk writes that bypass signals publish one
+"reload" event instead (``publish_reload``). Each ``/live/events/``
+connection (``kitchen.views.LiveEventsView``) subscribes with an asyncio
+queue, so under ASGI an open display costs a coroutine, not a worker.
+
+The hub keeps the last ``HISTORY`` events, so a display reconnecting with
+``Last-Event-ID`` gets what it missed. If it missed more than that, or fell
+``QUEUE_SIZE`` events behind, it is told to reload. While nobody is
+connected, events carry no object (no queries on the write path); a display
+replaying one reloads.
+
+Each process has its own hub; event ids carry its token, so ids from another
+process are not replayed. A stream also compares the cache generations of
+the four models (see ``kitchen.caching``) on every heartbeat. If they moved
+while the hub published nothing, another process made the change, and the
+display is told to reload. Streams end after ``KITCHEN_LIVE_STREAM_SECONDS``
+and the browser reconnects: Django 4.2 does not notice clients that went
+away, so this bounds how long a closed display holds its subscription.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import uuid
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from kitchen import caching, counters
+from kitchen.models import Dish, DishType, Ingredient
+
+HISTORY = 200
+QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+RETRY_MS = 3000
+
+
+def model_names() -> dict:
+    return {Dish: "dish", get_user_model(): "cook", Ingredient: "ingredient", DishType: "dish_type"}
+
+
+def labels() -> tuple[str, ...]:
+    return tuple(model._meta.label for model in model_names())
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event: dict) -> None:
+        # runs on the subscriber's loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {"id": event["id"], "type": "reload", "data": {"reason": "behind"}}
+        self.queue.put_nowait(event)
+
+
+class Hub:
+    def __init__(self, history: int = HISTORY):
+        self.token = uuid.uuid4().hex[:8]
+        self._subscribers: set[Subscriber] = set()
+        self._history: deque = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def last_id(self) -> int:
+        return self._history[-1]["id"] if self._history else 0
+
+    @property
+    def last_event_id(self) -> str:
+        """``last_id`` as sent to browsers, for pages to start their stream from."""
+        return f"{self.token}-{self.last_id}"
+
+    def publish(self, event_type: str, data: dict) -> dict:
+        """Send an event to every subscriber; safe to call from any thread."""
+        with self._lock:
+            event = {"id": next(self._ids), "type": event_type, "data": data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # its loop has closed
+                self.unsubscribe(subscriber)
+        return event
+
+    def subscribe(self, last_event_id: str = "") -> Subscriber:
+        """
+        A queue of the events from now on, preceded by those after
+        ``last_event_id`` when it comes from this hub.
+        """
+        subscriber = Subscriber(asyncio.get_running_loop())
+        token, _, number = last_event_id.partition("-")
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if token == self.token and number.isdigit():
+                last_id = int(number)
+                if self._history and last_id < self._history[0]["id"] - 1:
+                    missed = [{"id": self.last_id, "type": "reload", "data": {"reason": "history"}}]
+                else:
+                    missed = [event for event in self._history if event["id"] > last_id]
+                for event in missed[-QUEUE_SIZE:]:
+                    subscriber.queue.put_nowait(event)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+
+hub = Hub()
+
+
+def serialize(instance) -> dict:
+    if isinstance(instance, Dish):
+        return {
+            "id": instance.pk,
+            "name": instance.name,
+            "price": str(instance.price),
+            "dish_type": instance.dish_type.name,
+            "cooks": sorted(instance.cooks.values_list("username", flat=True)),
+            "ingredients": sorted(instance.ingredients.values_list("name", flat=True)),
+        }
+    if isinstance(instance, get_user_model()):
+        return {"id": instance.pk, "name": instance.username, "dish_count": instance.dish_count}
+    return {"id": instance.pk, "name": instance.name, "dish_count": instance.dish_count}
+
+
+def format_event(event: dict) -> str:
+    return f"id: {hub.token}-{event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def stream(last_event_id: str = ""):
+    """The text of an event stream, until ``KITCHEN_LIVE_STREAM_SECONDS`` pass."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, "KITCHEN_LIVE_STREAM_SECONDS", 300)
+    get_generations = sync_to_async(caching.get_generations)
+    subscriber = hub.subscribe(last_event_id)
+    try:
+        generation, seen = await get_generations(labels()), hub.last_id
+        yield f"retry: {RETRY_MS}\n\n"
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                current = await get_generations(labels())
+                if current != generation and hub.last_id == seen:
+                    yield format_event({"id": hub.last_id, "type": "reload", "data": {"reason": "elsewhere"}})
+                generation, seen = current, hub.last_id
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+def _publish_change(model, pk, action: str) -> None:
+    name = model_names()[model]
+    data = {"model": name, "action": action, "id": pk, "totals": counters.get_totals()}
+    if action == "saved" and hub.subscribers:
+        queryset = model._default_manager.filter(pk=pk)
+        if model is Dish:
+            queryset = queryset.select_related("dish_type")
+        instance = queryset.first()
+        if instance is None:
+            return
+        data["object"] = serialize(instance)
+    hub.publish(name, data)
+
+
+def _on_save(sender, instance, update_fields=None, **kwargs):
+    # logins save last_login only, which no display shows
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    transaction.on_commit(lambda: _publish_change(sender, instance.pk, "saved"))
+
+
+def _on_delete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: _publish_change(sender, pk, "deleted"))
+
+
+def _on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post"):
+        return
+    dish_ids = [instance.pk] if not reverse else list(pk_set or ())
+    for pk in dish_ids:
+        transaction.on_commit(lambda pk=pk: _publish_change(Dish, pk, "saved"))
+
+
+def publish_reload(reason: str = "bulk") -> None:
+    """Tell displays to reload after writes that bypass signals (bulk edits, imports)."""
+    transaction.on_commit(lambda: hub.publish("reload", {"reason": reason, "totals": counters.get_totals()}))
+
+
+def connect_signals() -> None:
+    for model in model_names():
+        uid = model._meta.label_lower
+        post_save.connect(_on_save, sender=model, dispatch_uid=f"live-save-{uid}")
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f"live-delete-{uid}")
+    for through in (Dish.cooks.through, Dish.ingredients.through):
+        m2m_changed.connect(_on_m2m_change, sender=through, dispatch_uid=f"live-{through._meta.label_lower}")
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from kitchen import costing
+from kitchen.models import Dish, DishIngredient, Ingredient
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Recost the whole menu, then the dishes of the most used ingredient after a price "
+        "change, and report the time of each. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        dishes = Dish.objects.count()
+        if not dishes:
+            raise CommandError("No dishes; run generate_data first")
+        lines = DishIngredient.objects.count()
+        ingredient = Ingredient.objects.order_by("-dish_count").first()
+
+        full, partial = [], []
+        try:
+            with transaction.atomic():
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    costing.reprice()
+                    full.append(time.perf_counter() - started)
+                if ingredient is not None:
+                    for _ in range(options["repeat"]):
+                        ingredient.unit_cost += 1
+                        started = time.perf_counter()
+                        ingredient.save()
+                        partial.append(time.perf_counter() - started)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"{dishes} dishes, {lines} recipe lines")
+        best = min(full)
+        self.stdout.write(f"whole menu: {best:.2f}s ({dishes / best:,.0f} dishes/s, best of {len(full)})")
+        if partial:
+            self.stdout.write(
+                f"price change of {ingredient.name} ({ingredient.dish_count} dishes): "
+                f"{min(partial) * 1000:.1f} ms including the save"
+            )
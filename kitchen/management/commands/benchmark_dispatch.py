@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from kitchen.dispatch import Dispatcher
+from kitchen.models import Dish, Order, OrderItem
+from kitchen.perf import percentile
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispatch a burst of synthetic orders over the current dishes and cooks and report "
+        "tickets per second, per-order latency, writes and how evenly the load spread."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=2000)
+        parser.add_argument("--items", type=int, default=3, help="Items per order.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        dish_ids = list(Dish.objects.filter(cooks__isnull=False).distinct().values_list("pk", flat=True))
+        if not dish_ids:
+            raise CommandError("No dishes with cooks; run generate_data first")
+        rng = random.Random(options["seed"])
+
+        # everything is rolled back afterwards
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                dispatcher = Dispatcher.from_database()
+                build_ms = (time.perf_counter() - started) * 1000
+
+                orders = Order.objects.bulk_create(
+                    Order(reference=f"bench-{n}", priority=rng.choice((0, 0, 0, 1, 2))) for n in range(options["orders"])
+                )
+                items = OrderItem.objects.bulk_create(
+                    OrderItem(order=order, dish_id=rng.choice(dish_ids), quantity=rng.randint(1, 2))
+                    for order in orders
+                    for _ in range(options["items"])
+                )
+                by_order: dict[int, list[OrderItem]] = {}
+                for item in items:
+                    by_order.setdefault(item.order_id, []).append(item)
+
+                latencies = []
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for order in orders:
+                        order_started = time.perf_counter()
+                        order_items = by_order[order.pk]
+                        for item in order_items:
+                            item.order = order
+                        dispatcher.submit(order_items)
+                        dispatcher.dispatch()
+                        latencies.append((time.perf_counter() - order_started) * 1000)
+                    dispatcher.flush()
+                    elapsed = time.perf_counter() - started
+                assigned = OrderItem.objects.filter(pk__in=[item.pk for item in items], cook__isnull=False).count()
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        latencies.sort()
+        loads = [load for load in dispatcher.load.values() if load]
+        self.stdout.write(
+            f"{len(dispatcher.load)} cooks, {len(dispatcher.eligible)} dishes with cooks, index built in {build_ms:.1f} ms"
+        )
+        self.stdout.write(
+            f"{len(items)} tickets in {elapsed:.2f}s: {len(items) / elapsed:,.0f} tickets/s, "
+            f"{assigned} assigned, {dispatcher.queued} left queued"
+        )
+        self.stdout.write(
+            f"per order: p50 {percentile(latencies, 50):.3f} ms, p95 {percentile(latencies, 95):.3f} ms "
+            f"(flushes every 500 assignments)"
+        )
+        self.stdout.write(f"writes: {len(queries)} statements for {len(items)} assignments")
+        if loads:
+            self.stdout.write(
+                f"load per busy cook: min {min(loads)}, max {max(loads)}, stdev {statistics.pstdev(loads):.1f}"
+            )
@@ -0,0 +1,95 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from kitchen.models import Dish, DishType
+from kitchen.search import IContainsSearchBackend, get_search_backend
+
+WORDS = (
+    "chicken beef pork salmon tuna tofu potato tomato onion garlic basil "
+    "cheese cream butter lemon honey chili pepper rice noodle mushroom "
+    "spinach carrot ginger coconut almond walnut chocolate vanilla berry"
+).split()
+
+# Descriptions draw from WORDS plus a long tail of rarer terms with a
+# Zipf-like distribution, so queries cover common and selective terms.
+VOCABULARY = WORDS + [f"spice{i}" for i in range(2000)]
+WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+QUERIES = ("chicken", "chick", "spice150", "spice1500", "chocolate spice40")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare the icontains search path against the indexed search backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help="Catalog sizes (number of dishes) to benchmark.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        indexed = get_search_backend()
+        baseline = IContainsSearchBackend()
+        self.stdout.write(f"Backend: {indexed.name} ({connection.vendor})")
+
+        for size in options["sizes"]:
+            try:
+                with transaction.atomic():
+                    self._populate(size, options["seed"])
+                    indexed.install()
+                    for query in QUERIES:
+                        old = self._measure(baseline, query, options["repeat"])
+                        new = self._measure(indexed, query, options["repeat"])
+                        self.stdout.write(
+                            f"{size:>9} dishes  q={query!r:<22} "
+                            f"icontains {old * 1000:8.2f} ms   "
+                            f"{indexed.name} {new * 1000:8.2f} ms   "
+                            f"x{old / new if new else 0:.1f}"
+                        )
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    @staticmethod
+    def _populate(size: int, seed: int) -> None:
+        rng = random.Random(seed)
+        dish_type, _ = DishType.objects.get_or_create(name="Benchmark")
+        batch = []
+        for i in range(size):
+            words = rng.sample(WORDS, 3)
+            batch.append(
+                Dish(
+                    name=f"bench {' '.join(words)} {i}",
+                    description=" ".join(rng.choices(VOCABULARY, WEIGHTS, k=12)),
+                    price=rng.randint(100, 5000) / 100,
+                    dish_type=dish_type,
+                )
+            )
+            if len(batch) == 5000:
+                Dish.objects.bulk_create(batch)
+                batch = []
+        Dish.objects.bulk_create(batch)
+
+    @staticmethod
+    def _measure(backend, query: str, repeat: int) -> float:
+        """Best-of-N time for what a list view does: count + first page."""
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = backend.search(Dish.objects.all(), query)
+            queryset.count()
+            list(queryset[:10])
+            best = min(best, time.perf_counter() - started)
+        return best
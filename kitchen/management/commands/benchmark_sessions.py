@@ -0,0 +1,96 @@
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from kitchen.benchmarks import ROUTE_PARAMS, get_routes, route_url, scratch_cache
+from kitchen.perf import percentile
+
+ENGINES = ("db", "cached_db", "cache", "signed_cookies", "file")
+ROUTES = ("kitchen:index", "kitchen:dish-list", "kitchen:cook-list", "kitchen:dish-detail")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Request pages as a signed-in cook once per session engine, with and without the "
+        "cached request.user, and compare the session/auth queries per page and p95 latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--engine", nargs="+", choices=ENGINES, default=list(ENGINES))
+        parser.add_argument("--route", action="append", dest="routes", help="Route name; repeatable.")
+        parser.add_argument("--repeat", type=int, default=50, help="Requests per route and setup.")
+
+    def handle(self, *args, **options):
+        routes = [(name, pattern) for name, pattern in get_routes() if name in (options["routes"] or ROUTES)]
+        results = []
+        try:
+            with scratch_cache(), transaction.atomic(), tempfile.TemporaryDirectory() as session_dir:
+                user = get_user_model().objects.create_user(username="session-benchmark")
+                for engine in options["engine"]:
+                    for user_cache in (False, True):
+                        with override_settings(
+                            SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}",
+                            SESSION_FILE_PATH=session_dir,
+                            KITCHEN_USER_CACHE_TIMEOUT=300 if user_cache else 0,
+                        ):
+                            results.append((engine, user_cache, *self.measure(user, routes, options["repeat"])))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(
+            f"{len(routes)} routes x {options['repeat']} requests, view cache warm, so what remains is mostly "
+            "session and auth work"
+        )
+        self.stdout.write(
+            f"{'engine':<15} {'user cache':>10} {'queries/page':>12} {'auth q/page':>11} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for engine, user_cache, queries, auth_queries, timings in results:
+            self.stdout.write(
+                f"{engine:<15} {'on' if user_cache else 'off':>10} {queries:>12.2f} {auth_queries:>11.2f} "
+                f"{percentile(timings, 50):>8.2f} {percentile(timings, 95):>8.2f}"
+            )
+        baseline = next((result for result in results if result[:2] == ("db", False)), None)
+        if baseline:
+            best = min(results, key=lambda result: percentile(result[4], 95))
+            self.stdout.write(
+                f"Best p95: {best[0]} with the user cache {'on' if best[1] else 'off'}, "
+                f"{baseline[3] - best[3]:.2f} queries/page fewer than db without it, "
+                f"p95 {percentile(baseline[4], 95):.2f} -> {percentile(best[4], 95):.2f} ms"
+            )
+
+    def measure(self, user, routes, repeat: int):
+        # a new client per setup, so SessionMiddleware loads the overridden engine
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(user, backend="kitchen.auth.CachedModelBackend")
+        auth_tables = (Session._meta.db_table, get_user_model()._meta.db_table)
+        queries = auth_queries = 0
+        timings = []
+        for name, pattern in routes:
+            url = route_url(name, pattern)
+            if url is None:
+                continue
+            params = ROUTE_PARAMS.get(name, {})
+            client.get(url, params)  # warm up, fills the view cache
+            with CaptureQueriesContext(connection) as captured:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    client.get(url, params)
+                    timings.append((time.perf_counter() - started) * 1000)
+            queries += len(captured)
+            auth_queries += sum(
+                1 for query in captured if any(f'FROM "{table}"' in query["sql"] for table in auth_tables)
+            )
+        requests = max(len(timings), 1)
+        timings.sort()
+        return queries / requests, auth_queries / requests, timings
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from kitchen.bootstrap import ensure_superuser
+
+
+class Command(BaseCommand):
+    help = "Create the demo superuser if it does not exist (safe to run on every deploy)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", default=settings.KITCHEN_ADMIN_USERNAME)
+        parser.add_argument("--password", default=settings.KITCHEN_ADMIN_PASSWORD)
+
+    def handle(self, *args, **options):
+        if ensure_superuser(options["username"], options["password"]):
+            self.stdout.write(self.style.SUCCESS(f"Superuser created: {options['username']}"))
+        else:
+            self.stdout.write(f"Superuser {options['username']} already exists.")
@@ -0,0 +1,36 @@
+import gzip
+
+import brotli
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen import assets
+
+
+class Command(BaseCommand):
+    help = "Bundle and minify the static CSS and JS into static/dist/ (run before collectstatic)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fetch", action="store_true", help="Download missing vendored files, checking their pinned hashes."
+        )
+        parser.add_argument("--force", action="store_true", help="With --fetch, download the vendored files again.")
+
+    def handle(self, *args, **options):
+        if options["fetch"]:
+            try:
+                for path in assets.fetch_vendor(force=options["force"]):
+                    self.stdout.write(f"Fetched {path}")
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Could not fetch the vendored assets: {exc}") from exc
+        missing = assets.missing_sources()
+        if missing:
+            raise CommandError(f"Missing sources: {', '.join(missing)}. Run with --fetch.")
+
+        root = assets.static_root()
+        for result in assets.build():
+            data = (root / result.path).read_bytes()
+            self.stdout.write(
+                f"{result.path}: {result.sources} source(s), {result.source_bytes:,} -> {result.bytes:,} bytes"
+                f" (gzip {len(gzip.compress(data)):,}, brotli {len(brotli.compress(data)):,})"
+            )
+        self.stdout.write(self.style.SUCCESS("Assets built."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from kitchen import caching
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the view and fragment caches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zero the counters after printing them.")
+
+    def handle(self, *args, **options):
+        for kind, counts in caching.get_stats().items():
+            total = counts["hit"] + counts["miss"]
+            ratio = counts["hit"] / total if total else 0
+            self.stdout.write(f"{kind:<9} hits={counts['hit']} misses={counts['miss']} hit_ratio={ratio:.1%}")
+        if options["reset"]:
+            caching.reset_stats()
+            self.stdout.write("Counters reset.")
@@ -0,0 +1,124 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from kitchen import db
+from kitchen.models import Dish
+from kitchen.perf import percentile
+
+ALIAS = "stress"
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent writer and reader threads against a copy of the SQLite database, "
+        "once per connection profile, comparing throughput, latency and lock errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", nargs="+", choices=db.PROFILES, default=["stock", "tuned"])
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        source = connections["default"]
+        if source.vendor != "sqlite" or source.is_in_memory_db():
+            raise CommandError("db_stress compares SQLite profiles and needs a file database")
+        source.ensure_connection()
+        dish_ids = list(Dish.objects.values_list("pk", flat=True))
+        if not dish_ids:
+            raise CommandError("No dishes to work on; run generate_data first")
+
+        results = {}
+        for profile in options["profile"]:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "stress.sqlite3")
+                # a fresh copy per profile, so both start from the same file
+                with sqlite3.connect(path) as target:
+                    source.connection.backup(target)
+                target.close()
+                connections.settings[ALIAS] = {**source.settings_dict, "NAME": path}
+                db.profile_overrides[ALIAS] = profile
+                try:
+                    results[profile] = self.run_profile(dish_ids, options)
+                finally:
+                    connections[ALIAS].close()
+                    del connections[ALIAS]
+                    del connections.settings[ALIAS]
+                    db.profile_overrides.pop(ALIAS, None)
+
+        self.stdout.write(
+            f"{options['writers']} writers, {options['readers']} readers, {options['duration']:.0f}s per profile"
+        )
+        self.stdout.write(
+            f"{'profile':<8} {'writes/s':>9} {'reads/s':>9} {'write p95':>10} {'read p95':>9} {'locked':>7}"
+        )
+        for profile, result in results.items():
+            self.stdout.write(
+                f"{profile:<8} {result['writes'] / options['duration']:>9.1f} "
+                f"{result['reads'] / options['duration']:>9.1f} "
+                f"{percentile(result['write_ms'], 95):>8.1f}ms {percentile(result['read_ms'], 95):>7.1f}ms "
+                f"{result['errors']:>7}"
+            )
+        if {"stock", "tuned"} <= results.keys():
+            for kind in ("writes", "reads"):
+                if results["stock"][kind]:
+                    self.stdout.write(f"tuned/stock {kind}: x{results['tuned'][kind] / results['stock'][kind]:.2f}")
+
+    def run_profile(self, dish_ids: list[int], options) -> dict:
+        result = {"writes": 0, "reads": 0, "errors": 0, "write_ms": [], "read_ms": []}
+        lock = threading.Lock()
+        # open one connection up front so journal_mode is switched before the threads start
+        connections[ALIAS].ensure_connection()
+        deadline = time.monotonic() + options["duration"]
+
+        def worker(kind: str, seed: int) -> None:
+            rng = random.Random(seed)
+            done, failed, latencies = 0, 0, []
+            dishes = Dish.objects.using(ALIAS)
+            try:
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        if kind == "writes":
+                            # what an edit form does: read the row, then write it back
+                            pk = rng.choice(dish_ids)
+                            with transaction.atomic(using=ALIAS):
+                                description = dishes.values_list("description", flat=True).get(pk=pk)
+                                dishes.filter(pk=pk).update(description=description[:200] + ".")
+                        else:
+                            offset = rng.randrange(max(1, len(dish_ids) - 20))
+                            list(dishes.select_related("dish_type").order_by("name")[offset:offset + 20])
+                            dishes.count()
+                    except OperationalError:
+                        failed += 1
+                        continue
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    done += 1
+            finally:
+                connections[ALIAS].close()
+            with lock:
+                result[kind] += done
+                result["errors"] += failed
+                result["write_ms" if kind == "writes" else "read_ms"].extend(latencies)
+
+        seed = options["seed"]
+        threads = [threading.Thread(target=worker, args=("writes", seed + n)) for n in range(options["writers"])]
+        threads += [
+            threading.Thread(target=worker, args=("reads", seed + 1000 + n)) for n in range(options["readers"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for key in ("write_ms", "read_ms"):
+            result[key].sort()
+        return result
@@ -0,0 +1,123 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from kitchen.benchmarks import ROUTE_PARAMS, get_routes, route_url, scratch_cache
+
+# query strings requested on top of the plain page, to cover every plan a list can use
+VARIANTS = {
+    "kitchen:cook-list": [{"sort": "-dish_count"}, {"min_dishes": "1"}],
+    "kitchen:dish-type-list": [{"sort": "-dish_count"}, {"min_dishes": "1"}],
+    "kitchen:ingredient-list": [{"sort": "-dish_count"}, {"min_dishes": "1"}],
+    "kitchen:dish-list": [{"dish_type": "1"}, {"min_price": "10", "max_price": "19.99"}, {"not_ingredient": "1"}],
+}
+
+# plan lines reading a whole table
+SEQUENTIAL_SCANS = {
+    "sqlite": re.compile(r"^SCAN (?:TABLE )?(\w+)$"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+def explain(sql: str) -> list[str]:
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f"EXPLAIN {sql}")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def sequential_scans(sql: str, plan: list[str]) -> list[str]:
+    """Tables ``plan`` reads from start to end."""
+    pattern = SEQUENTIAL_SCANS.get(connection.vendor)
+    if pattern is None:
+        return []
+    tables = []
+    for line in plan:
+        match = pattern.search(line.strip())
+        if not match:
+            continue
+        table = match.group(1)
+        # SQLite shows a walk in rowid (pk) order as a plain SCAN; with
+        # ORDER BY pk ... LIMIT that is an index range read, not a table scan
+        if connection.vendor == "sqlite" and re.search(rf'ORDER BY "{table}"\."id" (ASC|DESC) LIMIT', sql):
+            continue
+        tables.append(table)
+    return tables
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the dashboard and every list view, EXPLAIN each query they run "
+        "and flag sequential scans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--route", action="append", dest="routes", help="Only this route name; repeatable.")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan, not only those with scans.")
+        parser.add_argument("--strict", action="store_true", help="Exit with an error on any sequential scan.")
+
+    def handle(self, *args, **options):
+        # planners pick scans for tiny tables: check against realistic data (generate_data)
+        flagged = 0
+        try:
+            # the pages see the temporary user, and explain_page clears the cache
+            with scratch_cache(), transaction.atomic():
+                client = Client(HTTP_HOST="localhost")
+                client.force_login(get_user_model().objects.create_user(username="explain-runner"))
+                for name, pattern in get_routes():
+                    if not self.wanted(name, options["routes"]):
+                        continue
+                    url = route_url(name, pattern)
+                    for params in [ROUTE_PARAMS.get(name, {}), *VARIANTS.get(name, [])]:
+                        flagged += self.explain_page(client, name, url, params, options["verbose_plans"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if flagged and options["strict"]:
+            raise CommandError(f"{flagged} sequential scan(s)")
+        self.stdout.write(f"{flagged} sequential scan(s)")
+
+    @staticmethod
+    def wanted(name: str, routes: list[str] | None) -> bool:
+        if routes:
+            return name in routes
+        return name == "kitchen:index" or name.endswith("-list")
+
+    def explain_page(self, client, name: str, url: str, params: dict, verbose: bool) -> int:
+        # uncached, so every query of the page runs
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        query_string = "&".join(f"{key}={value}" for key, value in params.items())
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{name} {url}{'?' + query_string if query_string else ''}"))
+        if response.status_code != 200:
+            self.stdout.write(self.style.WARNING(f"  status {response.status_code}, skipped"))
+            return 0
+
+        flagged = 0
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT") or "django_session" in sql:
+                continue
+            plan = explain(sql)
+            scans = sequential_scans(sql, plan)
+            flagged += len(scans)
+            if scans or verbose:
+                self.stdout.write(f"  {sql[:200]}")
+                for line in plan:
+                    self.stdout.write(f"    {line}")
+            for table in scans:
+                self.stdout.write(self.style.WARNING(f"  ! sequential scan of {table}"))
+        return flagged
@@ -0,0 +1,28 @@
+from dataclasses import fields
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kitchen import caching, counters
+from kitchen.benchmarks import CatalogSize, generate
+from kitchen.models import Dish, DishType, Ingredient
+
+
+class Command(BaseCommand):
+    help = "Populate the database with a deterministic synthetic catalog."
+
+    def add_arguments(self, parser):
+        for field in fields(CatalogSize):
+            parser.add_argument(f"--{field.name.replace('_', '-')}", type=int, default=field.default)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="bench", help="Prefix of generated names; must be unused.")
+
+    def handle(self, *args, **options):
+        size = CatalogSize(**{field.name: options[field.name] for field in fields(CatalogSize)})
+        with transaction.atomic():
+            created = generate(size, seed=options["seed"], prefix=options["prefix"])
+        # bulk inserts send no signals
+        counters.rebuild()
+        caching.invalidate(*(model._meta.label for model in (Dish, DishType, Ingredient, get_user_model())))
+        self.stdout.write(", ".join(f"{name}={total}" for name, total in created.items()))
@@ -0,0 +1,137 @@
+import sys
+import time
+from decimal import InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from kitchen import caching, costing, counters
+from kitchen.bulk import insert_links
+from kitchen.menu_io import FORMATS, batched, guess_format, read_records
+from kitchen.models import Dish, DishType, Ingredient
+from kitchen.signals import reconcile_dish_counts
+
+
+class _DryRun(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import dishes (with dish types, ingredients and cook assignments) "
+        "from CSV or JSON Lines. Existing dishes (by name) are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or '-' for stdin.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Validate and count, then roll back.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+        self.batch_size = options["batch_size"]
+        self.stats = {"dishes": 0, "skipped": 0, "dish_types": 0, "ingredients": 0, "unknown_cooks": 0}
+        self.dish_types: dict[str, int] = {}
+        self.ingredients: dict[str, int] = {}
+        self.cooks: dict[str, int | None] = {}
+
+        started = time.perf_counter()
+        rows = 0
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            with transaction.atomic():
+                for batch in batched(read_records(stream, fmt), self.batch_size):
+                    self.import_batch(batch)
+                    rows += len(batch)
+                if options["dry_run"]:
+                    raise _DryRun
+        except _DryRun:
+            pass
+        except (ValueError, KeyError, InvalidOperation) as exc:
+            raise CommandError(f"Invalid input near row {rows + 1}: {exc}") from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if not options["dry_run"]:
+            # bulk inserts send no signals
+            counters.rebuild()
+            reconcile_dish_counts()
+            caching.invalidate(*(model._meta.label for model in (Dish, DishType, Ingredient, get_user_model())))
+
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed else 0
+        prefix = "[dry run] " if options["dry_run"] else ""
+        self.stdout.write(
+            f"{prefix}{rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s): "
+            + ", ".join(f"{key}={value}" for key, value in self.stats.items())
+        )
+
+    def _resolve(self, model, names: set[str], known: dict, stat: str) -> None:
+        """Fill ``known`` with ids for ``names``, creating the missing rows."""
+        missing = names - known.keys()
+        if not missing:
+            return
+        known.update(model.objects.filter(name__in=missing).values_list("name", "id"))
+        to_create = missing - known.keys()
+        if to_create:
+            model.objects.bulk_create([model(name=name) for name in to_create], ignore_conflicts=True)
+            known.update(model.objects.filter(name__in=to_create).values_list("name", "id"))
+            self.stats[stat] += len(to_create)
+
+    def _resolve_cooks(self, usernames: set[str]) -> None:
+        missing = usernames - self.cooks.keys()
+        if not missing:
+            return
+        found = dict(get_user_model().objects.filter(username__in=missing).values_list("username", "id"))
+        for username in missing:
+            self.cooks[username] = found.get(username)
+
+    def import_batch(self, records: list[dict]) -> None:
+        for record in records:
+            if not record["name"] or not record["dish_type"]:
+                raise ValueError("'name' and 'dish_type' are required")
+
+        self._resolve(DishType, {r["dish_type"] for r in records}, self.dish_types, "dish_types")
+        self._resolve(
+            Ingredient, {name for r in records for name in r["ingredients"]}, self.ingredients, "ingredients"
+        )
+        self._resolve_cooks({username for r in records for username in r["cooks"]})
+
+        names = [r["name"] for r in records]
+        existing = set(Dish.objects.filter(name__in=names).values_list("name", flat=True))
+        new_records = {r["name"]: r for r in records if r["name"] not in existing}
+        self.stats["skipped"] += len(records) - len(new_records)
+        if not new_records:
+            return
+
+        Dish.objects.bulk_create(
+            Dish(
+                name=r["name"],
+                description=r["description"],
+                price=r["price"],
+                dish_type_id=self.dish_types[r["dish_type"]],
+            )
+            for r in new_records.values()
+        )
+        dish_ids = dict(Dish.objects.filter(name__in=new_records).values_list("name", "id"))
+        self.stats["dishes"] += len(new_records)
+
+        cook_links = []
+        ingredient_links = []
+        for name, record in new_records.items():
+            dish_id = dish_ids[name]
+            for username in record["cooks"]:
+                cook_id = self.cooks[username]
+                if cook_id is None:
+                    self.stats["unknown_cooks"] += 1
+                    continue
+                cook_links.append((dish_id, cook_id))
+            for ingredient in record["ingredients"]:
+                ingredient_links.append((dish_id, self.ingredients[ingredient]))
+        insert_links(Dish.cooks.through, "cook_id", cook_links)
+        insert_links(Dish.ingredients.through, "ingredient_id", ingredient_links)
+        costing.reprice(dish_ids.values())
@@ -0,0 +1,55 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from kitchen import impact
+from kitchen.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        "List every dish using any (or all) of the given ingredients, grouped by "
+        "dish type and cook - e.g. for a stock-out or an allergen recall."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ingredients", nargs="+", help="Ingredient names (case-insensitive) or ids.")
+        parser.add_argument("--all", action="store_true", help="Only dishes containing all of them.")
+        parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+
+    def resolve(self, values: list[str]) -> list[int]:
+        ids = {int(value) for value in values if value.isdigit()}
+        names = {value.lower() for value in values if not value.isdigit()}
+        found = dict(Ingredient.objects.filter(Q(pk__in=ids) | Q(name__lower__in=names)).values_list("pk", "name"))
+        missing = names - {name.lower() for name in found.values()} | {str(pk) for pk in ids - found.keys()}
+        if missing:
+            raise CommandError(f"Unknown ingredient(s): {', '.join(sorted(missing))}")
+        return sorted(found)
+
+    def handle(self, *args, **options):
+        ingredient_ids = self.resolve(options["ingredients"])
+        match = "all" if options["all"] else "any"
+
+        started = time.perf_counter()
+        index = impact.get_index()
+        loaded = time.perf_counter()
+        result = impact.impact(ingredient_ids, match)
+        looked_up = time.perf_counter()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        names = ", ".join(ingredient["name"] for ingredient in result["ingredients"])
+        self.stdout.write(f"{result['dish_count']} dish(es) with {match} of: {names}")
+        for title, key in (("By dish type", "by_dish_type"), ("By cook", "by_cook")):
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            for group in result[key]:
+                dishes = ", ".join(dish["name"] for dish in group["dishes"])
+                self.stdout.write(f"  {group['name'] or '(no cook)'} ({len(group['dishes'])}): {dishes}")
+        self.stdout.write(
+            f"index: {len(index.dish_names)} dishes, built in {index.build_ms:.0f} ms "
+            f"(load {(loaded - started) * 1000:.0f} ms); lookup {(looked_up - loaded) * 1000:.2f} ms"
+        )
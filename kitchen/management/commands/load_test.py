@@ -0,0 +1,169 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen.models import Dish
+from kitchen.perf import percentile
+
+SERVERS = {
+    "wsgi": ["kitchen_service.wsgi:application"],
+    "asgi": ["kitchen_service.asgi:application", "--worker-class", "uvicorn.workers.UvicornWorker"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def open_session(user):
+    """A logged-in session of ``user`` in the configured session engine."""
+    # the servers only accept sessions of the engine they run with
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    # save() rather than create(): signed cookies only get a key when saved
+    session.save()
+    return session
+
+
+def wait_for_port(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"Server did not start listening on port {port} within {timeout:.0f}s")
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app under gunicorn (WSGI workers and/or uvicorn ASGI workers) and "
+        "compare throughput and latency of the read-heavy pages under concurrent clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", nargs="+", choices=SERVERS, default=list(SERVERS))
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--concurrency", type=int, default=16, help="Concurrent keep-alive clients.")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per mode.")
+        parser.add_argument("--paths", nargs="+", help="Paths to request in turn (default: index, dishes, a dish).")
+        parser.add_argument("--no-cache", action="store_true", help="Run the servers with the view cache off.")
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE.endswith(".cache") and not getattr(settings, "KITCHEN_SHARED_CACHE", False):
+            raise CommandError("The cache session engine needs a cache shared with the servers (file or db)")
+        paths = options["paths"] or self.default_paths()
+        user = get_user_model().objects.create_user(username=f"load-test-{os.getpid()}")
+        session = open_session(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+        results = {}
+        try:
+            for mode in options["mode"]:
+                results[mode] = self.run_mode(mode, paths, cookie, options)
+        finally:
+            session.delete()
+            user.delete()
+
+        self.stdout.write(f"{options['concurrency']} clients, {options['duration']:.0f}s, paths: {' '.join(paths)}")
+        self.stdout.write(f"{'mode':<6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for mode, (rate, latencies, errors) in results.items():
+            self.stdout.write(
+                f"{mode:<6} {rate:>9.1f} "
+                + " ".join(f"{percentile(latencies, pct):>8.1f}" for pct in (50, 95, 99))
+                + f" {errors:>7}"
+            )
+        if {"wsgi", "asgi"} <= results.keys() and results["wsgi"][0]:
+            self.stdout.write(f"asgi/wsgi throughput: x{results['asgi'][0] / results['wsgi'][0]:.2f}")
+
+    @staticmethod
+    def default_paths() -> list[str]:
+        paths = ["/", "/dishes/"]
+        dish_id = Dish.objects.order_by("pk").values_list("pk", flat=True).first()
+        if dish_id is not None:
+            paths.append(f"/dishes/{dish_id}/")
+        return paths
+
+    def run_mode(self, mode: str, paths: list[str], cookie: str, options) -> tuple[float, list[float], int]:
+        port = free_port()
+        env = {**os.environ, "KITCHEN_ASYNC_VIEWS": "1" if mode == "asgi" else "0"}
+        if options["no_cache"]:
+            env["KITCHEN_VIEW_CACHE_TIMEOUT"] = "0"
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", *SERVERS[mode],
+                "--bind", f"127.0.0.1:{port}",
+                "--workers", str(options["workers"]),
+                "--log-level", "warning",
+            ],
+            env=env,
+            cwd=settings.BASE_DIR,
+        )
+        try:
+            wait_for_port(port, timeout=30)
+            return self.generate_load(port, paths, cookie, options["concurrency"], options["duration"])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def generate_load(self, port, paths, cookie, concurrency, duration) -> tuple[float, list[float], int]:
+        latencies: list[float] = []
+        errors = 0
+        lock = threading.Lock()
+        headers = {"Cookie": cookie, "Host": "localhost"}
+
+        def client(offset: int) -> None:
+            nonlocal errors
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            local, failed, i = [], 0, offset
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    connection.request("GET", paths[i % len(paths)], headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        failed += 1
+                except (OSError, http.client.HTTPException):
+                    failed += 1
+                    connection.close()
+                    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                local.append((time.perf_counter() - started) * 1000)
+                i += 1
+            connection.close()
+            with lock:
+                latencies.extend(local)
+                errors += failed
+
+        # one warm-up pass so the first requests do not count imports and caches
+        self.warm_up(port, paths, headers)
+        deadline = time.monotonic() + duration
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        latencies.sort()
+        return len(latencies) / duration, latencies, errors
+
+    @staticmethod
+    def warm_up(port, paths, headers) -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        for path in paths:
+            connection.request("GET", path, headers=headers)
+            connection.getresponse().read()
+        connection.close()
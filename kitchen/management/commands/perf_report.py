@@ -0,0 +1,69 @@
+import json
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from kitchen.perf import percentile
+
+METRICS = ("total_ms", "sql_ms", "sql_count", "session_ms", "template_ms", "bytes")
+
+
+class Command(BaseCommand):
+    help = "Aggregate kitchen.perf log lines into p50/p95/p99 per URL name."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", default=["-"], help="Log files, or '-' for stdin.")
+        parser.add_argument("--metric", choices=METRICS, default="total_ms")
+        parser.add_argument("--min-count", type=int, default=1, help="Hide views with fewer requests.")
+
+    @staticmethod
+    def read(stream):
+        """Yield the JSON payload of every perf line, ignoring anything else."""
+        for line in stream:
+            start = line.find("{")
+            if start < 0:
+                continue
+            try:
+                entry = json.loads(line[start:])
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and "total_ms" in entry:
+                yield entry
+
+    def handle(self, *args, **options):
+        metric = options["metric"]
+        samples: dict[str, list[float]] = defaultdict(list)
+        duplicates: dict[str, int] = defaultdict(int)
+        for path in options["paths"]:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+            try:
+                for entry in self.read(stream):
+                    view = entry.get("view") or entry.get("path") or "?"
+                    if entry.get(metric) is not None:
+                        samples[view].append(float(entry[metric]))
+                    duplicates[view] += bool(entry.get("sql_duplicates"))
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+
+        rows = [
+            (view, sorted(values))
+            for view, values in samples.items()
+            if len(values) >= options["min_count"]
+        ]
+        if not rows:
+            self.stdout.write("No perf log lines found.")
+            return
+        rows.sort(key=lambda row: percentile(row[1], 95), reverse=True)
+
+        width = max(len(view) for view, _ in rows)
+        self.stdout.write(
+            f"{'view':<{width}} {'count':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10} {'dup':>5}  ({metric})"
+        )
+        for view, values in rows:
+            self.stdout.write(
+                f"{view:<{width}} {len(values):>7} "
+                + " ".join(f"{percentile(values, pct):>10.2f}" for pct in (50, 95, 99))
+                + f" {values[-1]:>10.2f} {duplicates[view]:>5}"
+            )
@@ -0,0 +1,117 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: loads the WSGI application the way a worker
+# does, then serves requests straight through the WSGI callable.
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+from wsgiref.util import setup_testing_defaults
+
+application = import_string(settings.WSGI_APPLICATION)
+loaded = time.perf_counter()
+connected = any(connections[alias].connection is not None for alias in connections)
+
+def request(path):
+    environ = {"PATH_INFO": path, "HTTP_HOST": "localhost", "SERVER_NAME": "localhost"}
+    setup_testing_defaults(environ)
+    status = []
+    body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    b"".join(body)
+    getattr(body, "close", lambda: None)()
+    return status[0]
+
+status = request(sys.argv[1])
+first = time.perf_counter()
+since_spawn = time.time() - float(sys.argv[2])
+request(sys.argv[1])
+second = time.perf_counter()
+print(json.dumps({
+    "load_ms": (loaded - started) * 1000,
+    "first_request_ms": (first - loaded) * 1000,
+    "warm_request_ms": (second - first) * 1000,
+    "spawn_to_first_response_ms": since_spawn * 1000,
+    "status": status,
+    "db_connected_on_load": connected,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """``-X importtime`` lines as (module, self_us, cumulative_us)."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold start in a fresh interpreter: import time per module and "
+        "package, application load time and time to first request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/accounts/login/", help="Path of the first request.")
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start; medians are reported.")
+        parser.add_argument("--top", type=int, default=15, help="Slowest modules/packages to list.")
+        parser.add_argument(
+            "--budget-ms", type=float, help="Fail when process spawn to first response exceeds this."
+        )
+
+    def run_child(self, url: str) -> tuple[dict, list[tuple[str, int, int]]]:
+        # manage.py has set DJANGO_SETTINGS_MODULE, the child inherits it
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, url, repr(time.time())],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+        return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        runs = []
+        for _ in range(max(1, options["runs"])):
+            timings, modules = self.run_child(options["url"])
+            runs.append(timings)
+
+        def median(key):
+            return statistics.median(run[key] for run in runs)
+
+        to_first_response = median("spawn_to_first_response_ms")
+        self.stdout.write(f"Cold start ({len(runs)} runs, medians, {options['url']} -> {runs[-1]['status']}):")
+        self.stdout.write(f"  application load      {median('load_ms'):9.1f} ms")
+        self.stdout.write(f"  first request         {median('first_request_ms'):9.1f} ms")
+        self.stdout.write(f"  warm request          {median('warm_request_ms'):9.1f} ms")
+        self.stdout.write(f"  spawn to 1st response {to_first_response:9.1f} ms")
+        if any(run["db_connected_on_load"] for run in runs):
+            self.stdout.write(self.style.WARNING("  the database was queried while loading the application"))
+
+        packages: dict[str, int] = defaultdict(int)
+        for name, self_us, _cumulative in modules:
+            packages[name.split(".")[0]] += self_us
+        self.stdout.write("\nImport time by top-level package (self time):")
+        for name, total in sorted(packages.items(), key=lambda item: -item[1])[: options["top"]]:
+            self.stdout.write(f"  {name:<40} {total / 1000:9.1f} ms")
+        self.stdout.write("\nSlowest modules (cumulative, including their imports):")
+        for name, _self_us, cumulative in sorted(modules, key=lambda item: -item[2])[: options["top"]]:
+            self.stdout.write(f"  {name:<40} {cumulative / 1000:9.1f} ms")
+
+        budget = options["budget_ms"]
+        if budget is not None:
+            if to_first_response > budget:
+                raise CommandError(f"Cold start {to_first_response:.0f} ms exceeds the {budget:.0f} ms budget")
+            self.stdout.write(self.style.SUCCESS(f"\nWithin the {budget:.0f} ms budget."))
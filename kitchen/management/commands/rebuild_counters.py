@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from kitchen import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached dashboard totals from the database."
+
+    def handle(self, *args, **options):
+        for name, total in counters.rebuild().items():
+            self.stdout.write(f"{name}: {total}")
+        self.stdout.write(self.style.SUCCESS("Counters rebuilt."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kitchen import caching
+from kitchen.signals import reconcile_dish_counts
+
+
+class Command(BaseCommand):
+    help = "Recount the stored dish_count of cooks, ingredients and dish types and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted rows.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = reconcile_dish_counts(dry_run=options["dry_run"])
+        for label, rows in drifted.items():
+            self.stdout.write(f"{label}: {rows} drifted")
+        if options["dry_run"]:
+            return
+        # counts are changed with QuerySet.update, which sends no signals
+        caching.invalidate(*(label for label, rows in drifted.items() if rows))
+        self.stdout.write(self.style.SUCCESS("Dish counts reconciled."))
@@ -0,0 +1,84 @@
+import json
+from dataclasses import asdict, fields
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from kitchen.benchmarks import CatalogSize, as_dict, compare, generate, run, scratch_cache
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every page and API route (latency, queries, memory) on a "
+        "synthetic catalog, save the results as JSON and compare them with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        for field in fields(CatalogSize):
+            parser.add_argument(f"--{field.name.replace('_', '-')}", type=int, default=field.default)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--existing", action="store_true", help="Benchmark the current data, generate nothing.")
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--cold", action="store_true", help="Clear the cache before every request.")
+        parser.add_argument("--route", action="append", dest="routes", help="Only this route name; repeatable.")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="Baseline JSON file from a previous run.")
+        parser.add_argument(
+            "--tolerance", type=float, default=1.25, help="Allowed p50 slowdown ratio against the baseline."
+        )
+
+    def handle(self, *args, **options):
+        size = CatalogSize(**{field.name: options[field.name] for field in fields(CatalogSize)})
+        # generated rows and the benchmark user are rolled back afterwards,
+        # so pages and totals that include them stay in a scratch cache
+        try:
+            with scratch_cache(), transaction.atomic():
+                if not options["existing"]:
+                    generate(size, seed=options["seed"], prefix="benchmark")
+                user = get_user_model().objects.create_user(username="benchmark-runner")
+                results = run(user, repeat=options["repeat"], cold=options["cold"], routes=options["routes"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        report = {
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "size": None if options["existing"] else asdict(size),
+                "seed": options["seed"],
+                "repeat": options["repeat"],
+                "cold": options["cold"],
+            },
+            "results": as_dict(results),
+        }
+
+        width = max((len(result.route) for result in results), default=5)
+        self.stdout.write(
+            f"{'route':<{width}} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>7} {'KiB':>8} {'peak KiB':>9}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.route:<{width}} {result.status:>6} {result.p50_ms:>9.2f} {result.p95_ms:>9.2f} "
+                f"{result.queries:>7} {result.bytes / 1024:>8.1f} {result.peak_kib:>9.1f}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as baseline_file:
+                problems = compare(json.load(baseline_file), report, options["tolerance"])
+            if problems:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(problems))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from kitchen import deletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the pending chunked deletions of dish types and cooks, including any a "
+        "restart interrupted, in this process."
+    )
+
+    def handle(self, *args, **options):
+        finished = deletion.resume_unfinished()
+        for job in finished:
+            line = f"{job}: {job.get_status_display().lower()}, {job.removed} of {job.total} rows"
+            self.stdout.write(line + (f" ({job.error})" if job.error else ""))
+        if not finished:
+            self.stdout.write("No pending deletions.")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (see kitchen.jobs) with a pool of worker threads or "
+        "processes, until interrupted or, with --burst, until no job is due."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Worker threads, or processes with --mode process")
+        parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+        parser.add_argument("--threads", type=int, default=1, help="Worker threads per process with --mode process")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds an idle worker waits between polls")
+        parser.add_argument("--burst", action="store_true", help="Stop once no job is due")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["threads"] < 1:
+            raise CommandError("--workers and --threads must be at least 1")
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Queued {requeued} abandoned job(s) again.")
+        self.stdout.write(
+            f"{options['workers']} worker {options['mode']}(s) running {', '.join(sorted(jobs.TASKS))}"
+        )
+        if options["mode"] == "process":
+            jobs.run_processes(options["workers"], options["threads"], options["poll"], options["burst"])
+            return
+        processed = jobs.run_threads(options["workers"], options["poll"], options["burst"])
+        self.stdout.write(f"Ran {processed} job(s).")
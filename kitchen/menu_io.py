@@ -0,0 +1,80 @@
+"""
+Streaming (de)serialization of the menu catalog for import_menu/export_menu.
+
+One record per dish:
+
+    name, description, price, dish_type, cooks, ingredients
+
+In CSV the ``cooks`` (usernames) and ``ingredients`` (names) columns are
+joined with ``LIST_SEPARATOR``; in JSON Lines they are arrays.
+"""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from decimal import Decimal
+from itertools import islice
+
+FIELDS = ("name", "description", "price", "dish_type", "cooks", "ingredients")
+FORMATS = ("csv", "jsonl")
+LIST_SEPARATOR = "|"
+
+
+def guess_format(path: str) -> str:
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _split(value) -> list[str]:
+    if isinstance(value, list):
+        items = value
+    else:
+        items = (value or "").split(LIST_SEPARATOR)
+    return [item.strip() for item in items if item and item.strip()]
+
+
+def normalize(record: dict) -> dict:
+    return {
+        "name": (record.get("name") or "").strip(),
+        "description": record.get("description") or "",
+        "price": Decimal(str(record.get("price") or 0)),
+        "dish_type": (record.get("dish_type") or "").strip(),
+        "cooks": _split(record.get("cooks")),
+        "ingredients": _split(record.get("ingredients")),
+    }
+
+
+def read_records(stream, fmt: str) -> Iterator[dict]:
+    if fmt == "csv":
+        rows = csv.DictReader(stream)
+    else:
+        rows = (json.loads(line) for line in stream if line.strip())
+    for row in rows:
+        yield normalize(row)
+
+
+def write_records(stream, records: Iterable[dict], fmt: str) -> int:
+    written = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(
+                {
+                    **record,
+                    "price": str(record["price"]),
+                    "cooks": LIST_SEPARATOR.join(record["cooks"]),
+                    "ingredients": LIST_SEPARATOR.join(record["ingredients"]),
+                }
+            )
+            written += 1
+    else:
+        for record in records:
+            stream.write(json.dumps({**record, "price": str(record["price"])}) + "\n")
+            written += 1
+    return written
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -1,3 +1,4 @@
+from django.contrib.auth.hashers import make_password
 from django.db import migrations
 
 
@@ -20,8 +21,9 @@ def seed_initial_data(apps, schema_editor):
             is_staff=True,
             is_superuser=True,
             is_active=True,
+            # historical models do not carry AbstractUser methods
+            password=make_password(admin_password),
         )
-        admin.set_password(admin_password)
         admin.save()
 
     # --- dish types ---
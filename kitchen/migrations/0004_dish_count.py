@@ -0,0 +1,49 @@
+# Generated by Django 4.2.10 on 2026-10-18 08:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_dish_counts(apps, schema_editor):
+    Dish = apps.get_model("kitchen", "Dish")
+    sources = {
+        "Cook": (Dish.cooks.through, "cook"),
+        "Ingredient": (Dish.ingredients.through, "ingredient"),
+        "DishType": (Dish, "dish_type"),
+    }
+    for model_name, (table, field) in sources.items():
+        counts = (
+            table.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("*"))
+            .values("total")
+        )
+        apps.get_model("kitchen", model_name).objects.update(dish_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0003_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cook',
+            name='dish_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dishtype',
+            name='dish_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='dish_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_dish_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-18 08:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0004_dish_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dish',
+            name='dish_type',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='dishes', to='kitchen.dishtype'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['-created_at'], name='dish_created_at_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['dish_type', 'name'], name='dish_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['price', 'name'], name='dish_price_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='dish_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dishtype',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='dishtype_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='ingredient_name_lower_idx'),
+        ),
+    ]
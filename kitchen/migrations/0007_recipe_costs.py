@@ -0,0 +1,61 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen', '0006_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dish',
+            name='food_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=9),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='unit',
+            field=models.CharField(choices=[('kg', 'kg'), ('l', 'l'), ('pc', 'piece')], default='kg', max_length=2),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=9),
+        ),
+        # DishIngredient takes over the auto-created through table as is
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='DishIngredient',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('dish', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='kitchen.dish')),
+                        ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='kitchen.ingredient')),
+                    ],
+                    options={
+                        'db_table': 'kitchen_dish_ingredients',
+                        'unique_together': {('dish', 'ingredient')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='dish',
+                    name='ingredients',
+                    field=models.ManyToManyField(blank=True, related_name='dishes', through='kitchen.DishIngredient', to='kitchen.ingredient'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dishingredient',
+            name='quantity',
+            field=models.DecimalField(decimal_places=3, default=1, max_digits=9),
+        ),
+        migrations.AddField(
+            model_name='dishingredient',
+            name='unit',
+            field=models.CharField(blank=True, choices=[('', "ingredient's unit"), ('g', 'g'), ('kg', 'kg'), ('ml', 'ml'), ('l', 'l'), ('pc', 'piece')], default='', max_length=2),
+        ),
+    ]
@@ -1,11 +1,49 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Lower
+
+# ``name__lower="..."`` compiles to LOWER(name) = ..., which the Lower("name")
+# indexes below serve (``iexact`` does not use them on every backend)
+models.CharField.register_lookup(Lower)
+
+
+class DishCountMixin(models.Model):
+    """
+    Number of dishes using the row, kept up to date by ``kitchen.signals``.
 
+    Saving a loaded instance never writes ``dish_count`` (nor
+    ``pending_deletion``, set by ``kitchen.deletion``): the in-memory value
+    may be older than the one maintained in the database.
+    """
+
+    # maintained in the database, never written from a loaded instance
+    MAINTAINED_FIELDS = ("dish_count", "pending_deletion")
+
+    dish_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
 
-class Cook(AbstractUser):
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class Cook(DishCountMixin, AbstractUser):
     """Custom user representing a cook in the restaurant."""
 
     years_of_experience = models.PositiveIntegerField(default=0)
+    # being removed by ``kitchen.deletion``
+    pending_deletion = models.BooleanField(default=False, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["username"]
@@ -17,21 +55,35 @@ class Cook(AbstractUser):
         return self.username
 
 
-class DishType(models.Model):
+class DishType(DishCountMixin, models.Model):
     name = models.CharField(max_length=255, unique=True)
+    # being removed by ``kitchen.deletion``
+    pending_deletion = models.BooleanField(default=False, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [models.Index(Lower("name"), name="dishtype_name_lower_idx")]
 
     def __str__(self) -> str:
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(DishCountMixin, models.Model):
+    class Unit(models.TextChoices):
+        KILOGRAM = "kg", "kg"
+        LITRE = "l", "l"
+        PIECE = "pc", "piece"
+
     name = models.CharField(max_length=255, unique=True)
+    # what one ``unit`` costs; recipe quantities are converted to it
+    unit = models.CharField(max_length=2, choices=Unit.choices, default=Unit.KILOGRAM)
+    unit_cost = models.DecimalField(max_digits=9, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [models.Index(Lower("name"), name="ingredient_name_lower_idx")]
 
     def __str__(self) -> str:
         return self.name
@@ -42,14 +94,209 @@ class Dish(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=7, decimal_places=2, default=0)
 
-    dish_type = models.ForeignKey(DishType, on_delete=models.CASCADE, related_name="dishes")
+    # indexed through dish_type_name_idx, which leads with dish_type
+    dish_type = models.ForeignKey(DishType, on_delete=models.CASCADE, related_name="dishes", db_index=False)
     cooks = models.ManyToManyField(Cook, related_name="dishes", blank=True)
-    ingredients = models.ManyToManyField(Ingredient, related_name="dishes", blank=True)
+    ingredients = models.ManyToManyField(Ingredient, related_name="dishes", blank=True, through="DishIngredient")
+    # sum of the recipe's ingredient costs, kept up to date by ``kitchen.costing``
+    food_cost = models.DecimalField(max_digits=9, decimal_places=2, default=0, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # dashboard "latest dishes"
+            models.Index(fields=["-created_at"], name="dish_created_at_desc_idx"),
+            # filters on type / price, read in the default (name) order
+            models.Index(fields=["dish_type", "name"], name="dish_type_name_idx"),
+            models.Index(fields=["price", "name"], name="dish_price_name_idx"),
+            # case-insensitive lookups: filter(name__lower=...)
+            models.Index(Lower("name"), name="dish_name_lower_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
+
+    def save(self, *args, **kwargs):
+        # like ``dish_count``: the loaded ``food_cost`` may be older than the database's
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "food_cost"
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def margin(self) -> Decimal:
+        return self.price - self.food_cost
+
+    @property
+    def margin_percent(self) -> Decimal | None:
+        """Margin as a percentage of the price; ``None`` for free dishes."""
+        if not self.price:
+            return None
+        return (self.margin * 100 / self.price).quantize(Decimal("0.1"))
+
+
+class DishIngredient(models.Model):
+    """A recipe line: how much of an ingredient one portion of a dish uses."""
+
+    class Unit(models.TextChoices):
+        INGREDIENT = "", "ingredient's unit"
+        GRAM = "g", "g"
+        KILOGRAM = "kg", "kg"
+        MILLILITRE = "ml", "ml"
+        LITRE = "l", "l"
+        PIECE = "pc", "piece"
+
+    # recipe unit -> (ingredient unit it converts to, factor)
+    CONVERSIONS = {
+        Unit.GRAM: (Ingredient.Unit.KILOGRAM, Decimal("0.001")),
+        Unit.KILOGRAM: (Ingredient.Unit.KILOGRAM, Decimal(1)),
+        Unit.MILLILITRE: (Ingredient.Unit.LITRE, Decimal("0.001")),
+        Unit.LITRE: (Ingredient.Unit.LITRE, Decimal(1)),
+        Unit.PIECE: (Ingredient.Unit.PIECE, Decimal(1)),
+    }
+
+    # the table of the former auto-created through model, hence the names
+    dish = models.ForeignKey(Dish, on_delete=models.CASCADE)
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    quantity = models.DecimalField(max_digits=9, decimal_places=3, default=1)
+    unit = models.CharField(max_length=2, choices=Unit.choices, default=Unit.INGREDIENT, blank=True)
+
+    class Meta:
+        db_table = "kitchen_dish_ingredients"
+        unique_together = [("dish", "ingredient")]
+
+    def __str__(self) -> str:
+        return f"{self.quantity} {self.unit or self.ingredient.unit} {self.ingredient}"
+
+    def clean(self):
+        if self.unit and self.ingredient_id and self.CONVERSIONS[self.unit][0] != self.ingredient.unit:
+            raise ValidationError({"unit": f"{self.ingredient} is costed per {self.ingredient.get_unit_display()}."})
+
+
+class Order(models.Model):
+    """A ticket from the floor; its items are routed to cooks by ``kitchen.dispatch``."""
+
+    reference = models.CharField(max_length=64, blank=True, help_text="Table or ticket number.")
+    # higher first
+    priority = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return self.reference or f"Order #{self.pk}"
+
+
+class OrderItem(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        ASSIGNED = "assigned", "Assigned"
+        DONE = "done", "Done"
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    dish = models.ForeignKey(Dish, on_delete=models.CASCADE, related_name="order_items")
+    quantity = models.PositiveSmallIntegerField(default=1)
+    cook = models.ForeignKey(
+        Cook, on_delete=models.SET_NULL, null=True, blank=True, related_name="order_items"
+    )
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            # dispatcher start-up: open load per cook, then the queued backlog
+            models.Index(fields=["status", "cook"], name="orderitem_status_cook_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.quantity} x {self.dish}"
+
+
+class Deletion(models.Model):
+    """A dish type or cook being deleted in batches by ``kitchen.deletion``, with its progress."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    # model label, e.g. "kitchen.DishType"
+    target = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    object_repr = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    # dependent rows to remove, and removed so far
+    total = models.PositiveIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(Cook, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status"], name="deletion_status_idx")]
+
+    def __str__(self) -> str:
+        return f"Deleting {self.object_repr}"
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    @property
+    def percent(self) -> int:
+        if self.status == self.Status.DONE:
+            return 100
+        return min(self.removed * 100 // self.total, 99) if self.total else 0
+
+
+class Job(models.Model):
+    """A unit of deferred work, run by ``manage.py run_workers``; see ``kitchen.jobs``."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+        CANCELLED = "cancelled", "Cancelled"
+
+    # registered task name, e.g. "kitchen.bulk_edit"
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    # higher first
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # not claimed before this; pushed back after a failed attempt
+    run_after = models.DateTimeField()
+    worker = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # workers: the next queued job by priority, then due time
+            models.Index(fields=["status", "-priority", "run_after"], name="job_queue_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.pk}"
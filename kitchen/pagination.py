@@ -0,0 +1,205 @@
+"""
+Keyset (cursor) pagination for the list views.
+
+Offset pagination runs ``COUNT(*)`` plus ``OFFSET n`` on every page, so deep
+pages get linearly slower. Keyset pagination seeks from the last row seen
+instead, using the list ordering plus ``pk`` as a tie-breaker, so every page
+costs the same. Cursors are signed, opaque tokens.
+
+Configured through settings:
+- ``KITCHEN_PAGINATION_MODE``: "offset" (default) or "keyset"
+- ``KITCHEN_PAGINATION_COUNT``: "exact" (default), "estimate" or "none"
+"""
+
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = "kitchen.pagination.cursor"
+
+
+def estimate_count(queryset) -> int | None:
+    """Planner row estimate for ``queryset`` (Postgres only), ``None`` elsewhere."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not self._has_next:
+            return None
+        return self.paginator.make_cursor(self.object_list[-1], "next")
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if not self._has_previous:
+            return None
+        return self.paginator.make_cursor(self.object_list[0], "prev")
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by seeking on ``(ordering_field, pk)``.
+
+    ``ordering_field`` may be prefixed with "-" for descending order. Its
+    values must be JSON serializable (names, numbers).
+    """
+
+    def __init__(self, queryset, per_page: int, ordering_field: str, count_mode: str = "exact"):
+        self.descending = ordering_field.startswith("-")
+        self.field = ordering_field.lstrip("-")
+        self.queryset = queryset.order_by(*self._ordering(reverse=False))
+        self.per_page = int(per_page)
+        self.count_mode = count_mode
+
+    def _ordering(self, reverse: bool) -> list[str]:
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        return [f"{prefix}{self.field}", f"{prefix}pk"]
+
+    def _seek(self, value, pk, reverse: bool) -> Q:
+        lookup = "lt" if self.descending != reverse else "gt"
+        # The redundant inclusive bound lets the database range-scan the
+        # ordering index instead of evaluating the OR for every row.
+        return Q(**{f"{self.field}__{lookup}e": value}) & (
+            Q(**{f"{self.field}__{lookup}": value}) | Q(**{self.field: value, f"pk__{lookup}": pk})
+        )
+
+    def make_cursor(self, obj, direction: str) -> str:
+        return signing.dumps(
+            {"v": getattr(obj, self.field), "pk": obj.pk, "d": direction},
+            salt=CURSOR_SALT,
+            compress=True,
+        )
+
+    def decode_cursor(self, cursor: str | None) -> dict | None:
+        if not cursor:
+            return None
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(data, dict) or data.get("d") not in ("next", "prev"):
+            return None
+        return data
+
+    @cached_property
+    def count(self) -> int | None:
+        """Total rows according to ``count_mode``; ``None`` when unknown."""
+        if self.count_mode == "exact":
+            return self.queryset.count()
+        if self.count_mode == "estimate":
+            return estimate_count(self.queryset)
+        return None
+
+    @property
+    def count_is_estimate(self) -> bool:
+        return self.count_mode == "estimate"
+
+    def page(self, cursor: str | None) -> KeysetPage:
+        data = self.decode_cursor(cursor)
+        if data is None:
+            rows = list(self.queryset[: self.per_page + 1])
+            return KeysetPage(rows[: self.per_page], self, len(rows) > self.per_page, False)
+
+        backwards = data["d"] == "prev"
+        queryset = self.queryset.filter(self._seek(data["v"], data["pk"], reverse=backwards))
+        if backwards:
+            queryset = queryset.order_by(*self._ordering(reverse=True))
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, True, has_more)
+        return KeysetPage(rows, self, has_more, True)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin switching to keyset pagination when it is enabled.
+
+    Falls back to the regular paginator when the queryset is not in its
+    default ordering (e.g. ranked search results).
+    """
+
+    pagination_mode = None
+    pagination_count = None
+    cursor_kwarg = "cursor"
+
+    def get_pagination_mode(self) -> str:
+        return self.pagination_mode or getattr(settings, "KITCHEN_PAGINATION_MODE", "offset")
+
+    def get_pagination_count(self) -> str:
+        return self.pagination_count or getattr(settings, "KITCHEN_PAGINATION_COUNT", "exact")
+
+    def get_keyset_field(self, queryset) -> str | None:
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if not ordering or len(ordering) > 2 or ordering[1:] not in ([], ["pk"]):
+            return None
+        field = ordering[0]
+        if not isinstance(field, str):
+            return None
+        # Annotations such as a search rank can't be seeked on.
+        name = field.lstrip("-")
+        if name != "pk":
+            try:
+                queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+        return field
+
+    def paginate_queryset(self, queryset, page_size):
+        field = self.get_keyset_field(queryset)
+        if self.get_pagination_mode() != "keyset" or field is None:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, field, count_mode=self.get_pagination_count())
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # search/filter/sort parameters the page links must carry along
+        params = self.request.GET.copy()
+        for name in (self.page_kwarg, self.cursor_kwarg):
+            params.pop(name, None)
+        context["pagination_query"] = params.urlencode()
+        if isinstance(context.get("paginator"), KeysetPaginator):
+            context["pagination_template"] = "includes/cursor_pagination.html"
+        return context
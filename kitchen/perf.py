@@ -0,0 +1,128 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` (enabled with ``KITCHEN_PERF_INSTRUMENTATION``)
+measures for every request:
+
+- ``sql``: number of queries, total SQL time and duplicated queries (the
+  same SQL with the same parameters run more than once, usually an N+1)
+- ``session``: the part of the SQL time spent on the session table
+- ``tpl``: template rendering time, without the SQL run lazily from templates
+- ``total``: wall time spent below the middleware
+
+It reports them in a ``Server-Timing`` header (visible in the browser dev
+tools) and as one JSON log line per request on the ``kitchen.perf`` logger,
+which ``perf_report`` aggregates into percentiles per URL name.
+"""
+
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("kitchen.perf")
+
+SESSION_TABLE = "django_session"
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook timing every query of the current request."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.session_time = 0.0
+        self.statements: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.time += elapsed
+            if SESSION_TABLE in sql:
+                self.session_time += elapsed
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self) -> int:
+        return sum(seen - 1 for seen in self.statements.values())
+
+    def most_duplicated(self) -> str | None:
+        if not self.duplicates:
+            return None
+        (sql, _params), _seen = self.statements.most_common(1)[0]
+        return sql
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile of an ascending list."""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "KITCHEN_PERF_INSTRUMENTATION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request._perf = {"recorder": recorder, "template": 0.0}
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        metrics = {
+            "view": request.resolver_match.view_name if request.resolver_match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "sql_count": recorder.count,
+            "sql_ms": round(recorder.time * 1000, 2),
+            "sql_duplicates": recorder.duplicates,
+            "session_ms": round(recorder.session_time * 1000, 2),
+            "template_ms": round(request._perf["template"] * 1000, 2),
+            "bytes": None if response.streaming else len(response.content),
+        }
+        response["Server-Timing"] = ", ".join(
+            [
+                f'sql;dur={metrics["sql_ms"]};desc="{recorder.count} queries, {recorder.duplicates} duplicates"',
+                f"session;dur={metrics['session_ms']}",
+                f"tpl;dur={metrics['template_ms']}",
+                f"total;dur={metrics['total_ms']}",
+            ]
+        )
+        if recorder.duplicates:
+            metrics["duplicated_sql"] = recorder.most_duplicated()[:500]
+        logger.info(json.dumps(metrics))
+        return response
+
+    def process_template_response(self, request, response):
+        # being the outermost middleware, this runs right before rendering
+        recorder = request._perf["recorder"]
+        started = time.perf_counter()
+        sql_before = recorder.time
+
+        def measure(rendered):
+            elapsed = time.perf_counter() - started
+            request._perf["template"] += elapsed - (recorder.time - sql_before)
+
+        response.add_post_render_callback(measure)
+        return response
@@ -0,0 +1,212 @@
+"""
+Pluggable search layer for the kitchen list views.
+
+Backends:
+- ``IContainsSearchBackend`` - the original ``icontains`` filter (works everywhere)
+- ``SQLiteFTSSearchBackend`` - FTS5 external-content tables kept in sync by triggers
+- ``PostgresSearchBackend`` - generated ``tsvector`` columns with GIN indexes
+
+The backend is picked from ``settings.KITCHEN_SEARCH_BACKEND``
+("auto", "icontains", "sqlite_fts" or "postgres"). The index structures are
+created (idempotently) by ``install_search_indexes`` on ``post_migrate``.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Model label -> text columns that take part in search.
+SEARCH_FIELDS: dict[str, tuple[str, ...]] = {
+    "kitchen.Dish": ("name", "description"),
+    "kitchen.Cook": ("username", "first_name", "last_name"),
+    "kitchen.Ingredient": ("name",),
+    "kitchen.DishType": ("name",),
+}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    table: str
+    pk_column: str
+    columns: tuple[str, ...]
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+
+def get_search_index(model: type[models.Model]) -> SearchIndex:
+    columns = SEARCH_FIELDS[model._meta.label]
+    return SearchIndex(
+        table=model._meta.db_table,
+        pk_column=model._meta.pk.column,
+        columns=tuple(model._meta.get_field(name).column for name in columns),
+    )
+
+
+def tokenize(query: str) -> list[str]:
+    return TOKEN_RE.findall(query.lower())
+
+
+class IContainsSearchBackend:
+    """Substring match over the configured fields, no ranking."""
+
+    name = "icontains"
+
+    def search(self, queryset: models.QuerySet, query: str) -> models.QuerySet:
+        condition = Q()
+        for field in SEARCH_FIELDS[queryset.model._meta.label]:
+            condition |= Q(**{f"{field}__icontains": query})
+        return queryset.filter(condition)
+
+    def install(self, using: str = "default") -> None:
+        pass
+
+
+class SQLiteFTSSearchBackend(IContainsSearchBackend):
+    """
+    Prefix search through FTS5, ranked by ``bm25``.
+
+    Every token of the query must match the start of a word, so "chick soup"
+    finds "Chicken Soup". Queries without word characters fall back to
+    ``icontains``.
+    """
+
+    name = "sqlite_fts"
+
+    def search(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return super().search(queryset, query)
+
+        index = get_search_index(queryset.model)
+        fts = index.fts_table
+        match = " ".join(f'"{token}"*' for token in tokens)
+        # Join the FTS table instead of correlating a bm25() subquery per row:
+        # SQLite runs the MATCH once and looks the rows up by rowid. RawSQL
+        # can't add a table to FROM, and the correlated form re-runs the MATCH
+        # for every candidate (minutes rather than ~150 ms on 100k dishes), so
+        # this is the one place that still needs extra().
+        return queryset.extra(
+            tables=[fts],
+            where=[f'{fts}.rowid = "{index.table}"."{index.pk_column}"', f"{fts} MATCH %s"],
+            params=[match],
+            select={"search_rank": f"bm25({fts})"},
+        ).order_by("search_rank", "pk")  # bm25 is "lower is better"
+
+    def install(self, using="default"):
+        from django.db import connections
+
+        with connections[using].cursor() as cursor:
+            for model_label in SEARCH_FIELDS:
+                index = get_search_index(apps.get_model(model_label))
+                self._install_index(cursor, index)
+
+    @staticmethod
+    def _install_index(cursor, index: SearchIndex) -> None:
+        cols = ", ".join(index.columns)
+        new_cols = ", ".join(f"new.{col}" for col in index.columns)
+        old_cols = ", ".join(f"old.{col}" for col in index.columns)
+        fts = index.fts_table
+        insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{index.pk_column}, {new_cols});"
+        delete_old = (
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+            f"VALUES ('delete', old.{index.pk_column}, {old_cols});"
+        )
+        # Table rebuilds done by SQLite migrations drop the triggers, so only
+        # rebuild the index when something had to be (re)created.
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [fts, f"{fts}_ai", f"{fts}_ad", f"{fts}_au"],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if len(existing) == 4:
+            return
+
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{cols}, content='{index.table}', content_rowid='{index.pk_column}', prefix='2 3')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {index.table} BEGIN {insert_new} END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {index.table} BEGIN {delete_old} END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {index.table} "
+            f"BEGIN {delete_old} {insert_new} END"
+        )
+        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+class PostgresSearchBackend(IContainsSearchBackend):
+    """Prefix search through a generated ``tsvector`` column, ranked by ``ts_rank``."""
+
+    name = "postgres"
+    column = "search_vector"
+    config = "simple"
+
+    def search(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return super().search(queryset, query)
+
+        index = get_search_index(queryset.model)
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        vector = f'"{index.table}"."{self.column}"'
+        matches = RawSQL(
+            f"{vector} @@ to_tsquery('{self.config}', %s)",
+            (tsquery,),
+            output_field=models.BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({vector}, to_tsquery('{self.config}', %s))",
+            (tsquery,),
+            output_field=models.FloatField(),
+        )
+        return queryset.filter(matches).annotate(search_rank=rank).order_by("-search_rank", "pk")
+
+    def install(self, using="default"):
+        from django.db import connections
+
+        with connections[using].cursor() as cursor:
+            for model_label in SEARCH_FIELDS:
+                index = get_search_index(apps.get_model(model_label))
+                document = " || ' ' || ".join(f"coalesce({col}, '')" for col in index.columns)
+                cursor.execute(
+                    f"ALTER TABLE {index.table} ADD COLUMN IF NOT EXISTS {self.column} tsvector "
+                    f"GENERATED ALWAYS AS (to_tsvector('{self.config}', {document})) STORED"
+                )
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index.table}_{self.column}_gin "
+                    f"ON {index.table} USING GIN ({self.column})"
+                )
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (IContainsSearchBackend, SQLiteFTSSearchBackend, PostgresSearchBackend)
+}
+
+
+def get_search_backend(vendor: str | None = None) -> IContainsSearchBackend:
+    name = getattr(settings, "KITCHEN_SEARCH_BACKEND", "auto")
+    if name == "auto":
+        vendor = vendor or connection.vendor
+        name = {"sqlite": "sqlite_fts", "postgresql": "postgres"}.get(vendor, "icontains")
+    return BACKENDS[name]()
+
+
+def install_search_indexes(sender=None, using="default", **kwargs) -> None:
+    """``post_migrate`` receiver creating the index structures for the active backend."""
+    from django.db import connections
+
+    get_search_backend(connections[using].vendor).install(using)
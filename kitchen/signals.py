@@ -0,0 +1,149 @@
+"""
+Model signal receivers that keep denormalized data consistent.
+
+``Dish.updated_at`` only changes on ``save()``; editing a dish's cooks or
+ingredients goes through the M2M through tables, so those changes touch
+the affected dishes here.
+
+``dish_count`` on cooks, ingredients and dish types is adjusted with
+``UPDATE ... SET dish_count = dish_count ± n`` inside the transaction that
+changes the relation, so concurrent edits cannot lose increments. Writes that
+bypass signals (``bulk_create``, raw SQL, ``loaddata``) need a
+``reconcile_dish_counts`` afterwards.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+
+from kitchen.models import Dish, DishType, Ingredient
+
+
+def touch_dishes(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # clearing from the cook/ingredient side has no pk_set, so touch the
+        # dishes before their rows go away
+        dishes = instance.dishes.all()
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            dishes = Dish.objects.filter(pk=instance.pk)
+        elif pk_set:
+            dishes = Dish.objects.filter(pk__in=pk_set)
+        else:
+            return
+    else:
+        return
+    dishes.update(updated_at=timezone.now())
+
+
+def counted_relations() -> dict:
+    """Counted model -> (table referencing dishes, its column pointing at the model)."""
+    return {
+        get_user_model(): (Dish.cooks.through, "cook"),
+        Ingredient: (Dish.ingredients.through, "ingredient"),
+        DishType: (Dish, "dish_type"),
+    }
+
+
+def count_dishes(model):
+    """Correlated ``COUNT`` of the dishes using each outer ``model`` row."""
+    table, field = counted_relations()[model]
+    counts = (
+        table.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_dish_counts(dry_run: bool = False) -> dict[str, int]:
+    """Recount ``dish_count`` everywhere; returns the number of drifted rows per model."""
+    drifted = {}
+    for model in counted_relations():
+        stale = model._default_manager.annotate(actual=count_dishes(model)).exclude(dish_count=F("actual"))
+        drifted[model._meta.label] = stale.count()
+        if drifted[model._meta.label] and not dry_run:
+            model._default_manager.filter(pk__in=stale.values("pk")).update(dish_count=count_dishes(model))
+    return drifted
+
+
+def _change_dish_count(queryset, delta: int) -> None:
+    if delta > 0:
+        queryset.update(dish_count=F("dish_count") + delta)
+    elif delta < 0:
+        # never fail a user's edit over a counter that already drifted
+        queryset.update(dish_count=Greatest(F("dish_count") + delta, 0))
+
+
+def count_m2m_dishes(sender, instance, action, reverse, pk_set, **kwargs):
+    model, field = next(
+        (model, field) for model, (table, field) in counted_relations().items() if table is sender
+    )
+    column = f"{field}_id"
+    if not reverse:
+        # instance is a dish, pk_set holds cooks/ingredients; post_add only
+        # reports links that did not exist yet, removals report every
+        # requested pk, so count the existing links before they go away
+        if action == "post_add" and pk_set:
+            _change_dish_count(model.objects.filter(pk__in=pk_set), 1)
+        elif action in ("pre_remove", "pre_clear"):
+            links = sender.objects.filter(dish_id=instance.pk)
+            if action == "pre_remove":
+                links = links.filter(**{f"{column}__in": pk_set or ()})
+            _change_dish_count(model.objects.filter(pk__in=links.values(column)), -1)
+        return
+
+    counted = model.objects.filter(pk=instance.pk)
+    if action == "post_add" and pk_set:
+        _change_dish_count(counted, len(pk_set))
+    elif action == "pre_remove" and pk_set:
+        _change_dish_count(counted, -sender.objects.filter(**{column: instance.pk, "dish_id__in": pk_set}).count())
+    elif action == "post_clear":
+        counted.update(dish_count=0)
+
+
+def remember_dish_type(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_dish_type_id = None
+    if raw or instance._state.adding or (update_fields is not None and "dish_type" not in update_fields):
+        return
+    instance._previous_dish_type_id = (
+        Dish.objects.filter(pk=instance.pk).values_list("dish_type_id", flat=True).first()
+    )
+
+
+def count_saved_dish(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_dish_type_id", None)
+    if created:
+        _change_dish_count(DishType.objects.filter(pk=instance.dish_type_id), 1)
+    elif previous is not None and previous != instance.dish_type_id:
+        _change_dish_count(DishType.objects.filter(pk=previous), -1)
+        _change_dish_count(DishType.objects.filter(pk=instance.dish_type_id), 1)
+
+
+def uncount_deleted_dish(sender, instance, **kwargs):
+    # the through rows are cascade-deleted without m2m_changed signals
+    for model, (table, field) in counted_relations().items():
+        if table is not Dish:
+            links = table.objects.filter(dish_id=instance.pk).values(f"{field}_id")
+            _change_dish_count(model.objects.filter(pk__in=links), -1)
+
+
+def uncount_dish_type(sender, instance, **kwargs):
+    _change_dish_count(DishType.objects.filter(pk=instance.dish_type_id), -1)
+
+
+def connect_signals() -> None:
+    for through in (Dish.cooks.through, Dish.ingredients.through):
+        uid = through._meta.label_lower
+        m2m_changed.connect(touch_dishes, sender=through, dispatch_uid=f"touch-dishes-{uid}")
+        m2m_changed.connect(count_m2m_dishes, sender=through, dispatch_uid=f"dish-count-{uid}")
+    pre_save.connect(remember_dish_type, sender=Dish, dispatch_uid="dish-count-pre-save")
+    post_save.connect(count_saved_dish, sender=Dish, dispatch_uid="dish-count-save")
+    pre_delete.connect(uncount_deleted_dish, sender=Dish, dispatch_uid="dish-count-pre-delete")
+    post_delete.connect(uncount_dish_type, sender=Dish, dispatch_uid="dish-count-delete")
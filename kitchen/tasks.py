@@ -0,0 +1,52 @@
+"""
+Tasks the job queue can run (``kitchen.jobs``), registered by
+``KitchenConfig.ready`` so every worker knows them. Arguments and results
+must be JSON-serializable.
+"""
+
+from django.core.management import call_command
+
+from kitchen import bulk, costing, counters, deletion, jobs
+from kitchen.models import Deletion
+from kitchen.signals import reconcile_dish_counts
+
+
+def bulk_edit(dish_ids: list[int], **params) -> int:
+    """A ``kitchen.bulk`` operation; ``params`` as made by ``bulk.params``."""
+    return bulk.run(dish_ids, **params)
+
+
+def delete(deletion_id: int) -> dict:
+    """``deletion.run``, raising when it fails so that the job is retried."""
+    # a retry resumes the failed deletion where it stopped
+    Deletion.objects.filter(pk=deletion_id, status=Deletion.Status.FAILED).update(
+        status=Deletion.Status.PENDING, error="", finished_at=None
+    )
+    record = deletion.run(deletion_id, resume=True)
+    if record.status == Deletion.Status.FAILED:
+        raise RuntimeError(f"Deleting {record} failed: {record.error}")
+    return {"status": record.status, "removed": record.removed}
+
+
+def recount() -> dict:
+    """Recount every ``dish_count`` and the dashboard totals."""
+    drifted = reconcile_dish_counts()
+    return {"drifted": drifted, "totals": counters.rebuild()}
+
+
+def reprice() -> int:
+    return costing.reprice()
+
+
+def export_menu(path: str, format: str | None = None) -> str:
+    args = [path] + ([f"--format={format}"] if format else [])
+    call_command("export_menu", *args)
+    return path
+
+
+def register() -> None:
+    jobs.register("kitchen.bulk_edit", bulk_edit)
+    jobs.register("kitchen.delete", delete)
+    jobs.register("kitchen.recount", recount)
+    jobs.register("kitchen.reprice", reprice)
+    jobs.register("kitchen.export_menu", export_menu)
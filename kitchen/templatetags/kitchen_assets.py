@@ -0,0 +1,66 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from kitchen import assets
+
+register = template.Library()
+
+# critical CSS read from disk, kept outside DEBUG
+_inlined: dict[str, str] = {}
+
+
+def _find(path: str) -> str | None:
+    """Filesystem path of a static file, collected or not."""
+    if staticfiles_storage.exists(path):
+        return staticfiles_storage.path(path)
+    return finders.find(path)
+
+
+def _urls(bundle: str) -> list[str]:
+    # before build_assets has run, link whichever sources exist
+    if _find(bundle):
+        return [static(bundle)]
+    return [static(source) for source in assets.BUNDLES[bundle] if _find(source)]
+
+
+def _critical_css() -> str:
+    if assets.CRITICAL_CSS not in _inlined or settings.DEBUG:
+        path = _find(assets.CRITICAL_CSS)
+        if path is None:
+            return ""
+        with open(path, encoding="utf-8") as file:
+            _inlined[assets.CRITICAL_CSS] = file.read()
+    return _inlined[assets.CRITICAL_CSS]
+
+
+@register.simple_tag
+def bundle_css():
+    """
+    The CSS bundle. With ``KITCHEN_INLINE_CRITICAL_CSS`` the critical rules
+    are inlined and the bundle is preloaded, so it does not block rendering.
+    """
+    urls = _urls(assets.CSS_BUNDLE)
+    critical = _critical_css() if getattr(settings, "KITCHEN_INLINE_CRITICAL_CSS", False) else ""
+    if not critical:
+        return format_html_join("\n", '<link rel="stylesheet" href="{}">', ((url,) for url in urls))
+    return format_html(
+        "<style>{}</style>\n{}\n<noscript>{}</noscript>",
+        # built from our own static files; "</" cannot close the element early
+        mark_safe(critical.replace("</", "<\\/")),
+        format_html_join(
+            "\n",
+            '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">',
+            ((url,) for url in urls),
+        ),
+        format_html_join("", '<link rel="stylesheet" href="{}">', ((url,) for url in urls)),
+    )
+
+
+@register.simple_tag
+def bundle_js():
+    return format_html_join("\n", '<script src="{}"></script>', ((url,) for url in _urls(assets.JS_BUNDLE)))
@@ -0,0 +1,46 @@
+from django import template
+from django.core.cache import cache
+
+from kitchen.caching import cache_timeout, make_key, record
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, dependencies):
+        self.nodelist = nodelist
+        self.name = name
+        self.dependencies = dependencies
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        labels = [dependency.resolve(context) for dependency in self.dependencies]
+        request = context.get("request")
+        path = request.get_full_path() if request is not None else ""
+        key = make_key("fragment", name, labels, path)
+
+        content = cache.get(key)
+        record("fragment", hit=content is not None)
+        if content is None:
+            content = self.nodelist.render(context)
+            if cache_timeout():
+                cache.set(key, content, cache_timeout())
+        return content
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache the enclosed template part per request path until one of the
+    listed models changes::
+
+        {% cachefragment "dish-table" "kitchen.Dish" "kitchen.Cook" %}
+          ...
+        {% endcachefragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' needs a fragment name")
+    nodelist = parser.parse(("endcachefragment",))
+    parser.delete_first_token()
+    return CacheFragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(b) for b in bits[2:]])
@@ -0,0 +1,76 @@
+"""
+Test helpers for keeping the number of SQL queries per view under control.
+
+``query_budget`` works as a context manager or a decorator and fails when
+the wrapped code runs more than ``max_queries`` queries:
+
+    with query_budget(8):
+        client.get(url)
+
+    @query_budget(8)
+    def test_dish_list(self): ...
+
+``TestRunner`` (the project's ``TEST_RUNNER``) moves the file cache to a
+temporary directory for the run, so tests calling ``cache.clear()`` don't
+wipe the generations, counters and sessions of a dev server on the host.
+"""
+
+import tempfile
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    def __init__(self, max_queries: int, using: str = DEFAULT_DB_ALIAS):
+        self.max_queries = max_queries
+        self.using = using
+        self.context = None
+
+    def __enter__(self) -> CaptureQueriesContext:
+        self.context = CaptureQueriesContext(connections[self.using])
+        return self.context.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.max_queries:
+            queries = "\n".join(
+                f"{number}. {query['sql']}" for number, query in enumerate(self.context.captured_queries, start=1)
+            )
+            raise QueryBudgetExceeded(
+                f"{executed} queries executed, budget is {self.max_queries}:\n{queries}"
+            )
+        return False
+
+
+class TestRunner(DiscoverRunner):
+    """``DiscoverRunner`` with a file cache of the test run's own."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_settings = None
+        default = settings.CACHES["default"]
+        # the database cache lives in the test database, locmem in the process
+        if default["BACKEND"] != "django.core.cache.backends.filebased.FileBasedCache":
+            return
+        self.cache_dir = tempfile.TemporaryDirectory(prefix="kitchen_cache_test_")
+        self.cache_settings = override_settings(
+            CACHES={**settings.CACHES, "default": {**default, "LOCATION": self.cache_dir.name}}
+        )
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        if self.cache_settings is not None:
+            self.cache_settings.disable()
+            self.cache_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,1555 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from itertools import count
+from pathlib import Path
+from urllib.parse import quote
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import QueryDict
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+
+from kitchen import assets, async_views, auth, bulk, caching, costing, counters, db, deletion, dispatch, facets, impact, jobs, live, pagination, search
+from kitchen import urls as kitchen_urls
+from kitchen.benchmarks import CatalogSize, generate, get_routes, scratch_cache
+from kitchen.management.commands import load_test
+from kitchen.models import Deletion, Dish, DishIngredient, DishType, Ingredient, Job, Order, OrderItem
+from kitchen.testing import QueryBudgetExceeded, query_budget
+from kitchen_service import urls as kitchen_service_urls
+
+QUERY_BUDGET = 15
+
+
+@override_settings(KITCHEN_SEARCH_BACKEND="sqlite_fts")
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="search-chef")
+        cls.soup = DishType.objects.create(name="Search soup")
+        cls.chicken = Dish.objects.create(name="Chicken noodle soup", description="Clear broth", dish_type=cls.soup, price="6.00")
+        cls.surf = Dish.objects.create(name="Surf-and-turf", description="", dish_type=cls.soup, price="20.00")
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, queryset=None):
+        queryset = queryset if queryset is not None else Dish.objects.filter(dish_type=self.soup)
+        return list(search.get_search_backend().search(queryset, query))
+
+    def indexed(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT rowid FROM kitchen_dish_fts WHERE kitchen_dish_fts MATCH %s", [query])
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_every_token_matches_a_word_prefix(self):
+        self.assertEqual(self.search("chick sou"), [self.chicken])
+        self.assertEqual(self.search("chick broth"), [self.chicken])
+        self.assertEqual(self.search("chick pie"), [])
+        self.assertEqual(self.search("icken"), [])
+
+    def test_index_follows_insert_update_and_delete(self):
+        dish = Dish.objects.create(name="Saffron risotto", dish_type=self.soup, price="12.00")
+        self.assertEqual(self.indexed("saffron"), [dish.pk])
+
+        Dish.objects.filter(pk=dish.pk).update(name="Lemon risotto")
+        self.assertEqual(self.indexed("saffron"), [])
+        self.assertEqual(self.indexed("lemon"), [dish.pk])
+
+        dish.delete()
+        self.assertEqual(self.indexed("lemon"), [])
+        self.assertEqual(self.indexed("risotto"), [])
+
+    def test_ranked_by_bm25(self):
+        passing = Dish.objects.create(
+            name="Beef stew",
+            description="Slow cooked with carrots, onions, thyme and a little pepper",
+            dish_type=self.soup,
+            price="14.00",
+        )
+        pepper = Dish.objects.create(name="Pepper soup", description="Pepper, pepper", dish_type=self.soup, price="7.00")
+        self.assertEqual(self.search("pepper"), [pepper, passing])
+        self.assertEqual(self.search("pepper", Dish.objects.filter(price__gt=10)), [passing])
+        self.assertEqual(self.search("pepper", Dish.objects.none()), [])
+
+    def test_punctuation_only_query_falls_back_to_icontains(self):
+        self.assertEqual(self.search("-"), [self.surf])
+        self.assertEqual(self.search("%"), [])
+
+    @override_settings(KITCHEN_SEARCH_BACKEND="icontains")
+    def test_icontains_backend(self):
+        self.assertIsInstance(search.get_search_backend(), search.IContainsSearchBackend)
+        self.assertEqual(self.search("icken noo"), [self.chicken])
+        self.assertEqual(self.search("BROTH"), [self.chicken])
+
+    def test_list_view_keeps_the_ranking(self):
+        self.client.force_login(self.user)
+        Dish.objects.create(name="Chicken pie", description="Chicken, chicken", dish_type=self.soup, price="9.00")
+        response = self.client.get(reverse("kitchen:dish-list"), {"q": "chicken", "dish_type": self.soup.pk})
+        self.assertEqual([dish.name for dish in response.context["dish_list"]], ["Chicken pie", "Chicken noodle soup"])
+
+
+@override_settings(KITCHEN_PAGINATION_MODE="keyset", KITCHEN_PAGINATION_COUNT="exact")
+class KeysetPaginationViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="keyset-chef")
+        Ingredient.objects.bulk_create(Ingredient(name=f"Keyset {i:02}") for i in range(23))
+        cls.names = list(Ingredient.objects.order_by("name", "pk").values_list("name", flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        return self.client.get(reverse("kitchen:ingredient-list"), params)
+
+    @staticmethod
+    def names_of(response):
+        return [ingredient.name for ingredient in response.context["object_list"]]
+
+    def test_next_and_previous_cursors(self):
+        response = self.get()
+        self.assertIsInstance(response.context["paginator"], pagination.KeysetPaginator)
+        self.assertEqual(self.names_of(response), self.names[:10])
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+        response = self.get(cursor=response.context["page_obj"].next_cursor)
+        self.assertEqual(self.names_of(response), self.names[10:20])
+
+        response = self.get(cursor=response.context["page_obj"].next_cursor)
+        last = response.context["page_obj"]
+        self.assertEqual(self.names_of(response), self.names[20:])
+        self.assertFalse(last.has_next())
+        self.assertIsNone(last.next_cursor)
+
+        response = self.get(cursor=last.previous_cursor)
+        self.assertEqual(self.names_of(response), self.names[10:20])
+        self.assertTrue(response.context["page_obj"].has_next())
+
+        response = self.get(cursor=response.context["page_obj"].previous_cursor)
+        self.assertEqual(self.names_of(response), self.names[:10])
+        self.assertFalse(response.context["page_obj"].has_previous())
+        self.assertIsNone(response.context["page_obj"].previous_cursor)
+
+    def test_invalid_cursors_show_the_first_page(self):
+        cursor = self.get().context["page_obj"].next_cursor
+        unsigned = signing.dumps({"v": "Keyset 05", "pk": 1, "d": "next"}, salt="another.salt")
+        wrong_direction = signing.dumps({"v": "Keyset 05", "pk": 1, "d": "up"}, salt=pagination.CURSOR_SALT)
+        not_a_dict = signing.dumps(["Keyset 05", 1], salt=pagination.CURSOR_SALT)
+        for bad in ("garbage", cursor[:-1] + ("A" if cursor[-1] != "A" else "B"), unsigned, wrong_direction, not_a_dict):
+            with self.subTest(cursor=bad):
+                response = self.get(cursor=bad)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.names_of(response), self.names[:10])
+
+    def test_exact_count(self):
+        response = self.get()
+        self.assertEqual(response.context["paginator"].count, len(self.names))
+        self.assertContains(response, f"{len(self.names)} total")
+
+    @override_settings(KITCHEN_PAGINATION_COUNT="none")
+    def test_no_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get()
+        self.assertIsNone(response.context["paginator"].count)
+        self.assertNotContains(response, " total")
+        self.assertFalse(any('COUNT(*)' in query["sql"] for query in queries.captured_queries))
+
+    def test_links_carry_the_cursor_and_filters(self):
+        dessert = DishType.objects.create(name="Keyset dessert")
+        Dish.objects.bulk_create(
+            Dish(name=f"Keyset cake {i:02}", dish_type=dessert, price="5.00") for i in range(12)
+        )
+        response = self.client.get(reverse("kitchen:dish-list"), {"dish_type": dessert.pk})
+        self.assertEqual(response.context["pagination_template"], "includes/cursor_pagination.html")
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertContains(response, f'href="?cursor={quote(next_cursor, safe="/")}&dish_type={dessert.pk}"')
+
+        response = self.client.get(reverse("kitchen:dish-list"), {"dish_type": dessert.pk, "cursor": next_cursor})
+        self.assertEqual([dish.name for dish in response.context["object_list"]], ["Keyset cake 10", "Keyset cake 11"])
+        previous_cursor = response.context["page_obj"].previous_cursor
+        self.assertContains(response, f'href="?cursor={quote(previous_cursor, safe="/")}&dish_type={dessert.pk}"')
+
+    def test_ranked_search_uses_offset_pages(self):
+        response = self.get(q="keyset")
+        self.assertNotIsInstance(response.context["paginator"], pagination.KeysetPaginator)
+        self.assertNotIn("pagination_template", response.context)
+        self.assertEqual(response.context["paginator"].count, 23)
+
+
+class AutocompleteViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="chef", password="chef12345")
+        Ingredient.objects.bulk_create(Ingredient(name=f"Tomato {i}") for i in range(30))
+        Ingredient.objects.create(name="Basil")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_prefix_match(self):
+        response = self.client.get(reverse("kitchen:ingredient-autocomplete"), {"q": "bas"})
+        basil = Ingredient.objects.get(name="Basil")
+        self.assertEqual(response.json(), {"results": [{"id": basil.pk, "text": "Basil"}], "more": False})
+
+    def test_limit_is_capped(self):
+        url = reverse("kitchen:ingredient-autocomplete")
+        data = self.client.get(url, {"q": "tom", "limit": 5}).json()
+        self.assertEqual(len(data["results"]), 5)
+        self.assertTrue(data["more"])
+        data = self.client.get(url, {"q": "tom", "limit": 1000}).json()
+        self.assertEqual(len(data["results"]), 30)
+        self.assertFalse(data["more"])
+
+
+    def test_invalid_choices_rerender(self):
+        basil = Ingredient.objects.get(name="Basil")
+        response = self.client.post(
+            reverse("kitchen:dish-create"), {"name": "Pesto", "cooks": ["abc"], "ingredients": [str(basil.pk), "x"]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("cooks", response.context["form"].errors)
+        self.assertContains(response, f'<option value="{basil.pk}" selected>Basil</option>', html=True)
+
+class DashboardCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dish_type = DishType.objects.create(name="Counted")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tests_do_not_share_the_file_cache(self):
+        location = settings.CACHES["default"].get("LOCATION")
+        if settings.CACHES["default"]["BACKEND"].endswith("FileBasedCache"):
+            self.assertTrue(Path(location).name.startswith("kitchen_cache_test_"))
+            self.assertNotEqual(Path(location), settings.BASE_DIR / ".cache" / "kitchen")
+
+    def test_totals_follow_saves_and_deletes(self):
+        before = counters.get_totals()
+        with self.captureOnCommitCallbacks(execute=True):
+            dish = Dish.objects.create(name="Counted dish", dish_type=self.dish_type)
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.get_totals()["num_dishes"], before["num_dishes"] + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            dish.delete()
+        self.assertEqual(counters.get_totals(), before)
+
+    def test_latest_dishes_invalidated_on_m2m_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dish = Dish.objects.create(name="Newest dish", dish_type=self.dish_type)
+        self.assertEqual(counters.get_latest_dishes()[0], dish)
+        cook = get_user_model().objects.create_user(username="latest", password="latest12345")
+        with self.captureOnCommitCallbacks(execute=True):
+            dish.cooks.add(cook)
+        self.assertEqual(list(counters.get_latest_dishes()[0].cooks.all()), [cook])
+
+    def test_rebuild_fixes_drift(self):
+        counters.get_totals()
+        Dish.objects.bulk_create([Dish(name="Bulk dish", dish_type=self.dish_type)])
+        self.assertEqual(counters.rebuild()["num_dishes"], Dish.objects.count())
+        self.assertEqual(counters.get_totals()["num_dishes"], Dish.objects.count())
+
+
+class MenuImportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.create_user(username="maria", password="maria12345")
+
+    def import_menu(self, content: str, *args) -> str:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "menu.csv"
+            path.write_text(content)
+            out = io.StringIO()
+            call_command("import_menu", str(path), *args, stdout=out)
+        return out.getvalue()
+
+    def test_csv_import_then_jsonl_export(self):
+        output = self.import_menu(
+            "name,description,price,dish_type,cooks,ingredients\n"
+            "Tiramisu,Coffee dessert,8.50,Dessert,maria|ghost,Mascarpone|Coffee\n"
+            "Borscht,,6,Soup,maria,Beet\n"
+        )
+        self.assertIn("dishes=2", output)
+        self.assertIn("unknown_cooks=1", output)
+        tiramisu = Dish.objects.get(name="Tiramisu")
+        self.assertEqual(tiramisu.dish_type.name, "Dessert")
+        self.assertEqual(sorted(i.name for i in tiramisu.ingredients.all()), ["Coffee", "Mascarpone"])
+        self.assertEqual([c.username for c in tiramisu.cooks.all()], ["maria"])
+
+        out = io.StringIO()
+        call_command("export_menu", "--format", "jsonl", stdout=out, stderr=io.StringIO())
+        self.assertIn(
+            '{"name": "Tiramisu", "description": "Coffee dessert", "price": "8.50", "dish_type": "Dessert", '
+            '"cooks": ["maria"], "ingredients": ["Coffee", "Mascarpone"]}',
+            out.getvalue(),
+        )
+
+    def test_dry_run_writes_nothing(self):
+        output = self.import_menu("name,price,dish_type\nGhost dish,1,Ghost type\n", "--dry-run")
+        self.assertIn("[dry run]", output)
+        self.assertFalse(Dish.objects.filter(name="Ghost dish").exists())
+        self.assertFalse(DishType.objects.filter(name="Ghost type").exists())
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="pos", password="pos12345")
+        cls.dish = Dish.objects.create(name="Api dish", price="9.90", dish_type=DishType.objects.create(name="Api"))
+        cls.dish.ingredients.add(Ingredient.objects.create(name="Api ingredient"))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_field_selection(self):
+        url = reverse("api-v1:dish-detail", args=[self.dish.pk])
+        data = self.client.get(url, {"fields": "name,ingredients,bogus"}).json()
+        ingredient = self.dish.ingredients.get()
+        self.assertEqual(data, {"name": "Api dish", "ingredients": [{"id": ingredient.pk, "name": "Api ingredient"}]})
+
+    def test_conditional_get(self):
+        url = reverse("api-v1:dish-list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # deletions move no timestamp, so only the ETag can tell
+        self.assertFalse(response.has_header("Last-Modified"))
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self.dish.cooks.add(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        Dish.objects.create(name="Api gone", dish_type=self.dish.dish_type)
+        etag = self.client.get(url)["ETag"]
+        Dish.objects.filter(name="Api gone").delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_keyset_pages(self):
+        url = reverse("api-v1:ingredient-list")
+        Ingredient.objects.bulk_create(Ingredient(name=f"Paged {i}") for i in range(5))
+        seen = []
+        params = {"limit": 4, "fields": "id"}
+        while True:
+            page = self.client.get(url, params).json()
+            seen += [item["id"] for item in page["results"]]
+            if page["next_after"] is None:
+                break
+            params["after"] = page["next_after"]
+        self.assertEqual(seen, list(Ingredient.objects.order_by("pk").values_list("pk", flat=True)))
+
+    def test_anonymous_forbidden(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("api-v1:cook-list")).status_code, 403)
+
+
+class ViewCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="cached", password="cached12345")
+        cls.dish = Dish.objects.create(name="Cached dish", dish_type=DishType.objects.create(name="Cached"))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_hit_until_dependency_changes(self):
+        url = reverse("kitchen:dish-detail", args=[self.dish.pk])
+        self.client.get(reverse("kitchen:index"))  # obtain the CSRF cookie
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url)
+        self.assertContains(response, "Cached dish")
+        self.assertLess(len(warm), len(cold))
+        self.assertEqual(caching.get_stats()["view"], {"hit": 1, "miss": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dish.name = "Renamed dish"
+            self.dish.save()
+        self.assertContains(self.client.get(url), "Renamed dish")
+        self.assertEqual(caching.get_stats()["view"]["miss"], 2)
+
+    def test_login_does_not_invalidate(self):
+        generations = caching.get_generations([self.user._meta.label])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(username="cached", password="cached12345")
+        self.assertEqual(caching.get_generations([self.user._meta.label]), generations)
+
+
+@override_settings(KITCHEN_PERF_INSTRUMENTATION=True)
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="timed", password="timed12345")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs("kitchen.perf", "INFO") as logs:
+            response = self.client.get(reverse("kitchen:dish-list"))
+        timing = response["Server-Timing"]
+        for metric in ("sql;dur=", "session;dur=", "tpl;dur=", "total;dur="):
+            self.assertIn(metric, timing)
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["view"], "kitchen:dish-list")
+        self.assertGreater(entry["sql_count"], 0)
+        self.assertGreater(entry["template_ms"], 0)
+        self.assertEqual(entry["bytes"], len(response.content))
+
+    def test_report_percentiles(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as log:
+            for ms in range(1, 101):
+                log.write(json.dumps({"view": "kitchen:dish-list", "total_ms": ms}) + "\n")
+            log.write("not a perf line\n")
+        out = io.StringIO()
+        call_command("perf_report", log.name, stdout=out)
+        Path(log.name).unlink()
+        row = out.getvalue().splitlines()[1].split()
+        self.assertEqual(row[:5], ["kitchen:dish-list", "100", "50.50", "95.05", "99.01"])
+
+
+class BenchmarkTests(TestCase):
+    def test_generator_is_deterministic(self):
+        size = CatalogSize(cooks=3, dish_types=2, ingredients=5, dishes=10, ingredients_per_dish=3)
+        created = generate(size, seed=7, prefix="a")
+        self.assertEqual(created["dish_ingredients"], 30)
+        generate(size, seed=7, prefix="b")
+        first, second = (
+            list(Dish.objects.filter(name__startswith=f"{prefix} ").values_list("description", "price"))
+            for prefix in ("a", "b")
+        )
+        self.assertEqual(first, second)
+
+    def test_every_route_benchmarked(self):
+        cache.set("kitchen:session-like", "kept", None)
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "results.json"
+            call_command(
+                "run_benchmarks", "--dishes", "20", "--repeat", "1", "--cold", "--output", str(output),
+                stdout=io.StringIO(),
+            )
+            results = json.loads(output.read_text())["results"]
+        self.assertEqual({result["route"] for result in results}, {name for name, _ in get_routes()})
+        self.assertTrue(all(result["status"] == 200 for result in results))
+        # the runs cleared a scratch cache, not the site's
+        self.assertEqual(cache.get("kitchen:session-like"), "kept")
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "bench_cache"}}
+    )
+    def test_scratch_database_cache_is_dropped(self):
+        call_command("createcachetable", verbosity=0)
+        cache.set("kitchen:session-like", "kept", None)
+        with scratch_cache():
+            self.assertIn("bench_cache_scratch", connection.introspection.table_names())
+            self.assertIsNone(cache.get("kitchen:session-like"))
+            cache.set("kitchen:scratch", 1)
+        self.assertNotIn("bench_cache_scratch", connection.introspection.table_names())
+        self.assertEqual(cache.get("kitchen:session-like"), "kept")
+
+
+class DishCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.soup, cls.salad = DishType.objects.bulk_create([DishType(name="Counted soup"), DishType(name="Counted salad")])
+        cls.cook = get_user_model().objects.create_user(username="counted", password="counted12345")
+        cls.salt, cls.pepper = Ingredient.objects.bulk_create([Ingredient(name="Counted salt"), Ingredient(name="Counted pepper")])
+
+    def assert_counts(self, *expected):
+        for obj, count in expected:
+            obj.refresh_from_db(fields=["dish_count"])
+            self.assertEqual(obj.dish_count, count, obj)
+
+    def test_m2m_changes_from_both_sides(self):
+        broth = Dish.objects.create(name="Broth", dish_type=self.soup)
+        stew = Dish.objects.create(name="Stew", dish_type=self.soup)
+        broth.ingredients.add(self.salt, self.pepper)
+        broth.ingredients.add(self.salt)  # already linked
+        self.salt.dishes.add(stew)
+        broth.cooks.add(self.cook)
+        self.assert_counts((self.salt, 2), (self.pepper, 1), (self.cook, 1), (self.soup, 2))
+
+        broth.ingredients.remove(self.pepper, self.pepper)
+        stew.ingredients.remove(self.pepper)  # not linked
+        self.assert_counts((self.salt, 2), (self.pepper, 0))
+        self.salt.dishes.clear()
+        broth.cooks.clear()
+        self.assert_counts((self.salt, 0), (self.cook, 0))
+
+    def test_dish_type_change_and_delete(self):
+        dish = Dish.objects.create(name="Moved", dish_type=self.soup)
+        dish.ingredients.add(self.salt)
+        dish.dish_type = self.salad
+        dish.save()
+        self.assert_counts((self.soup, 0), (self.salad, 1))
+        dish.delete()
+        self.assert_counts((self.salad, 0), (self.salt, 0))
+
+    def test_stale_instance_save_keeps_count(self):
+        stale = Ingredient.objects.get(pk=self.salt.pk)
+        Dish.objects.create(name="Salted", dish_type=self.soup).ingredients.add(self.salt)
+        stale.name = "Counted sea salt"
+        stale.save()
+        self.assert_counts((self.salt, 1))
+
+    def test_save_touches_updated_at(self):
+        # the API's validators are built from updated_at
+        for model, pk in ((Ingredient, self.salt.pk), (DishType, self.soup.pk), (get_user_model(), self.cook.pk)):
+            model.objects.filter(pk=pk).update(updated_at=timezone.now() - timedelta(days=1))
+            obj = model.objects.get(pk=pk)
+            before = obj.updated_at
+            obj.save()
+            obj.refresh_from_db()
+            self.assertGreater(obj.updated_at, before, model)
+
+    def test_reconcile_fixes_drift(self):
+        Dish.ingredients.through.objects.create(
+            dish=Dish.objects.create(name="Raw", dish_type=self.soup), ingredient=self.pepper
+        )
+        out = io.StringIO()
+        call_command("reconcile_dish_counts", stdout=out)
+        self.assertIn("kitchen.Ingredient: 1 drifted", out.getvalue())
+        self.assert_counts((self.pepper, 1))
+
+    def test_list_sort_and_filter(self):
+        cache.clear()
+        self.client.force_login(self.cook)
+        for i in range(20):
+            Dish.objects.create(name=f"Salad {i}", dish_type=self.salad)
+        response = self.client.get(reverse("kitchen:dish-type-list"), {"sort": "-dish_count", "min_dishes": 1})
+        counts = [(dish_type.name, dish_type.dish_count) for dish_type in response.context["object_list"]]
+        self.assertEqual(counts[0], ("Counted salad", 20))
+        self.assertEqual(counts, sorted(counts, key=lambda item: -item[1]))
+        self.assertNotIn("Counted soup", dict(counts))
+
+
+class BootstrapTests(TestCase):
+    def test_ready_does_not_touch_the_database(self):
+        with self.assertNumQueries(0):
+            apps.get_app_config("kitchen").ready()
+
+    def test_bootstrap_admin_is_idempotent(self):
+        out = io.StringIO()
+        call_command("bootstrap_admin", "--username", "boss", "--password", "boss12345", stdout=out)
+        call_command("bootstrap_admin", "--username", "boss", "--password", "other12345", stdout=out)
+        self.assertIn("already exists", out.getvalue())
+        boss = get_user_model().objects.get(username="boss")
+        self.assertTrue(boss.is_superuser)
+        self.assertTrue(boss.check_password("boss12345"))
+
+
+class DishFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dessert = DishType.objects.create(name="Facet dessert")
+        cls.soup = DishType.objects.create(name="Facet soup")
+        cls.maria = get_user_model().objects.create_user(username="facet-maria")
+        cls.bob = get_user_model().objects.create_user(username="facet-bob")
+        cls.nuts = Ingredient.objects.create(name="Facet nuts")
+        cls.sugar = Ingredient.objects.create(name="Facet sugar")
+        dishes = [
+            ("Facet tart", cls.dessert, "8.00", [cls.maria], [cls.sugar]),
+            ("Facet nut cake", cls.dessert, "9.00", [cls.maria], [cls.nuts, cls.sugar]),
+            ("Facet cheesecake", cls.dessert, "15.00", [cls.bob], [cls.sugar]),
+            ("Facet broth", cls.soup, "5.00", [cls.maria], []),
+        ]
+        for name, dish_type, price, cooks, ingredients in dishes:
+            dish = Dish.objects.create(name=name, dish_type=dish_type, price=price)
+            dish.cooks.set(cooks)
+            dish.ingredients.set(ingredients)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.maria)
+
+    def test_filters_combine(self):
+        response = self.client.get(
+            reverse("kitchen:dish-list"),
+            {
+                "dish_type": self.dessert.pk,
+                "max_price": "9.99",
+                "cook": self.maria.pk,
+                "not_ingredient": self.nuts.pk,
+            },
+        )
+        self.assertEqual([dish.name for dish in response.context["dish_list"]], ["Facet tart"])
+
+    def test_counts_come_from_one_query(self):
+        data = {"dish_type": [self.dessert.pk], "not_ingredient": [self.nuts.pk]}
+        counts = facets.Facets(Dish.objects.filter(name__startswith="Facet"), data, QueryDict())
+        with self.assertNumQueries(1):
+            dish_types = {item.label: item.count for item in counts.dish_types}
+            cooks = {item.label: item.count for item in counts.cooks}
+            ingredients = {item.label: (item.count, item.excluded) for item in counts.ingredients}
+            prices = [item.count for item in counts.prices]
+        # the selected type does not hide the others
+        self.assertEqual(dish_types, {"Facet dessert": 2, "Facet soup": 1})
+        self.assertEqual(cooks, {"facet-maria": 1, "facet-bob": 1})
+        # excluded values are counted as if they were not excluded
+        self.assertEqual(ingredients, {"Facet sugar": (3, False), "Facet nuts": (1, True)})
+        self.assertEqual(prices, [1, 1, 0, 0])
+
+    @override_settings(KITCHEN_PAGINATION_MODE="offset")
+    def test_filters_round_trip_through_pagination(self):
+        for i in range(12):
+            Dish.objects.create(name=f"Facet soup {i:02d}", dish_type=self.soup, price="4.00")
+        params = {"dish_type": self.soup.pk, "max_price": "9.99"}
+        response = self.client.get(reverse("kitchen:dish-list"), params)
+        query = f"dish_type={self.soup.pk}&amp;max_price=9.99"
+        self.assertContains(response, f"?page=2&{query}")
+
+        response = self.client.get(reverse("kitchen:dish-list"), {**params, "page": 2})
+        names = [dish.name for dish in response.context["dish_list"]]
+        # "Facet broth" sorts first
+        self.assertEqual(names, ["Facet soup 09", "Facet soup 10", "Facet soup 11"])
+        self.assertContains(response, f"?page=1&{query}")
+
+
+class IngredientImpactTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dessert = DishType.objects.create(name="Impact dessert")
+        cls.cook = get_user_model().objects.create_user(username="impact-cook")
+        cls.peanut = Ingredient.objects.create(name="Impact peanut")
+        cls.milk = Ingredient.objects.create(name="Impact milk")
+        cls.brittle = Dish.objects.create(name="Impact brittle", dish_type=cls.dessert)
+        cls.brittle.ingredients.set([cls.peanut])
+        cls.brittle.cooks.set([cls.cook])
+        cls.shake = Dish.objects.create(name="Impact shake", dish_type=cls.dessert)
+        cls.shake.ingredients.set([cls.peanut, cls.milk])
+
+    def setUp(self):
+        cache.clear()
+        impact.invalidate()
+
+    def test_any_and_all(self):
+        result = impact.impact([self.peanut.pk, self.milk.pk])
+        self.assertEqual(result["dish_count"], 2)
+        self.assertEqual(
+            [(group["name"], [dish["name"] for dish in group["dishes"]]) for group in result["by_cook"]],
+            [("impact-cook", ["Impact brittle"]), (None, ["Impact shake"])],
+        )
+        result = impact.impact([self.peanut.pk, self.milk.pk], match="all")
+        self.assertEqual([dish["name"] for dish in result["by_dish_type"][0]["dishes"]], ["Impact shake"])
+        self.assertEqual(impact.impact([self.milk.pk, 0], match="all")["dish_count"], 0)
+
+    def test_links_of_unloaded_dishes_are_dropped(self):
+        # what a dish deleted between the link and dish queries looks like;
+        # the foreign key is only checked at commit
+        Dish.objects.filter(pk=self.shake.pk)._raw_delete(connection.alias)
+        links = Dish.ingredients.through.objects.filter(dish_id=self.shake.pk)
+        self.addCleanup(links._raw_delete, connection.alias)
+        index = impact.build_index()
+        self.assertEqual(index.find([self.milk.pk], "any"), set())
+        self.assertNotIn(self.milk.pk, index.dishes_by_ingredient)
+        result = impact.impact([self.peanut.pk, self.milk.pk])
+        self.assertEqual([dish["name"] for dish in result["by_dish_type"][0]["dishes"]], ["Impact brittle"])
+
+    @override_settings(KITCHEN_SHARED_CACHE=True)
+    def test_served_from_memory_until_ingredients_change(self):
+        impact.impact([self.milk.pk])
+        with self.assertNumQueries(0):
+            impact.impact([self.milk.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brittle.ingredients.add(self.milk)
+        self.assertEqual(impact.impact([self.milk.pk])["dish_count"], 2)
+
+    @override_settings(KITCHEN_SHARED_CACHE=False)
+    def test_per_process_cache_checks_the_database(self):
+        impact.impact([self.milk.pk])
+        with self.assertNumQueries(1):
+            impact.impact([self.milk.pk])
+        # as another worker would: no signal reaches this process
+        DishIngredient.objects.create(dish=self.brittle, ingredient=self.milk)
+        self.assertEqual(impact.impact([self.milk.pk])["dish_count"], 2)
+        DishIngredient.objects.filter(dish=self.brittle, ingredient=self.milk).delete()
+        self.assertEqual(impact.impact([self.milk.pk])["dish_count"], 1)
+
+    def test_endpoint(self):
+        self.client.force_login(self.cook)
+        url = reverse("api-v1:ingredient-impact")
+        response = self.client.get(url, {"ingredient": [self.milk.pk], "match": "all"})
+        self.assertEqual(response.json()["by_dish_type"][0]["dishes"], [{"id": self.shake.pk, "name": "Impact shake"}])
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class BulkEditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.main = DishType.objects.create(name="Bulk main")
+        cls.side = DishType.objects.create(name="Bulk side")
+        cls.cook = get_user_model().objects.create_superuser(username="bulk-cook", password="bulk12345")
+        cls.stew = Dish.objects.create(name="Bulk stew", dish_type=cls.main, price="10.00")
+        cls.roast = Dish.objects.create(name="Bulk roast", dish_type=cls.main, price="20.00")
+        cls.salad = Dish.objects.create(name="Bulk salad", dish_type=cls.side, price="4.00")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.cook)
+
+    def prices(self):
+        return dict(Dish.objects.filter(name__startswith="Bulk").values_list("name", "price"))
+
+    def test_price_change_is_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            bulk.change_prices([self.stew.pk, self.roast.pk], "percent", Decimal("10"))
+        statements = [query["sql"] for query in queries if "SAVEPOINT" not in query["sql"]]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("UPDATE"))
+        bulk.change_prices([self.salad.pk], "amount", Decimal("-5"))
+        self.assertEqual(
+            self.prices(),
+            {"Bulk stew": Decimal("11.00"), "Bulk roast": Decimal("22.00"), "Bulk salad": Decimal("0.00")},
+        )
+
+    def test_each_edit_publishes_once(self):
+        dish_ids = [self.stew.pk, self.salad.pk]
+        # recipe edits also recost the dishes, which invalidates on its own
+        edits = [
+            (lambda: bulk.change_prices(dish_ids, "amount", Decimal("1")), 1),
+            (lambda: bulk.set_dish_type(dish_ids, self.side), 1),
+            (lambda: bulk.add_related(dish_ids, "cooks", [self.cook.pk]), 1),
+            (lambda: bulk.remove_related(dish_ids, "cooks", [self.cook.pk]), 1),
+            (lambda: bulk.recipes_changed(dish_ids, []), 2),
+        ]
+        for number, (edit, invalidations) in enumerate(edits):
+            with (
+                self.subTest(edit=number),
+                mock.patch.object(live, "publish_reload") as publish,
+                mock.patch.object(caching, "invalidate") as invalidate,
+            ):
+                with self.captureOnCommitCallbacks(execute=True):
+                    edit()
+                publish.assert_called_once_with("bulk edit")
+                self.assertEqual(invalidate.call_count, invalidations)
+
+    def test_cooks_and_dish_type_recount(self):
+        dish_ids = [self.stew.pk, self.salad.pk]
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.add_related(dish_ids, "cooks", [self.cook.pk])
+            bulk.set_dish_type(dish_ids, self.side)
+        self.cook.refresh_from_db()
+        self.assertEqual(self.cook.dish_count, 2)
+        self.assertEqual(DishType.objects.get(pk=self.main.pk).dish_count, 1)
+        self.assertEqual(DishType.objects.get(pk=self.side.pk).dish_count, 2)
+
+        bulk.remove_related([self.stew.pk], "cooks", [self.cook.pk])
+        self.cook.refresh_from_db()
+        self.assertEqual(self.cook.dish_count, 1)
+
+    def test_list_applies_to_search_result(self):
+        response = self.client.post(
+            reverse("kitchen:dish-bulk-edit"),
+            {"action": "price_set", "amount": "7.50", "scope": "all", "query": f"dish_type={self.main.pk}"},
+        )
+        self.assertRedirects(response, reverse("kitchen:dish-list") + f"?dish_type={self.main.pk}")
+        self.assertEqual(self.prices()["Bulk roast"], Decimal("7.50"))
+        self.assertEqual(self.prices()["Bulk salad"], Decimal("4.00"))
+
+    def test_list_requires_action_parameter(self):
+        self.client.post(reverse("kitchen:dish-bulk-edit"), {"action": "add_cooks", "dish": [self.stew.pk]})
+        self.assertFalse(Dish.objects.filter(pk=self.stew.pk, cooks=self.cook).exists())
+
+    def test_admin_action(self):
+        url = reverse("admin:kitchen_dish_changelist")
+        data = {"action": "bulk_edit", "_selected_action": [self.stew.pk], "select_across": "0", "index": "0"}
+        response = self.client.post(url, data)
+        self.assertContains(response, "1 dish selected.")
+        self.client.post(url, {**data, "apply": "1", "bulk-action": "price_amount", "bulk-amount": "2.5"})
+        self.assertEqual(self.prices()["Bulk stew"], Decimal("12.50"))
+        self.assertEqual(self.prices()["Bulk roast"], Decimal("20.00"))
+
+
+class CostingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.main = DishType.objects.create(name="Costed main")
+        cls.beef = Ingredient.objects.create(name="Costed beef", unit_cost="20.00")
+        cls.stock = Ingredient.objects.create(name="Costed stock", unit="l", unit_cost="4.00")
+        cls.egg = Ingredient.objects.create(name="Costed egg", unit="pc", unit_cost="0.30")
+        cls.stew = Dish.objects.create(name="Costed stew", dish_type=cls.main, price="12.00")
+        cls.omelette = Dish.objects.create(name="Costed omelette", dish_type=cls.main, price="6.00")
+
+    def costs(self):
+        return dict(Dish.objects.filter(name__startswith="Costed").values_list("name", "food_cost"))
+
+    def test_recipe_changes_recost_the_dish(self):
+        self.stew.ingredients.add(self.beef, through_defaults={"quantity": 250, "unit": "g"})
+        self.stew.ingredients.add(self.stock, through_defaults={"quantity": "0.5"})
+        self.omelette.ingredients.add(self.egg, through_defaults={"quantity": 3})
+        self.assertEqual(self.costs(), {"Costed stew": Decimal("7.00"), "Costed omelette": Decimal("0.90")})
+        stew = Dish.objects.get(pk=self.stew.pk)
+        self.assertEqual((stew.margin, stew.margin_percent), (Decimal("5.00"), Decimal("41.7")))
+
+        self.beef.dishes.remove(self.stew)
+        self.assertEqual(self.costs()["Costed stew"], Decimal("2.00"))
+        self.stock.delete()
+        self.assertEqual(self.costs()["Costed stew"], Decimal("0.00"))
+
+    def test_price_change_recosts_only_its_dishes(self):
+        self.stew.ingredients.add(self.beef, through_defaults={"quantity": "0.2"})
+        # a stale cost that only a full reprice would touch
+        Dish.objects.filter(pk=self.omelette.pk).update(food_cost=99)
+        self.beef.unit_cost = Decimal("30.00")
+        self.beef.save()
+        self.assertEqual(self.costs(), {"Costed stew": Decimal("6.00"), "Costed omelette": Decimal("99.00")})
+        self.assertEqual(costing.reprice(), Dish.objects.count())
+        self.assertEqual(self.costs()["Costed omelette"], Decimal("0.00"))
+
+    def test_bulk_and_unit_checks(self):
+        bulk.add_related([self.stew.pk, self.omelette.pk], "ingredients", [self.egg.pk])
+        self.assertEqual(set(self.costs().values()), {Decimal("0.30")})
+        with self.assertRaises(ValidationError):
+            DishIngredient(dish=self.stew, ingredient=self.egg, unit="g").clean()
+
+    def test_admin_recipe_inline(self):
+        admin_user = get_user_model().objects.create_superuser(username="costed-admin", password="costed12345")
+        self.client.force_login(admin_user)
+        url = reverse("admin:kitchen_dish_change", args=[self.stew.pk])
+        data = {
+            "name": self.stew.name,
+            "dish_type": self.main.pk,
+            "description": "",
+            "price": "12.00",
+            "dishingredient_set-TOTAL_FORMS": "1",
+            "dishingredient_set-INITIAL_FORMS": "0",
+            "dishingredient_set-0-ingredient": self.beef.pk,
+            "dishingredient_set-0-quantity": "500",
+            "dishingredient_set-0-unit": "g",
+        }
+        self.assertEqual(self.client.post(url, data).status_code, 302)
+        self.assertEqual(self.costs()["Costed stew"], Decimal("10.00"))
+        self.assertEqual(Ingredient.objects.get(pk=self.beef.pk).dish_count, 1)
+        response = self.client.get(reverse("admin:kitchen_dish_changelist"), {"q": "Costed stew"})
+        self.assertContains(response, "2.00 (16.7%)")
+
+
+@override_settings(KITCHEN_DELETION_BACKGROUND=False, KITCHEN_DELETION_BATCH_SIZE=2)
+class ChunkedDeletionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="deleter")
+        cls.cook = get_user_model().objects.create_user(username="leaving")
+        cls.salt = Ingredient.objects.create(name="Deleted salt")
+        cls.soups = DishType.objects.create(name="Deleted soups")
+        cls.keep = Dish.objects.create(name="Kept soup", dish_type=DishType.objects.create(name="Kept"))
+        cls.keep.cooks.add(cls.cook)
+        cls.keep.ingredients.add(cls.salt)
+        for n in range(5):
+            dish = Dish.objects.create(name=f"Deleted soup {n}", dish_type=cls.soups)
+            dish.cooks.add(cls.cook)
+            dish.ingredients.add(cls.salt)
+        cls.order = Order.objects.create()
+        OrderItem.objects.create(order=cls.order, dish=cls.keep, cook=cls.cook, status=OrderItem.Status.ASSIGNED)
+        OrderItem.objects.create(order=cls.order, dish=Dish.objects.get(name="Deleted soup 0"))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def delete(self, url_name, obj):
+        url = reverse(url_name, args=[obj.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url)
+        job = Deletion.objects.get(target=obj._meta.label, object_id=obj.pk)
+        self.assertRedirects(response, reverse("kitchen:deletion-detail", args=[job.pk]))
+        return job
+
+    def test_preview_on_confirmation_page(self):
+        response = self.client.get(reverse("kitchen:dish-type-delete", args=[self.soups.pk]))
+        self.assertEqual(
+            response.context["impact"],
+            {"dishes": 5, "cook assignments": 5, "recipe lines": 5, "order items": 1},
+        )
+        self.assertContains(response, "<strong>5</strong> dishes", html=True)
+
+    def test_dish_type_deleted_in_batches(self):
+        job = self.delete("kitchen:dish-type-delete", self.soups)
+        self.assertEqual((job.status, job.removed, job.total), (Deletion.Status.DONE, 5, 5))
+        self.assertFalse(DishType.objects.filter(pk=self.soups.pk).exists())
+        self.assertFalse(Dish.objects.filter(name__startswith="Deleted soup").exists())
+        self.assertEqual(list(OrderItem.objects.values_list("dish__name", flat=True)), ["Kept soup"])
+        self.assertEqual(get_user_model().objects.get(pk=self.cook.pk).dish_count, 1)
+        self.assertEqual(Ingredient.objects.get(pk=self.salt.pk).dish_count, 1)
+        self.assertContains(self.client.get(reverse("kitchen:deletion-detail", args=[job.pk])), "100%")
+
+    @override_settings(KITCHEN_JOBS=True, KITCHEN_USER_CACHE_TIMEOUT=300)
+    def test_cook_is_signed_out_while_pending(self):
+        self.client.force_login(self.cook)
+        self.assertEqual(self.client.get(reverse("kitchen:index")).status_code, 200)
+        # queued for the workers, so the cook stays pending
+        with self.captureOnCommitCallbacks(execute=True):
+            deletion.schedule(self.cook, requested_by=self.user)
+        self.assertEqual(self.client.get(reverse("kitchen:index")).status_code, 302)
+        self.assertFalse(Session.objects.filter(session_key=self.client.session.session_key).exists())
+
+    def test_cook_is_deactivated_then_deleted(self):
+        job = deletion.schedule(self.cook, requested_by=self.user)
+        cook = get_user_model().objects.get(pk=self.cook.pk)
+        self.assertEqual((cook.pending_deletion, cook.is_active), (True, False))
+        self.assertEqual(self.client.get(reverse("kitchen:cook-delete", args=[cook.pk])).status_code, 404)
+
+        # a worker that stopped mid-way leaves it running; resuming finishes it
+        Deletion.objects.filter(pk=job.pk).update(status=Deletion.Status.RUNNING)
+        self.assertEqual(deletion.run(job.pk).status, Deletion.Status.RUNNING)
+        job = deletion.run(job.pk, resume=True)
+        self.assertEqual((job.status, job.removed, job.total), (Deletion.Status.DONE, 7, 7))
+        self.assertFalse(get_user_model().objects.filter(pk=self.cook.pk).exists())
+        self.assertEqual(OrderItem.objects.get(dish=self.keep).cook, None)
+
+
+class JobTests(TestCase):
+    ran = []
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        jobs.register("test.record", lambda label: cls.ran.append(label) or label)
+        jobs.register("test.fail", lambda: 1 / 0)
+
+    @classmethod
+    def tearDownClass(cls):
+        for name in ("test.record", "test.fail"):
+            jobs.TASKS.pop(name)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser(username="job-admin", password="jobs12345")
+        cls.soups = DishType.objects.create(name="Job soups")
+        cls.dishes = [Dish.objects.create(name=f"Job soup {n}", dish_type=cls.soups, price="5.00") for n in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.ran.clear()
+        self.client.force_login(self.admin)
+
+    def prices(self):
+        return set(Dish.objects.filter(dish_type=self.soups).values_list("price", flat=True))
+
+    def test_priority_then_age(self):
+        jobs.enqueue("test.record", label="first")
+        jobs.enqueue("test.record", label="later", delay=60)
+        jobs.enqueue("test.record", label="urgent", priority=5)
+        jobs.enqueue("test.record", label="second")
+        self.assertEqual(jobs.run_threads(1, burst=True), 3)
+        self.assertEqual(self.ran, ["urgent", "first", "second"])
+        done = Job.objects.get(kwargs__label="urgent")
+        self.assertEqual((done.status, done.result, done.attempts), (Job.Status.DONE, "urgent", 1))
+        self.assertEqual(Job.objects.get(kwargs__label="later").status, Job.Status.QUEUED)
+        with self.assertRaises(ValueError):
+            jobs.enqueue("test.missing")
+
+    def test_retries_then_fails(self):
+        job = jobs.enqueue("test.fail", max_attempts=2)
+        with self.assertLogs("kitchen.jobs", "WARNING"):
+            job = jobs.execute(jobs.claim("test"))
+        self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 1))
+        self.assertIn("ZeroDivisionError", job.error)
+        # backed off, so not due yet
+        self.assertIsNone(jobs.claim("test"))
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        with self.assertLogs("kitchen.jobs", "WARNING"):
+            job = jobs.execute(jobs.claim("test"))
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_job_is_requeued(self):
+        jobs.enqueue("test.record", label="stale")
+        job = jobs.claim("gone")
+        hour_ago = job.started_at - timedelta(hours=1)
+        # long running, but still beating
+        Job.objects.filter(pk=job.pk).update(started_at=hour_ago)
+        self.assertTrue(jobs.Heartbeat(job).beat())
+        self.assertEqual(jobs.requeue_stale(), 0)
+
+        Job.objects.filter(pk=job.pk).update(updated_at=hour_ago)
+        self.assertEqual(jobs.requeue_stale(), 1)
+        call_command("run_workers", "--workers=1", "--burst", stdout=io.StringIO())
+        self.assertEqual(self.ran, ["stale"])
+        # the first worker comes back: it no longer owns the job
+        self.assertFalse(jobs.Heartbeat(job).beat())
+        with self.assertLogs("kitchen.jobs", "WARNING"):
+            jobs.execute(job)
+        self.assertNotEqual(Job.objects.get(pk=job.pk).worker, "gone")
+
+    def test_running_worker_requeues_stale_jobs(self):
+        worker = jobs.Worker("test")
+        orphan = jobs.enqueue("test.record", label="orphan", priority=-1)
+
+        def abandon():
+            # another worker dies holding ``orphan`` while this one is busy
+            jobs.claim("gone")
+            Job.objects.filter(pk=orphan.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+            # ...and a heartbeat interval goes by
+            worker.next_requeue = 0
+
+        jobs.register("test.abandon", abandon)
+        self.addCleanup(jobs.TASKS.pop, "test.abandon")
+        jobs.enqueue("test.abandon")
+        self.assertEqual(worker.run(burst=True), 2)
+        self.assertEqual(self.ran, ["orphan"])
+        self.assertEqual(Job.objects.get(pk=orphan.pk).worker, "test")
+
+    def test_stale_job_out_of_attempts_fails(self):
+        job = jobs.enqueue("test.record", label="crashes its worker", max_attempts=2)
+        for attempt in (1, 2):
+            jobs.claim("gone")
+            Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+            if attempt == 1:
+                self.assertEqual(jobs.requeue_stale(), 1)
+                self.assertEqual(Job.objects.get(pk=job.pk).status, Job.Status.QUEUED)
+        with self.assertLogs("kitchen.jobs", "WARNING"):
+            self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), (Job.Status.FAILED, 2, ""))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.ran, [])
+
+    @override_settings(KITCHEN_DELETION_BATCH_SIZE=1)
+    def test_failed_deletion_is_retried(self):
+        record = deletion.schedule(self.soups, requested_by=self.admin)
+        job = jobs.enqueue("kitchen.delete", deletion_id=record.pk)
+
+        def broken(dish_type, size):
+            raise RuntimeError("disk full")
+
+        plan = deletion.PLANS["kitchen.DishType"]
+        with mock.patch.dict(deletion.PLANS, {"kitchen.DishType": plan[:2] + (broken,)}):
+            with self.assertLogs("kitchen.jobs", "WARNING"), self.assertLogs("kitchen.deletion", "ERROR"):
+                job = jobs.execute(jobs.claim("test"))
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertIn("disk full", job.error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        self.assertEqual(jobs.execute(jobs.claim("test")).status, Job.Status.DONE)
+        self.assertEqual(Deletion.objects.get(pk=record.pk).status, Deletion.Status.DONE)
+
+    @override_settings(KITCHEN_JOBS=True, KITCHEN_JOBS_DEFER_OVER=2)
+    def test_large_bulk_edit_is_deferred(self):
+        data = {"action": "price_set", "amount": "7.50"}
+        query = f"dish_type={self.soups.pk}"
+        response = self.client.post(reverse("kitchen:dish-bulk-edit"), {**data, "scope": "all", "query": query}, follow=True)
+        job = Job.objects.get(name="kitchen.bulk_edit")
+        self.assertContains(response, f"queued as job #{job.pk}")
+        self.assertEqual(job.priority, jobs.INTERACTIVE)
+        self.assertEqual(self.prices(), {Decimal("5.00")})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.run_threads(1, burst=True)
+        self.assertEqual(Job.objects.get(pk=job.pk).result, 3)
+        self.assertEqual(self.prices(), {Decimal("7.50")})
+
+        # small edits still run in the request
+        self.client.post(reverse("kitchen:dish-bulk-edit"), {**data, "amount": "6", "dish": [self.dishes[0].pk]})
+        self.assertEqual(Dish.objects.get(pk=self.dishes[0].pk).price, Decimal("6.00"))
+        self.assertEqual(Job.objects.count(), 1)
+
+    @override_settings(KITCHEN_JOBS=True)
+    def test_deletion_runs_as_job(self):
+        record = deletion.schedule(self.soups, requested_by=self.admin)
+        self.assertEqual(Job.objects.get(name="kitchen.delete").kwargs, {"deletion_id": record.pk})
+        jobs.run_threads(1, burst=True)
+        self.assertEqual(Deletion.objects.get(pk=record.pk).status, Deletion.Status.DONE)
+        self.assertFalse(DishType.objects.filter(pk=self.soups.pk).exists())
+
+    def test_admin_actions(self):
+        failed = jobs.enqueue("test.fail", max_attempts=1)
+        with self.assertLogs("kitchen.jobs", "WARNING"):
+            jobs.execute(jobs.claim("test"))
+        queued = jobs.enqueue("test.record", label="cancel me")
+        url = reverse("admin:kitchen_job_changelist")
+        self.assertContains(self.client.get(url), "test.fail")
+        self.client.post(url, {"action": "run_again", "_selected_action": [failed.pk]})
+        self.client.post(url, {"action": "cancel", "_selected_action": [queued.pk]})
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (Job.Status.QUEUED, 0))
+        self.assertEqual(Job.objects.get(pk=queued.pk).status, Job.Status.CANCELLED)
+
+
+class AssetTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        sources = {
+            "vendor/bootstrap/bootstrap.min.css": (
+                "/*! Bootstrap | MIT */:root{--bs-blue:#0d6efd}.navbar{display:flex}.table{color:red}\n"
+                "@media (min-width:576px){.container{max-width:540px}.table{width:1px}}\n"
+                "/*# sourceMappingURL=bootstrap.min.css.map */"
+            ),
+            "vendor/bootstrap/bootstrap.bundle.min.js": "!function(){}();\n//# sourceMappingURL=bootstrap.bundle.min.js.map",
+            "css/styles.css": "/* ours */\nbody {\n  content: \"a ; b\";\n}\n",
+        }
+        for path, text in sources.items():
+            (self.root / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / path).write_text(text)
+
+    def test_build_bundles_and_critical_css(self):
+        assets.build(self.root)
+        css = (self.root / assets.CSS_BUNDLE).read_text()
+        self.assertTrue(css.startswith("/*! Bootstrap | MIT */"))
+        self.assertIn('body{content:"a ; b"}', css)
+        self.assertNotIn("sourceMappingURL", css + (self.root / assets.JS_BUNDLE).read_text())
+        self.assertEqual(
+            (self.root / assets.CRITICAL_CSS).read_text(),
+            ':root{--bs-blue:#0d6efd}.navbar{display:flex}@media (min-width:576px){.container{max-width:540px}}'
+            'body{content:"a ; b"}',
+        )
+
+    def test_base_template_uses_local_bundle(self):
+        assets.build(self.root)
+        template = Template("{% load kitchen_assets %}{% bundle_css %}{% bundle_js %}")
+        with override_settings(STATICFILES_DIRS=[self.root]):
+            html = template.render(Context())
+            self.assertIn('<link rel="stylesheet" href="/static/dist/app.css">', html)
+            self.assertIn('<script src="/static/dist/app.js"></script>', html)
+            with override_settings(KITCHEN_INLINE_CRITICAL_CSS=True):
+                html = template.render(Context())
+            self.assertIn("<style>:root{--bs-blue:#0d6efd}", html)
+            self.assertIn('rel="preload" href="/static/dist/app.css" as="style"', html)
+        self.assertNotIn("cdn.", self.client.get(reverse("login")).content.decode())
+
+
+@override_settings(KITCHEN_USER_CACHE_TIMEOUT=300)
+class SessionAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cook = get_user_model().objects.create_user(username="session-cook", password="session12345")
+
+    def setUp(self):
+        cache.clear()
+
+    def cook_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return sum(1 for query in queries if 'FROM "kitchen_cook"' in query["sql"])
+
+    def test_user_comes_from_cache(self):
+        self.client.login(username="session-cook", password="session12345")
+        url = reverse("kitchen:dish-type-list")
+        self.assertEqual(self.cook_queries(url), 1)
+        self.assertEqual(self.cook_queries(url), 0)
+
+        self.cook.first_name = "Renamed"
+        self.cook.save()
+        self.assertEqual(self.cook_queries(url), 1)
+
+    def test_password_change_still_ends_sessions(self):
+        self.client.login(username="session-cook", password="session12345")
+        self.client.get(reverse("kitchen:index"))
+        self.cook.set_password("changed12345")
+        self.cook.save()
+        self.assertEqual(self.client.get(reverse("kitchen:index")).status_code, 302)
+
+    def test_load_test_session_follows_the_engine(self):
+        engines = ("db", "cached_db", "cache", "file", "signed_cookies")
+        for engine in engines:
+            with self.subTest(engine=engine), override_settings(SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}"):
+                session = load_test.open_session(self.cook)
+                self.addCleanup(session.delete)
+                # a new client: SessionMiddleware picks its engine when loaded
+                client = Client()
+                client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+                self.assertEqual(client.get(reverse("kitchen:index")).status_code, 200)
+
+    def test_forget_after_update(self):
+        self.client.login(username="session-cook", password="session12345")
+        self.client.get(reverse("kitchen:index"))
+        # QuerySet.update sends no post_save
+        get_user_model().objects.filter(pk=self.cook.pk).update(is_active=False)
+        auth.forget(self.cook.pk)
+        self.assertEqual(self.client.get(reverse("kitchen:index")).status_code, 302)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookie_sessions_need_no_queries(self):
+        self.client.login(username="session-cook", password="session12345")
+        self.client.get(reverse("kitchen:index"))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("kitchen:index")).status_code, 200)
+
+
+class DispatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cook_model = get_user_model()
+        cls.ann, cls.ben, cls.cat = (cook_model.objects.create_user(username=f"line-{name}") for name in "abc")
+        dish_type = DishType.objects.create(name="Dispatch mains")
+        cls.soup = Dish.objects.create(name="Dispatch soup", dish_type=dish_type)
+        cls.soup.cooks.set([cls.ann, cls.ben])
+        cls.steak = Dish.objects.create(name="Dispatch steak", dish_type=dish_type)
+        cls.steak.cooks.set([cls.cat])
+        cls.bread = Dish.objects.create(name="Dispatch bread", dish_type=dish_type)
+
+    def setUp(self):
+        cache.clear()
+        dispatch.reset()
+
+    def order(self, *dishes, priority=0):
+        order = Order.objects.create(priority=priority)
+        OrderItem.objects.bulk_create(OrderItem(order=order, dish=dish) for dish in dishes)
+        return order
+
+    def cooks(self, order):
+        return list(order.items.values_list("cook__username", flat=True))
+
+    def test_least_loaded_eligible_cook(self):
+        order = self.order(self.soup, self.soup, self.soup, self.steak, self.bread)
+        dispatch.dispatch_order(order)
+        self.assertEqual(self.cooks(order), ["line-a", "line-b", "line-a", "line-c", None])
+        self.assertEqual(order.items.get(dish=self.bread).status, OrderItem.Status.QUEUED)
+
+        # the second cook finishes their soup: 0 open against 2
+        dispatch.get_dispatcher().complete([order.items.get(cook=self.ben).pk])
+        second = self.order(self.soup)
+        dispatch.dispatch_order(second)
+        self.assertEqual(self.cooks(second), ["line-b"])
+
+    def test_priority_first_and_batched_writes(self):
+        later = self.order(self.steak)
+        urgent = self.order(self.steak, priority=5)
+        dispatcher = dispatch.get_dispatcher()
+        self.assertEqual(dispatcher.dispatch(limit=1), [(urgent.items.get().pk, self.cat.pk)])
+        dispatcher.dispatch()
+        with self.assertNumQueries(1):
+            self.assertEqual(dispatcher.flush(), 2)
+        self.assertEqual(self.cooks(later), ["line-c"])
+
+
+    def test_saving_an_order_again_keeps_done_items(self):
+        order = self.order(self.steak)
+        dispatch.dispatch_order(order)
+        item = order.items.get()
+        dispatch.get_dispatcher().complete([item.pk])
+        dispatch.dispatch_order(order)
+        item.refresh_from_db()
+        self.assertEqual(item.status, OrderItem.Status.DONE)
+        self.assertEqual(dispatch.get_dispatcher().load[self.cat.pk], 0)
+
+    def test_items_assigned_elsewhere_are_not_overwritten(self):
+        item = self.order(self.steak).items.get()
+        dispatcher = dispatch.get_dispatcher()
+        # another process's dispatcher got there first
+        OrderItem.objects.filter(pk=item.pk).update(cook=self.ann, status=OrderItem.Status.ASSIGNED)
+        self.assertEqual(dispatcher.dispatch(), [(item.pk, self.cat.pk)])
+        self.assertEqual(dispatcher.flush(), 0)
+        self.assertEqual(OrderItem.objects.get(pk=item.pk).cook, self.ann)
+        self.assertEqual(dispatcher.load[self.cat.pk], 0)
+
+class IndexTests(TestCase):
+    def test_list_views_do_not_scan_tables(self):
+        out = io.StringIO()
+        call_command("explain_queries", "--strict", stdout=out)
+        self.assertIn("0 sequential scan(s)", out.getvalue())
+        self.assertFalse(get_user_model().objects.filter(username="explain-runner").exists())
+
+    def test_lower_name_lookup_uses_the_functional_index(self):
+        soup = DishType.objects.create(name="Index soup")
+        Dish.objects.create(name="Index Borscht", dish_type=soup)
+        queryset = Dish.objects.filter(name__lower="index borscht")
+        self.assertEqual([dish.name for dish in queryset], ["Index Borscht"])
+        self.assertIn("dish_name_lower_idx", queryset.explain())
+
+
+class DatabaseProfileTests(TestCase):
+    def connect(self, profile: str):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "profile.sqlite3")
+        connections.settings["profile"] = {**connection.settings_dict, "NAME": path}
+        db.profile_overrides["profile"] = profile
+
+        def cleanup():
+            connections["profile"].close()
+            del connections["profile"]
+            del connections.settings["profile"]
+            db.profile_overrides.pop("profile")
+
+        self.addCleanup(cleanup)
+        return connections["profile"], path
+
+    def pragma(self, conn, name: str):
+        with conn.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_tuned_profile_configures_sqlite_connections(self):
+        conn, _path = self.connect("tuned")
+        self.assertEqual(self.pragma(conn, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(conn, "synchronous"), 1)
+        self.assertEqual(self.pragma(conn, "busy_timeout"), 5000)
+
+    def test_stock_profile_keeps_sqlite_defaults(self):
+        conn, _path = self.connect("stock")
+        self.assertEqual(self.pragma(conn, "journal_mode"), "delete")
+        self.assertEqual(self.pragma(conn, "synchronous"), 2)
+
+    def test_tuned_transactions_take_the_write_lock_up_front(self):
+        conn, path = self.connect("tuned")
+        conn.ensure_connection()
+        other = sqlite3.connect(path, timeout=0)
+        self.addCleanup(other.close)
+        with transaction.atomic(using="profile"):
+            with self.assertRaises(sqlite3.OperationalError):
+                other.execute("BEGIN IMMEDIATE")
+
+
+class LiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="live")
+        cls.dish_type = DishType.objects.create(name="Live mains")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def events(self, last_event_id=""):
+        async def collect():
+            return [chunk async for chunk in live.stream(last_event_id)]
+
+        with override_settings(KITCHEN_LIVE_STREAM_SECONDS=0.05):
+            return "".join(asyncio.run(collect()))
+
+    def test_save_publishes_on_commit(self):
+        start = live.hub.last_event_id
+        with self.captureOnCommitCallbacks(execute=True):
+            dish = Dish.objects.create(name="Live soup", dish_type=self.dish_type)
+        text = self.events(start)
+        self.assertIn("event: dish\n", text)
+        self.assertIn(f'"id": {dish.pk}', text)
+        self.assertIn(f'"num_dishes": {Dish.objects.count()}', text)
+        # ids from another process (or an old one) are not replayed
+        self.assertNotIn("event: dish", self.events(f"other-{live.hub.last_id - 1}"))
+
+    def test_reload_when_history_is_gone(self):
+        hub = live.Hub(history=2)
+
+        async def subscribe():
+            for n in range(4):
+                hub.publish("dish", {"n": n})
+            subscriber = hub.subscribe(f"{hub.token}-1")
+            return [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+
+        self.assertEqual([event["type"] for event in asyncio.run(subscribe())], ["reload"])
+
+    def test_page_and_stream_under_wsgi(self):
+        response = self.client.get(reverse("kitchen:live"))
+        self.assertContains(response, f"last_event_id={live.hub.last_event_id}")
+        self.assertEqual(self.client.get(reverse("kitchen:live-events")).status_code, 503)
+
+
+@override_settings(KITCHEN_ASYNC_VIEWS=True)
+class AsyncViewTests(TestCase):
+    @classmethod
+    def reload_urls(cls):
+        for module in (kitchen_urls, kitchen_service_urls):
+            importlib.reload(module)
+        clear_url_caches()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reload_urls()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.reload_urls()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="async", password="async12345")
+        dish_type = DishType.objects.create(name="Async")
+        Dish.objects.bulk_create(Dish(name=f"Async dish {i:02d}", dish_type=dish_type) for i in range(25))
+        cls.dish = Dish.objects.get(name="Async dish 00")
+        cls.dish.cooks.add(cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_async_views_are_routed(self):
+        self.assertIs(resolve("/dishes/").func.view_class, async_views.AsyncDishListView)
+
+    def test_pages_render(self):
+        response = self.client.get(reverse("kitchen:index"))
+        self.assertEqual(response.context["num_dishes"], Dish.objects.count())
+        response = self.client.get(reverse("kitchen:dish-detail", args=[self.dish.pk]))
+        self.assertContains(response, "Async dish 00")
+        self.assertContains(response, "async")
+
+    def test_list_pagination(self):
+        url = reverse("kitchen:dish-list")
+        pages = Dish.objects.count() // 10 + 1
+        response = self.client.get(url, {"q": "async", "page": 2})
+        self.assertEqual(response.context["page_obj"].number, 2)
+        self.assertEqual(len(response.context["dish_list"]), 10)
+        self.assertEqual(self.client.get(url, {"page": pages + 1}).status_code, 404)
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("kitchen:dish-list")).status_code, 302)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "kitchen_cache_async_test",
+            }
+        }
+    )
+    def test_pages_render_with_the_database_cache(self):
+        call_command("createcachetable", verbosity=0)
+        urls = [
+            reverse("kitchen:index"),
+            reverse("kitchen:dish-list"),
+            reverse("kitchen:dish-detail", args=[self.dish.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertEqual(self.client.get(url).status_code, 200)
+        # the dish list and detail answer their second request from the cache
+        self.assertEqual(caching.get_stats()["view"], {"hit": 2, "miss": 2})
+
+
+class QueryBudgetTests(TestCase):
+    """Every page runs a constant number of queries, whatever the catalog size."""
+
+    serial = count()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="budget", password="budget12345")
+        cls.dish = Dish.objects.create(name="Budget dish", dish_type=DishType.objects.create(name="Budget"))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def populate(self, scale: int) -> None:
+        """Add catalog rows; the user and ``self.dish`` get related rows too."""
+        n = next(self.serial)
+        dish_types = DishType.objects.bulk_create(
+            DishType(name=f"type-{n}-{i}") for i in range(3 * scale)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"ingredient-{n}-{i}") for i in range(10 * scale)
+        )
+        cooks = get_user_model().objects.bulk_create(
+            get_user_model()(username=f"cook-{n}-{i}") for i in range(5 * scale)
+        )
+        dishes = Dish.objects.bulk_create(
+            Dish(name=f"dish-{n}-{i}", dish_type=dish_types[i % len(dish_types)])
+            for i in range(20 * scale)
+        )
+        for i, dish in enumerate(dishes):
+            dish.cooks.add(self.user, cooks[i % len(cooks)])
+            dish.ingredients.add(*ingredients[i % 5:i % 5 + 5])
+        self.dish.cooks.add(*cooks)
+        self.dish.ingredients.add(*ingredients)
+
+    def count_queries(self, url: str) -> int:
+        cache.clear()  # measure the cold path of cached pages
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assert_constant_queries(self, url_name: str, *args) -> None:
+        url = reverse(url_name, args=args)
+        self.populate(scale=1)
+        small = self.count_queries(url)
+        self.populate(scale=3)
+        with query_budget(QUERY_BUDGET):
+            large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url_name} query count grows with the data")
+
+    def test_index(self):
+        self.assert_constant_queries("kitchen:index")
+
+    def test_list_views(self):
+        for url_name in ("kitchen:cook-list", "kitchen:dish-type-list", "kitchen:ingredient-list", "kitchen:dish-list"):
+            with self.subTest(url_name):
+                self.assert_constant_queries(url_name)
+
+    def test_api_views(self):
+        for url_name in ("api-v1:dish-list", "api-v1:cook-list", "api-v1:ingredient-list"):
+            with self.subTest(url_name):
+                self.assert_constant_queries(url_name)
+
+    def test_autocomplete_views(self):
+        for url_name in ("kitchen:cook-autocomplete", "kitchen:ingredient-autocomplete"):
+            with self.subTest(url_name):
+                self.assert_constant_queries(url_name)
+
+    def test_detail_views(self):
+        self.assert_constant_queries("kitchen:cook-detail", self.user.pk)
+        self.assert_constant_queries("kitchen:dish-detail", self.dish.pk)
+
+    def test_create_views(self):
+        for url_name in ("kitchen:cook-create", "kitchen:dish-type-create", "kitchen:ingredient-create", "kitchen:dish-create"):
+            with self.subTest(url_name):
+                self.assert_constant_queries(url_name)
+
+    def test_update_and_delete_views(self):
+        objects = {
+            "cook": self.user,
+            "dish-type": self.dish.dish_type,
+            "ingredient": Ingredient.objects.create(name="Budget ingredient"),
+            "dish": self.dish,
+        }
+        for prefix, obj in objects.items():
+            for action in ("update", "delete"):
+                with self.subTest(f"{prefix}-{action}"):
+                    self.assert_constant_queries(f"kitchen:{prefix}-{action}", obj.pk)
+
+    def test_dish_form_renders_only_selected_choices(self):
+        self.populate(scale=1)
+        Ingredient.objects.create(name="Unused ingredient")
+        response = self.client.get(reverse("kitchen:dish-update", args=[self.dish.pk]))
+        for ingredient in self.dish.ingredients.all():
+            self.assertContains(response, f">{ingredient.name}</option>")
+        self.assertNotContains(response, "Unused ingredient")
+
+    def test_query_budget_fails_when_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(Dish.objects.all())
+                list(DishType.objects.all())
+
+    def test_query_budget_as_decorator(self):
+        @query_budget(1)
+        def one_query():
+            return list(Dish.objects.all())
+
+        self.assertTrue(one_query())
@@ -1,14 +1,25 @@
+from django.conf import settings
 from django.urls import path
 
-from kitchen import views
+from kitchen import async_views, views
 
 app_name = "kitchen"
 
+
+def read_view(sync_view, async_view):
+    """The async variant of a read-heavy page when serving through ASGI."""
+    return (async_view if settings.KITCHEN_ASYNC_VIEWS else sync_view).as_view()
+
+
 urlpatterns = [
-    path("", views.IndexView.as_view(), name="index"),
+    path("", read_view(views.IndexView, async_views.AsyncIndexView), name="index"),
+    path("live/", views.LiveView.as_view(), name="live"),
+    path("live/events/", async_views.LiveEventsView.as_view(), name="live-events"),
+    path("deletions/<int:pk>/", views.DeletionDetailView.as_view(), name="deletion-detail"),
 
     # Cooks
     path("cooks/", views.CookListView.as_view(), name="cook-list"),
+    path("cooks/autocomplete/", views.CookAutocompleteView.as_view(), name="cook-autocomplete"),
     path("cooks/create/", views.CookCreateView.as_view(), name="cook-create"),
     path("cooks/<int:pk>/", views.CookDetailView.as_view(), name="cook-detail"),
     path("cooks/<int:pk>/update/", views.CookUpdateView.as_view(), name="cook-update"),
@@ -22,14 +33,18 @@ urlpatterns = [
 
     # Ingredients
     path("ingredients/", views.IngredientListView.as_view(), name="ingredient-list"),
+    path("ingredients/autocomplete/", views.IngredientAutocompleteView.as_view(), name="ingredient-autocomplete"),
     path("ingredients/create/", views.IngredientCreateView.as_view(), name="ingredient-create"),
     path("ingredients/<int:pk>/update/", views.IngredientUpdateView.as_view(), name="ingredient-update"),
     path("ingredients/<int:pk>/delete/", views.IngredientDeleteView.as_view(), name="ingredient-delete"),
 
     # Dishes
-    path("dishes/", views.DishListView.as_view(), name="dish-list"),
+    path("dishes/", read_view(views.DishListView, async_views.AsyncDishListView), name="dish-list"),
     path("dishes/create/", views.DishCreateView.as_view(), name="dish-create"),
-    path("dishes/<int:pk>/", views.DishDetailView.as_view(), name="dish-detail"),
+    path("dishes/bulk-edit/", views.DishBulkEditView.as_view(), name="dish-bulk-edit"),
+    path(
+        "dishes/<int:pk>/", read_view(views.DishDetailView, async_views.AsyncDishDetailView), name="dish-detail"
+    ),
     path("dishes/<int:pk>/update/", views.DishUpdateView.as_view(), name="dish-update"),
     path("dishes/<int:pk>/delete/", views.DishDeleteView.as_view(), name="dish-delete"),
 ]
@@ -1,54 +1,78 @@
+from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
-from django.db.models import Q
-from django.urls import reverse_lazy
+from django.db.models import Prefetch
+from django.http import HttpResponseRedirect, JsonResponse, QueryDict
+from django.urls import reverse, reverse_lazy
 from django.views import generic
 
+from kitchen import bulk, counters, deletion, facets, live
+from kitchen.caching import CachedResponseMixin
 from kitchen.forms import (
     CookCreationForm,
     CookUpdateForm,
+    DishBulkEditForm,
+    DishCountFilterForm,
+    DishFacetForm,
     DishForm,
     DishTypeForm,
     IngredientForm,
     SearchForm,
 )
-from kitchen.models import Dish, DishType, Ingredient
+from kitchen.models import Deletion, Dish, DishType, Ingredient
+from kitchen.pagination import KeysetPaginationMixin
+from kitchen.search import get_search_backend
 
 
-class IndexView(LoginRequiredMixin, generic.TemplateView):
-    template_name = "kitchen/index.html"
+class DishCountListMixin:
+    """Sort and filter a list on the stored ``dish_count`` (``?sort=``, ``?min_dishes=``)."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        form = DishCountFilterForm(self.request.GET)
+        if not form.is_valid():
+            return queryset
+        if form.cleaned_data["min_dishes"] is not None:
+            queryset = queryset.filter(dish_count__gte=form.cleaned_data["min_dishes"])
+        if form.cleaned_data["sort"]:
+            # an explicit sort wins over search ranking
+            queryset = queryset.order_by(form.cleaned_data["sort"], "pk")
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["num_cooks"] = get_user_model().objects.count()
-        context["num_dish_types"] = DishType.objects.count()
-        context["num_dishes"] = Dish.objects.count()
-        context["num_ingredients"] = Ingredient.objects.count()
-
-        context["latest_dishes"] = Dish.objects.select_related("dish_type").prefetch_related("cooks").order_by(
-            "-created_at"
-        )[:5]
+        context["filter_form"] = DishCountFilterForm(self.request.GET)
         return context
 
 
-# ======== Cook ========
-class CookListView(LoginRequiredMixin, generic.ListView):
-    model = get_user_model()
-    paginate_by = 10
-    template_name = "kitchen/cook_list.html"
-    context_object_name = "cook_list"
+class DishFacetMixin:
+    """Filter the dish list by facets and count the dishes per facet value."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        self.facet_form = DishFacetForm(self.request.GET)
+        # search applies to the counts as well, the facet filters are applied per facet
+        self.facet_base = queryset
+        if self.facet_form.is_valid():
+            queryset = facets.filter_dishes(queryset, self.facet_form.cleaned_data)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        data = self.facet_form.cleaned_data if self.facet_form.is_valid() else {}
+        context["facet_form"] = self.facet_form
+        context["facets"] = facets.Facets(self.facet_base, data, self.request.GET)
+        return context
+
+
+class SearchMixin:
+    """Filter (and rank) a list view's queryset through the search backend."""
 
     def get_queryset(self):
-        queryset = super().get_queryset().annotate(num_dishes=Count("dishes"))
+        queryset = super().get_queryset()
         form = SearchForm(self.request.GET)
         if form.is_valid() and form.cleaned_data.get("q"):
-            q = form.cleaned_data["q"]
-            queryset = queryset.filter(
-                Q(username__icontains=q)
-                | Q(first_name__icontains=q)
-                | Q(last_name__icontains=q)
-            )
+            queryset = get_search_backend().search(queryset, form.cleaned_data["q"])
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -57,19 +81,141 @@ class CookListView(LoginRequiredMixin, generic.ListView):
         return context
 
 
-class CookDetailView(LoginRequiredMixin, generic.DetailView):
+class AutocompleteView(LoginRequiredMixin, generic.View):
+    """
+    JSON lookup for ``AutocompleteSelectMultiple``.
+
+    ``?q=`` is matched as a word prefix through the search backend's index;
+    ``?limit=`` is capped at ``max_limit``.
+    """
+
+    model = None
+    default_limit = 20
+    max_limit = 50
+
+    def get_limit(self) -> int:
+        try:
+            limit = int(self.request.GET.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_queryset(self):
+        queryset = self.model._default_manager.all()
+        q = self.request.GET.get("q", "").strip()
+        if q:
+            queryset = get_search_backend().search(queryset, q)
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_limit()
+        objects = list(self.get_queryset()[: limit + 1])
+        return JsonResponse(
+            {
+                "results": [{"id": obj.pk, "text": str(obj)} for obj in objects[:limit]],
+                "more": len(objects) > limit,
+            }
+        )
+
+
+class IndexView(LoginRequiredMixin, generic.TemplateView):
+    template_name = "kitchen/index.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(counters.get_totals())
+        context["latest_dishes"] = counters.get_latest_dishes()
+        return context
+
+
+class LiveView(LoginRequiredMixin, generic.TemplateView):
+    """Kitchen display: recently changed dishes and the totals, kept current by ``/live/events/``."""
+
+    template_name = "kitchen/live.html"
+    size = 30
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # read before the queries, so the stream replays anything committed meanwhile
+        context["last_event_id"] = live.hub.last_event_id
+        context.update(counters.get_totals())
+        context["dishes"] = (
+            Dish.objects.select_related("dish_type")
+            .prefetch_related("cooks")
+            .order_by("-updated_at")[: self.size]
+        )
+        return context
+
+
+class ChunkedDeleteMixin:
+    """
+    Delete through ``kitchen.deletion``: the confirmation page previews what
+    goes with the record, and confirming marks it pending and hands the
+    cascade to a background worker instead of deleting it in the request.
+    """
+
+    template_name = "kitchen/confirm_delete.html"
+
+    def get_queryset(self):
+        return super().get_queryset().filter(pending_deletion=False)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["impact"] = deletion.impact(self.object)
+        return context
+
+    def form_valid(self, form):
+        job = deletion.schedule(self.object, requested_by=self.request.user)
+        messages.info(self.request, f"{job.object_repr} will be deleted in the background.")
+        return HttpResponseRedirect(reverse("kitchen:deletion-detail", args=[job.pk]))
+
+
+class DeletionDetailView(LoginRequiredMixin, generic.DetailView):
+    """Progress of a chunked deletion; the page refreshes itself until it finishes."""
+
+    model = Deletion
+    template_name = "kitchen/deletion_detail.html"
+    # a job's progress, not a catalog page
+    benchmark = False
+
+
+# ======== Cook ========
+class CookListView(
+    LoginRequiredMixin,
+    CachedResponseMixin,
+    DishCountListMixin,
+    SearchMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
+    model = get_user_model()
+    paginate_by = 10
+    template_name = "kitchen/cook_list.html"
+    cache_dependencies = ("kitchen.Cook", "kitchen.Dish")
+    context_object_name = "cook_list"
+
+
+class CookAutocompleteView(AutocompleteView):
+    model = get_user_model()
+
+
+class CookDetailView(LoginRequiredMixin, CachedResponseMixin, generic.DetailView):
     model = get_user_model()
     template_name = "kitchen/cook_detail.html"
+    cache_dependencies = ("kitchen.Cook", "kitchen.Dish", "kitchen.DishType")
     context_object_name = "cook"
 
     def get_queryset(self):
-        return super().get_queryset().prefetch_related("dishes")
+        return super().get_queryset().prefetch_related(
+            Prefetch("dishes", queryset=Dish.objects.select_related("dish_type"))
+        )
 
 
 class CookCreateView(LoginRequiredMixin, generic.CreateView):
     model = get_user_model()
     form_class = CookCreationForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "New cook"}
     success_url = reverse_lazy("kitchen:cook-list")
 
 
@@ -77,38 +223,35 @@ class CookUpdateView(LoginRequiredMixin, generic.UpdateView):
     model = get_user_model()
     form_class = CookUpdateForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "Edit cook"}
     success_url = reverse_lazy("kitchen:cook-list")
 
 
-class CookDeleteView(LoginRequiredMixin, generic.DeleteView):
+class CookDeleteView(LoginRequiredMixin, ChunkedDeleteMixin, generic.DeleteView):
     model = get_user_model()
-    template_name = "kitchen/confirm_delete.html"
     success_url = reverse_lazy("kitchen:cook-list")
 
 
 # ======== DishType ========
-class DishTypeListView(LoginRequiredMixin, generic.ListView):
+class DishTypeListView(
+    LoginRequiredMixin,
+    CachedResponseMixin,
+    DishCountListMixin,
+    SearchMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
     model = DishType
     paginate_by = 10
     template_name = "kitchen/dish_type_list.html"
-
-    def get_queryset(self):
-        queryset = super().get_queryset().annotate(num_dishes=Count("dishes"))
-        form = SearchForm(self.request.GET)
-        if form.is_valid() and form.cleaned_data.get("q"):
-            queryset = queryset.filter(name__icontains=form.cleaned_data["q"])
-        return queryset
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["search_form"] = SearchForm(self.request.GET)
-        return context
+    cache_dependencies = ("kitchen.DishType", "kitchen.Dish")
 
 
 class DishTypeCreateView(LoginRequiredMixin, generic.CreateView):
     model = DishType
     form_class = DishTypeForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "New dish type"}
     success_url = reverse_lazy("kitchen:dish-type-list")
 
 
@@ -116,38 +259,39 @@ class DishTypeUpdateView(LoginRequiredMixin, generic.UpdateView):
     model = DishType
     form_class = DishTypeForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "Edit dish type"}
     success_url = reverse_lazy("kitchen:dish-type-list")
 
 
-class DishTypeDeleteView(LoginRequiredMixin, generic.DeleteView):
+class DishTypeDeleteView(LoginRequiredMixin, ChunkedDeleteMixin, generic.DeleteView):
     model = DishType
-    template_name = "kitchen/confirm_delete.html"
     success_url = reverse_lazy("kitchen:dish-type-list")
 
 
 # ======== Ingredient ========
-class IngredientListView(LoginRequiredMixin, generic.ListView):
+class IngredientListView(
+    LoginRequiredMixin,
+    CachedResponseMixin,
+    DishCountListMixin,
+    SearchMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
     model = Ingredient
     paginate_by = 10
     template_name = "kitchen/ingredient_list.html"
+    cache_dependencies = ("kitchen.Ingredient", "kitchen.Dish")
 
-    def get_queryset(self):
-        queryset = super().get_queryset().annotate(num_dishes=Count("dishes"))
-        form = SearchForm(self.request.GET)
-        if form.is_valid() and form.cleaned_data.get("q"):
-            queryset = queryset.filter(name__icontains=form.cleaned_data["q"])
-        return queryset
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["search_form"] = SearchForm(self.request.GET)
-        return context
+class IngredientAutocompleteView(AutocompleteView):
+    model = Ingredient
 
 
 class IngredientCreateView(LoginRequiredMixin, generic.CreateView):
     model = Ingredient
     form_class = IngredientForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "New ingredient"}
     success_url = reverse_lazy("kitchen:ingredient-list")
 
 
@@ -155,6 +299,7 @@ class IngredientUpdateView(LoginRequiredMixin, generic.UpdateView):
     model = Ingredient
     form_class = IngredientForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "Edit ingredient"}
     success_url = reverse_lazy("kitchen:ingredient-list")
 
 
@@ -165,33 +310,89 @@ class IngredientDeleteView(LoginRequiredMixin, generic.DeleteView):
 
 
 # ======== Dish ========
-class DishListView(LoginRequiredMixin, generic.ListView):
+class DishListView(
+    LoginRequiredMixin,
+    CachedResponseMixin,
+    DishFacetMixin,
+    SearchMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+):
     model = Dish
     paginate_by = 10
     template_name = "kitchen/dish_list.html"
+    cache_dependencies = ("kitchen.Dish", "kitchen.DishType", "kitchen.Cook", "kitchen.Ingredient")
 
     def get_queryset(self):
-        queryset = (
+        return (
             super()
             .get_queryset()
             .select_related("dish_type")
             .prefetch_related("cooks", "ingredients")
         )
-        form = SearchForm(self.request.GET)
-        if form.is_valid() and form.cleaned_data.get("q"):
-            q = form.cleaned_data["q"]
-            queryset = queryset.filter(Q(name__icontains=q) | Q(description__icontains=q))
-        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["search_form"] = SearchForm(self.request.GET)
+        context["bulk_form"] = DishBulkEditForm()
         return context
 
 
-class DishDetailView(LoginRequiredMixin, generic.DetailView):
+class DishBulkEditView(LoginRequiredMixin, generic.FormView):
+    """
+    Apply a ``DishBulkEditForm`` operation to the dishes checked on the list
+    (``dish``) or, with ``scope=all``, to every dish matching the list's
+    search and filters (``query``, the list's query string).
+    """
+
+    form_class = DishBulkEditForm
+    http_method_names = ["post"]
+
+    def get_list_query(self) -> QueryDict:
+        return QueryDict(self.request.POST.get("query", ""))
+
+    def get_success_url(self) -> str:
+        query = self.get_list_query().urlencode()
+        return reverse("kitchen:dish-list") + (f"?{query}" if query else "")
+
+    def get_dish_ids(self) -> list[int]:
+        if self.request.POST.get("scope") == "all":
+            params = self.get_list_query()
+            queryset = Dish.objects.all()
+            search_form = SearchForm(params)
+            if search_form.is_valid() and search_form.cleaned_data.get("q"):
+                queryset = get_search_backend().search(queryset, search_form.cleaned_data["q"])
+            facet_form = DishFacetForm(params)
+            if facet_form.is_valid():
+                queryset = facets.filter_dishes(queryset, facet_form.cleaned_data)
+            return bulk.dish_ids_of(queryset)
+        ids = [value for value in self.request.POST.getlist("dish") if value.isdigit()]
+        return bulk.dish_ids_of(Dish.objects.filter(pk__in=ids))
+
+    def form_valid(self, form):
+        dish_ids = self.get_dish_ids()
+        label = bulk.ACTIONS[form.cleaned_data["action"]]
+        if not dish_ids:
+            messages.warning(self.request, "No dishes selected.")
+        elif job := bulk.defer(dish_ids, form.cleaned_data):
+            messages.info(self.request, f"{label}: {len(dish_ids)} dish(es) queued as job #{job.pk}.")
+        else:
+            changed = bulk.apply(dish_ids, form.cleaned_data)
+            messages.success(self.request, f"{label}: {changed} change(s) over {len(dish_ids)} dish(es).")
+        return HttpResponseRedirect(self.get_success_url())
+
+    def form_invalid(self, form):
+        errors = [
+            f"{form[name].label}: {' '.join(field_errors)}" if name in form.fields else " ".join(field_errors)
+            for name, field_errors in form.errors.items()
+        ]
+        messages.error(self.request, "Bulk edit failed - " + "; ".join(errors))
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class DishDetailView(LoginRequiredMixin, CachedResponseMixin, generic.DetailView):
     model = Dish
     template_name = "kitchen/dish_detail.html"
+    cache_dependencies = ("kitchen.Dish", "kitchen.DishType", "kitchen.Cook", "kitchen.Ingredient")
 
     def get_queryset(self):
         return (
@@ -206,6 +407,7 @@ class DishCreateView(LoginRequiredMixin, generic.CreateView):
     model = Dish
     form_class = DishForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "New dish"}
     success_url = reverse_lazy("kitchen:dish-list")
 
 
@@ -213,6 +415,7 @@ class DishUpdateView(LoginRequiredMixin, generic.UpdateView):
     model = Dish
     form_class = DishForm
     template_name = "kitchen/form.html"
+    extra_context = {"title": "Edit dish"}
     success_url = reverse_lazy("kitchen:dish-list")
 
 
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kitchen_service.settings')
+# serve the async versions of the read-heavy pages (see kitchen.async_views)
+os.environ.setdefault('KITCHEN_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -52,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # outermost, so its timings include every other middleware
+    "kitchen.perf.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -87,21 +89,157 @@ WSGI_APPLICATION = "kitchen_service.wsgi.application"
 # - Otherwise -> fallback to local SQLite (prevents dj_database_url crash)
 database_url = os.environ.get("DATABASE_URL", "").strip()
 
+# Connection profile (see kitchen/db.py): "tuned" puts SQLite in WAL mode with
+# synchronous=NORMAL, a busy timeout and mmap, and health-checks persistent
+# Postgres connections; "stock" keeps the database defaults.
+KITCHEN_DB_PROFILE = os.environ.get("KITCHEN_DB_PROFILE", "tuned")
+KITCHEN_SQLITE_BUSY_TIMEOUT = int(os.environ.get("KITCHEN_SQLITE_BUSY_TIMEOUT", "5000"))
+KITCHEN_SQLITE_MMAP_SIZE = int(os.environ.get("KITCHEN_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
 if database_url:
     DATABASES = {
         "default": dj_database_url.config(
             default=database_url,
-            conn_max_age=600,
+            conn_max_age=int(os.environ.get("KITCHEN_DB_CONN_MAX_AGE", "600")),
+            conn_health_checks=KITCHEN_DB_PROFILE == "tuned",
+            # exports stream through server-side cursors, which do not survive
+            # transaction-mode poolers (PgBouncer): set this to 0 behind one
+            disable_server_side_cursors=os.environ.get("KITCHEN_DB_SERVER_SIDE_CURSORS", "1") != "1",
         ),
     }
 else:
     DATABASES = {
         "default": {
-            "ENGINE": "django.db.backends.sqlite3",
+            # stock SQLite backend, plus BEGIN IMMEDIATE in the "tuned" profile
+            "ENGINE": "kitchen.db_backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
         }
     }
 
+# List view search: "auto" picks FTS5 on SQLite and tsvector on Postgres,
+# "icontains" keeps the plain substring filter.
+KITCHEN_SEARCH_BACKEND = os.environ.get("KITCHEN_SEARCH_BACKEND", "auto")
+
+# List view pagination: "offset" (page numbers) or "keyset" (opaque cursors,
+# constant cost per page). The total count can be "exact", "estimate"
+# (Postgres planner estimate) or "none".
+KITCHEN_PAGINATION_MODE = os.environ.get("KITCHEN_PAGINATION_MODE", "offset")
+KITCHEN_PAGINATION_COUNT = os.environ.get("KITCHEN_PAGINATION_COUNT", "exact")
+
+# The default cache, behind the dashboard counters, page cache generations,
+# cached sessions and request.user. "file" (the default) is shared by every
+# worker on the host, "db" (run "manage.py createcachetable" once) by every
+# host. "locmem" is per process, so only use it with a single worker: other
+# workers never see its invalidations. Cached totals are recounted after
+# KITCHEN_COUNTER_TIMEOUT seconds ("none" keeps them until invalidated),
+# which bounds drift from writes that bypass signals and from cache.incr,
+# which is not atomic on the file and database caches. The file cache lives
+# in .cache/ of the checkout (KITCHEN_CACHE_LOCATION); "manage.py test" gives
+# it a temporary directory of its own (kitchen.testing.TestRunner).
+KITCHEN_CACHE_BACKEND = os.environ.get("KITCHEN_CACHE_BACKEND", "file")
+if KITCHEN_CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("KITCHEN_CACHE_LOCATION", BASE_DIR / ".cache" / "kitchen"),
+        }
+    }
+elif KITCHEN_CACHE_BACKEND == "db":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "kitchen_cache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "kitchen",
+        }
+    }
+# whether every worker sees the same cache
+KITCHEN_SHARED_CACHE = KITCHEN_CACHE_BACKEND != "locmem"
+_counter_timeout = os.environ.get("KITCHEN_COUNTER_TIMEOUT", "60")
+KITCHEN_COUNTER_TIMEOUT = None if _counter_timeout == "none" else int(_counter_timeout)
+
+# Seconds to keep cached list/detail pages and template fragments; they are
+# also invalidated by model signals. 0 disables the view/fragment cache.
+KITCHEN_VIEW_CACHE_TIMEOUT = int(os.environ.get("KITCHEN_VIEW_CACHE_TIMEOUT", "300"))
+
+# Session storage: "db" (Django's default, a query per request),
+# "cached_db" (cache first, database as backup), "cache" (cache only),
+# "signed_cookies" (no server storage) or "file". The cache-backed engines
+# need a shared cache: with "locmem", logging out only drops the session
+# from one worker's cache. So the default is "cached_db" with a shared
+# cache and "db" otherwise.
+KITCHEN_SESSION_ENGINE = os.environ.get("KITCHEN_SESSION_ENGINE", "cached_db" if KITCHEN_SHARED_CACHE else "db")
+SESSION_ENGINE = f"django.contrib.sessions.backends.{KITCHEN_SESSION_ENGINE}"
+SESSION_FILE_PATH = os.environ.get("KITCHEN_SESSION_FILE_PATH") or None
+
+# Seconds to keep the signed-in Cook in the cache for request.user (see
+# kitchen.auth), saving its query on every page. 0 looks it up each request,
+# the default without a shared cache, where a password change or
+# deactivation would only reach one worker.
+# ModelBackend stays listed so sessions from before the switch remain valid.
+KITCHEN_USER_CACHE_TIMEOUT = int(
+    os.environ.get("KITCHEN_USER_CACHE_TIMEOUT", "300" if KITCHEN_SHARED_CACHE else "0")
+)
+AUTHENTICATION_BACKENDS = [
+    "kitchen.auth.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
+# Per-request timings (SQL, session, templates) as a Server-Timing header and
+# a JSON line on the "kitchen.perf" logger, written to KITCHEN_PERF_LOG (or
+# stderr). Aggregate the log with "manage.py perf_report".
+KITCHEN_PERF_INSTRUMENTATION = os.environ.get("KITCHEN_PERF_INSTRUMENTATION", "0") == "1"
+KITCHEN_PERF_LOG = os.environ.get("KITCHEN_PERF_LOG", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"message": {"format": "%(message)s"}},
+    "handlers": {
+        "perf": (
+            {"class": "logging.handlers.WatchedFileHandler", "filename": KITCHEN_PERF_LOG, "formatter": "message"}
+            if KITCHEN_PERF_LOG
+            else {"class": "logging.StreamHandler", "formatter": "message"}
+        ),
+    },
+    "loggers": {
+        "kitchen.perf": {"handlers": ["perf"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Route the dashboard, dish list and dish detail to their async views.
+# kitchen_service/asgi.py turns this on; keep it off under WSGI workers.
+KITCHEN_ASYNC_VIEWS = os.environ.get("KITCHEN_ASYNC_VIEWS", "0") == "1"
+
+# Seconds a live display's event stream stays open before the browser
+# reconnects (and replays what it missed); see kitchen.live.
+KITCHEN_LIVE_STREAM_SECONDS = int(os.environ.get("KITCHEN_LIVE_STREAM_SECONDS", "300"))
+
+# Dish types and cooks are deleted in batches of KITCHEN_DELETION_BATCH_SIZE
+# rows, on a background thread unless KITCHEN_DELETION_BACKGROUND=0 (then in
+# the request, still batched); see kitchen.deletion.
+KITCHEN_DELETION_BATCH_SIZE = int(os.environ.get("KITCHEN_DELETION_BATCH_SIZE", "1000"))
+KITCHEN_DELETION_BACKGROUND = os.environ.get("KITCHEN_DELETION_BACKGROUND", "1") == "1"
+
+# Database job queue (kitchen.jobs). With KITCHEN_JOBS=1, bulk edits of more
+# than KITCHEN_JOBS_DEFER_OVER dishes and chunked deletions are queued for
+# "manage.py run_workers"; running jobs without a worker heartbeat for
+# KITCHEN_JOB_TIMEOUT seconds are taken to be abandoned and queued again.
+KITCHEN_JOBS = os.environ.get("KITCHEN_JOBS", "0") == "1"
+KITCHEN_JOBS_DEFER_OVER = int(os.environ.get("KITCHEN_JOBS_DEFER_OVER", "500"))
+KITCHEN_JOB_TIMEOUT = int(os.environ.get("KITCHEN_JOB_TIMEOUT", "600"))
+
+# Demo superuser created after "migrate" (and by "manage.py bootstrap_admin")
+# if it does not exist yet. Set KITCHEN_BOOTSTRAP_ADMIN=0 to skip it.
+KITCHEN_BOOTSTRAP_ADMIN = os.environ.get("KITCHEN_BOOTSTRAP_ADMIN", "1") == "1"
+KITCHEN_ADMIN_USERNAME = os.environ.get("KITCHEN_ADMIN_USERNAME", "admin")
+KITCHEN_ADMIN_PASSWORD = os.environ.get("KITCHEN_ADMIN_PASSWORD", "admin12345")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": (
@@ -141,13 +279,31 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-if not DEBUG:
-    STATICFILES_STORAGE = (
-        "whitenoise.storage.CompressedManifestStaticFilesStorage"
-    )
+# Content-hashed names plus precompressed .br/.gz copies at collectstatic,
+# served by WhiteNoise as immutable. Needs "collectstatic", so it defaults to
+# off under DEBUG; KITCHEN_STATIC_MANIFEST=1/0 overrides that.
+KITCHEN_STATIC_MANIFEST = os.environ.get("KITCHEN_STATIC_MANIFEST", "0" if DEBUG else "1") == "1"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "whitenoise.storage.CompressedManifestStaticFilesStorage"
+            if KITCHEN_STATIC_MANIFEST
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
+# Inline the critical CSS ("manage.py build_assets") into every page and load
+# the CSS bundle without blocking the first paint - for slow tablets.
+KITCHEN_INLINE_CRITICAL_CSS = os.environ.get("KITCHEN_INLINE_CRITICAL_CSS", "0") == "1"
 
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/accounts/login/"
 
 AUTH_USER_MODEL = "kitchen.Cook"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# "manage.py test" keeps the file cache away from the dev server's
+TEST_RUNNER = "kitchen.testing.TestRunner"
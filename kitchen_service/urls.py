@@ -3,6 +3,7 @@ from django.urls import include, path
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/v1/", include("kitchen.api_urls")),
     path("accounts/", include("django.contrib.auth.urls")),
     path("", include("kitchen.urls")),
 ]
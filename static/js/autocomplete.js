@@ -0,0 +1,101 @@
+/*
+ * Progressive enhancement for AutocompleteSelectMultiple (kitchen/forms.py).
+ *
+ * The <select multiple> stays in the form and holds the selected options;
+ * this script hides it, shows the selection as removable chips and fetches
+ * matches from the widget's data-autocomplete-url as the user types.
+ */
+(function () {
+  "use strict";
+
+  function debounce(fn, delay) {
+    let timer = null;
+    return function (...args) {
+      clearTimeout(timer);
+      timer = setTimeout(() => fn.apply(this, args), delay);
+    };
+  }
+
+  function setup(select) {
+    const wrapper = document.createElement("div");
+    wrapper.className = "autocomplete";
+    const chips = document.createElement("div");
+    chips.className = "autocomplete-chips";
+    const input = document.createElement("input");
+    input.type = "search";
+    input.className = "autocomplete-input form-control";
+    input.placeholder = "Type to search...";
+    input.autocomplete = "off";
+    const menu = document.createElement("div");
+    menu.className = "autocomplete-menu";
+    menu.hidden = true;
+
+    select.hidden = true;
+    select.parentNode.insertBefore(wrapper, select);
+    wrapper.append(chips, input, menu, select);
+
+    function renderChips() {
+      chips.replaceChildren();
+      for (const option of select.selectedOptions) {
+        const chip = document.createElement("span");
+        chip.className = "autocomplete-chip";
+        chip.textContent = option.text;
+        const remove = document.createElement("button");
+        remove.type = "button";
+        remove.className = "autocomplete-remove";
+        remove.setAttribute("aria-label", "Remove " + option.text);
+        remove.textContent = "×";
+        remove.addEventListener("click", () => {
+          option.remove();
+          renderChips();
+        });
+        chip.append(remove);
+        chips.append(chip);
+      }
+    }
+
+    function choose(item) {
+      let option = select.querySelector(`option[value="${item.id}"]`);
+      if (!option) {
+        option = new Option(item.text, item.id, true, true);
+        select.append(option);
+      }
+      option.selected = true;
+      input.value = "";
+      menu.hidden = true;
+      renderChips();
+    }
+
+    const search = debounce(async () => {
+      const url = new URL(select.dataset.autocompleteUrl, window.location.origin);
+      url.searchParams.set("q", input.value.trim());
+      const response = await fetch(url, { headers: { Accept: "application/json" } });
+      if (!response.ok) return;
+      const data = await response.json();
+      menu.replaceChildren();
+      for (const item of data.results) {
+        const entry = document.createElement("button");
+        entry.type = "button";
+        entry.className = "autocomplete-item";
+        entry.textContent = item.text;
+        entry.addEventListener("click", () => choose(item));
+        menu.append(entry);
+      }
+      menu.hidden = data.results.length === 0;
+    }, 200);
+
+    input.addEventListener("input", search);
+    input.addEventListener("focus", search);
+    input.addEventListener("keydown", (event) => {
+      if (event.key === "Escape") menu.hidden = true;
+    });
+    document.addEventListener("click", (event) => {
+      if (!wrapper.contains(event.target)) menu.hidden = true;
+    });
+    renderChips();
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll("select[data-autocomplete-url]").forEach(setup);
+  });
+})();
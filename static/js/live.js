@@ -0,0 +1,107 @@
+/*
+ * Live kitchen display (kitchen/templates/kitchen/live.html).
+ *
+ * Listens to the event stream at the page's data-events-url (see
+ * kitchen/live.py), keeps the totals and the dish table current and reloads
+ * the page when the server says it missed changes. EventSource reconnects
+ * by itself and sends Last-Event-ID, so nothing is lost across reconnects.
+ */
+(function () {
+  "use strict";
+
+  const root = document.getElementById("live");
+  if (!root || !window.EventSource) {
+    return;
+  }
+  const status = document.getElementById("live-status");
+  const tbody = document.getElementById("live-dishes");
+  const log = document.getElementById("live-log");
+  let reloadTimer = null;
+
+  function setStatus(text, style) {
+    status.textContent = text;
+    status.className = `badge text-bg-${style}`;
+  }
+
+  function reloadSoon() {
+    clearTimeout(reloadTimer);
+    reloadTimer = setTimeout(() => window.location.reload(), 500);
+  }
+
+  function updateTotals(totals) {
+    for (const [name, value] of Object.entries(totals || {})) {
+      const element = root.querySelector(`[data-total="${name}"]`);
+      if (element) {
+        element.textContent = value;
+      }
+    }
+  }
+
+  function addLog(text) {
+    const item = document.createElement("li");
+    item.textContent = `${new Date().toLocaleTimeString()} ${text}`;
+    log.prepend(item);
+    while (log.children.length > 20) {
+      log.lastElementChild.remove();
+    }
+  }
+
+  function cell(text, className) {
+    const td = document.createElement("td");
+    td.textContent = text;
+    if (className) {
+      td.className = className;
+    }
+    return td;
+  }
+
+  function upsertDish(dish) {
+    const row = document.createElement("tr");
+    row.dataset.dish = dish.id;
+    row.append(
+      cell(dish.name),
+      cell(dish.dish_type),
+      cell(dish.cooks.join(", ")),
+      cell(`$${dish.price}`, "text-end"),
+    );
+    const existing = tbody.querySelector(`tr[data-dish="${dish.id}"]`);
+    if (existing) {
+      existing.replaceWith(row);
+    } else {
+      tbody.prepend(row);
+    }
+  }
+
+  function onChange(event) {
+    const data = JSON.parse(event.data);
+    updateTotals(data.totals);
+    addLog(`${data.model.replace("_", " ")} #${data.id} ${data.action}`);
+    if (data.model !== "dish") {
+      return;
+    }
+    if (data.action === "deleted") {
+      const row = tbody.querySelector(`tr[data-dish="${data.id}"]`);
+      if (row) {
+        row.remove();
+      }
+    } else if (data.object) {
+      upsertDish(data.object);
+    } else {
+      // published while nobody was connected, so without the dish
+      reloadSoon();
+    }
+  }
+
+  const source = new EventSource(root.dataset.eventsUrl);
+  source.addEventListener("open", () => setStatus("Live", "success"));
+  source.addEventListener("error", () =>
+    setStatus(source.readyState === EventSource.CLOSED ? "Disconnected" : "Reconnecting…", "warning"),
+  );
+  for (const type of ["dish", "cook", "ingredient", "dish_type"]) {
+    source.addEventListener(type, onChange);
+  }
+  source.addEventListener("reload", (event) => {
+    updateTotals(JSON.parse(event.data).totals);
+    reloadSoon();
+  });
+})();